@@ -76,6 +76,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'products.db_router.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'dropship_bot.urls'
@@ -152,6 +153,36 @@ else:
         }
     }
 
+# Perfil SQLite de alta concurrencia (opt-in): WAL, busy_timeout y synchronous
+# aplicados al abrir cada conexión (products.signals) y transacciones
+# BEGIN IMMEDIATE para que los escritores esperen el cerrojo al empezar
+SQLITE_CONCURRENCY = os.getenv('SQLITE_CONCURRENCY', 'False').lower() == 'true'
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '10000'))
+if SQLITE_CONCURRENCY and DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default'].setdefault('OPTIONS', {})['transaction_mode'] = 'IMMEDIATE'
+
+# Réplica de lectura opcional para analytics, dashboard y listados (products.db_router).
+# Tras escribir, el cliente lee del primario durante DATABASE_REPLICA_LAG_SECONDS
+DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL', '')
+DATABASE_REPLICA_LAG_SECONDS = float(os.getenv('DATABASE_REPLICA_LAG_SECONDS', '5'))
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dict(parse_database_url(DATABASE_REPLICA_URL), TEST={'MIRROR': 'default'})
+DATABASE_ROUTERS = ['products.db_router.ReplicaRouter']
+
+# Escritor único de ingesta (run_ingest_writer): enviar la ingesta (Celery, cron,
+# comandos) a su cola en lugar de escribir, filas máximas por transacción, espera
+# para agrupar envíos (segundos), reintentos con la base de datos ocupada (espera
+# inicial en segundos, exponencial) y dirección local de su cola
+INGEST_WRITER_ENABLED = os.getenv('INGEST_WRITER_ENABLED', 'False').lower() == 'true'
+INGEST_WRITER_MAX_ROWS = int(os.getenv('INGEST_WRITER_MAX_ROWS', '500'))
+INGEST_WRITER_MAX_WAIT = float(os.getenv('INGEST_WRITER_MAX_WAIT', '0.2'))
+INGEST_WRITER_RETRIES = int(os.getenv('INGEST_WRITER_RETRIES', '5'))
+INGEST_WRITER_RETRY_SECONDS = float(os.getenv('INGEST_WRITER_RETRY_SECONDS', '0.5'))
+INGEST_WRITER_ADDRESS = os.getenv('INGEST_WRITER_ADDRESS', '127.0.0.1:50071')
+INGEST_WRITER_AUTHKEY = os.getenv('INGEST_WRITER_AUTHKEY', '')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -209,6 +240,26 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Paginación por cursor de los listados de la API (products/pagination.py):
+# tamaño máximo de página pedido con ?page_size= / ?limit= y filas contadas con
+# ?total=estimate antes de recurrir a la estimación del planificador
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '100'))
+API_COUNT_ESTIMATE_CAP = int(os.getenv('API_COUNT_ESTIMATE_CAP', '10000'))
+
+# Histogramas de analytics (products/services/histograms.py): 'sql' (una consulta
+# con un COUNT filtrado por intervalo), 'numpy' (un values_list contado en memoria)
+# o 'snapshot' (instantánea del catálogo, ver CATALOG_SNAPSHOT_DIR); los dos últimos
+# requieren numpy, si no está disponible se usa 'sql'
+HISTOGRAM_ENGINE = os.getenv('HISTOGRAM_ENGINE', 'sql')
+
+# Instantánea columnar del catálogo (products/services/catalog_snapshot.py):
+# directorio de los ficheros .npy mapeados en memoria (vacío = desactivada),
+# antigüedad máxima en segundos para usarla en lugar de la base de datos y
+# versiones anteriores a conservar en disco. Requiere numpy.
+CATALOG_SNAPSHOT_DIR = os.getenv('CATALOG_SNAPSHOT_DIR', '')
+CATALOG_SNAPSHOT_MAX_AGE = int(os.getenv('CATALOG_SNAPSHOT_MAX_AGE', '1800'))
+CATALOG_SNAPSHOT_KEEP = int(os.getenv('CATALOG_SNAPSHOT_KEEP', '2'))
+
 # Celery (usar Redis como broker y backend si está disponible)
 REDIS_URL = os.getenv('REDIS_URL')  # asegurar disponible antes
 if REDIS_URL:
@@ -277,6 +328,53 @@ if REDIS_URL:
         }
     }
 
+# Rate limit compartido por host para los scrapers (token bucket)
+# 'memory' = por proceso, 'cache' = compartido entre procesos vía CACHES (Redis si REDIS_URL)
+SCRAPER_RATE_LIMIT_BACKEND = os.getenv('SCRAPER_RATE_LIMIT_BACKEND', 'cache' if REDIS_URL else 'memory')
+SCRAPER_RATE_LIMITS = {
+    'default': {
+        'rate': float(os.getenv('SCRAPER_RATE_LIMIT_RATE', '1.0')),  # peticiones por segundo
+        'burst': int(os.getenv('SCRAPER_RATE_LIMIT_BURST', '3')),
+    },
+}
+
+# Cache HTTP en disco para páginas de búsqueda (revalidación ETag / Last-Modified)
+SCRAPER_HTTP_CACHE = {
+    'ENABLED': os.getenv('SCRAPER_HTTP_CACHE_ENABLED', 'True').lower() == 'true',
+    'DIR': os.getenv('SCRAPER_HTTP_CACHE_DIR', str(BASE_DIR / '.http_cache')),
+    'TTL': int(os.getenv('SCRAPER_HTTP_CACHE_TTL', '1800')),  # segundos
+    'MAX_BYTES': int(os.getenv('SCRAPER_HTTP_CACHE_MAX_MB', '200')) * 1024 * 1024,
+}
+
+# Parseo HTML de los scrapers: backend ('lxml' o 'html.parser') y parseo parcial de contenedores
+SCRAPER_HTML_PARSER = os.getenv('SCRAPER_HTML_PARSER', 'lxml')
+SCRAPER_HTML_STRAINER = os.getenv('SCRAPER_HTML_STRAINER', 'True').lower() == 'true'
+
+# Cache aprendida de selectores de contenedor por host/layout (persistida en JSON)
+SCRAPER_SELECTOR_CACHE_PATH = os.getenv('SCRAPER_SELECTOR_CACHE_PATH', str(BASE_DIR / '.selector_cache.json'))
+
+# Ingesta de productos: filas por bloque de escritura (tarea Celery, cron y comandos)
+INGESTION_CHUNK_SIZE = int(os.getenv('INGESTION_CHUNK_SIZE', '100'))
+
+# Búsqueda de productos: 'auto' (FTS5 en SQLite, tsvector en PostgreSQL; LIKE si
+# la base de datos no tiene el índice) o 'like' para forzar la búsqueda sin índice
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto')
+
+# Retención de productos: ventana por defecto, ventanas por plataforma
+# ("aliexpress=30,amazon=90"; 0 = conservar), productos por bloque de borrado y
+# archivo previo opcional ('ndjson' comprimido, 'parquet' con pyarrow, vacío = sin archivo)
+PRODUCT_RETENTION_DAYS = int(os.getenv('PRODUCT_RETENTION_DAYS', '30'))
+PRODUCT_RETENTION_DAYS_BY_PLATFORM = {
+    platform.strip(): int(days)
+    for platform, _, days in (
+        item.partition('=') for item in os.getenv('PRODUCT_RETENTION_DAYS_BY_PLATFORM', '').split(',')
+    )
+    if platform.strip() and days.strip()
+}
+PRODUCT_RETENTION_CHUNK_SIZE = int(os.getenv('PRODUCT_RETENTION_CHUNK_SIZE', '500'))
+PRODUCT_RETENTION_ARCHIVE_FORMAT = os.getenv('PRODUCT_RETENTION_ARCHIVE_FORMAT', '')
+PRODUCT_RETENTION_ARCHIVE_DIR = os.getenv('PRODUCT_RETENTION_ARCHIVE_DIR', str(BASE_DIR / 'archive'))
+
 # CSRF Trusted Origins configurable (para HTTPS en producción)
 csrf_origins_env = os.getenv('CSRF_TRUSTED_ORIGINS')
 if csrf_origins_env:
@@ -316,6 +414,15 @@ CRONJOBS = [
     
     # Health check cada hora
     ('0 * * * *', 'products.cron.health_check_cron'),
+    
+    # Entregar notificaciones del outbox cada minuto
+    ('* * * * *', 'products.cron.deliver_notifications'),
+    
+    # Reconstruir los rollups de analytics (resumen diario y términos de títulos) a diario a las 3:30
+    ('30 3 * * *', 'products.cron.rebuild_catalog_rollups'),
+    
+    # Regenerar la instantánea columnar del catálogo cada 10 minutos
+    ('*/10 * * * *', 'products.cron.build_catalog_snapshot'),
 ]
 
 # Configuraciones adicionales para django-crontab
@@ -326,3 +433,10 @@ CRONTAB_COMMAND_SUFFIX = '2>&1'  # Capturar stderr también
 DISCORD_WEBHOOK_URL = os.getenv('DISCORD_WEBHOOK_URL', '')
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', '')
+
+# Outbox de notificaciones: filas por lote, intentos máximos, espera base entre
+# reintentos (exponencial) y duración de la reserva de un lote por un worker
+NOTIFICATION_OUTBOX_BATCH_SIZE = int(os.getenv('NOTIFICATION_OUTBOX_BATCH_SIZE', '50'))
+NOTIFICATION_OUTBOX_MAX_ATTEMPTS = int(os.getenv('NOTIFICATION_OUTBOX_MAX_ATTEMPTS', '5'))
+NOTIFICATION_OUTBOX_RETRY_SECONDS = int(os.getenv('NOTIFICATION_OUTBOX_RETRY_SECONDS', '60'))
+NOTIFICATION_OUTBOX_LEASE_SECONDS = int(os.getenv('NOTIFICATION_OUTBOX_LEASE_SECONDS', '300'))
@@ -6,7 +6,7 @@ import logging
 from datetime import datetime, timedelta
 from django.utils import timezone
 from django.db.models import Avg, Min, Max, Count, Sum, Q
-from django.db.models.functions import TruncDate, TruncHour
+from django.db.models.functions import TruncHour
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -14,13 +14,37 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.views import APIView
 from collections import defaultdict, Counter
 
+from .db_router import ReplicaReadMixin
 from .models import Product
+from .services.daily_stats import daily_totals
+from .services.histograms import Histogram, compute_histograms, parse_histograms
+from .services.retention import retention_horizon_days
+from .services.title_terms import top_terms
 from .serializers import ProductSerializer
 
 logger = logging.getLogger('products')
 
-
-class DashboardStatsView(APIView):
+# Distribuciones fijas de ProductMetricsView
+DEFAULT_HISTOGRAMS = (
+    Histogram(
+        name='price_distribution', field='price',
+        edges=(0, 10, 25, 50, 100, 999999),
+        labels=('$0-$10', '$10-$25', '$25-$50', '$50-$100', '$100+')
+    ),
+    Histogram(
+        name='rating_distribution', field='rating',
+        edges=(1, 2, 3, 4, 5, 6),
+        labels=('1★', '2★', '3★', '4★', '5★')
+    ),
+    Histogram(
+        name='shipping_distribution', field='shipping_time',
+        edges=(0, 7, 15, 30, 999),
+        labels=('1-7 días', '7-15 días', '15-30 días', '30+ días')
+    ),
+)
+
+
+class DashboardStatsView(ReplicaReadMixin, APIView):
     """
     Vista para estadísticas del dashboard principal
     """
@@ -37,22 +61,20 @@ class DashboardStatsView(APIView):
             week_ago = now - timedelta(days=7)
             month_ago = now - timedelta(days=30)
 
-            # Estadísticas básicas
-            total_products = Product.objects.count()
-            products_today = Product.objects.filter(created_at__date=today).count()
-            products_yesterday = Product.objects.filter(
-                created_at__date=yesterday.date()
-            ).count()
-            products_this_week = Product.objects.filter(created_at__gte=week_ago).count()
-            products_this_month = Product.objects.filter(created_at__gte=month_ago).count()
-
-            # Estadísticas de precios
-            price_stats = Product.objects.aggregate(
+            # Métricas escalares en una sola pasada (Count/Sum con filter=Q)
+            summary = Product.objects.aggregate(
+                total_products=Count('id'),
+                products_today=Count('id', filter=Q(created_at__date=today)),
+                products_yesterday=Count('id', filter=Q(created_at__date=yesterday.date())),
+                products_this_week=Count('id', filter=Q(created_at__gte=week_ago)),
+                products_this_month=Count('id', filter=Q(created_at__gte=month_ago)),
                 avg_price=Avg('price'),
                 min_price=Min('price'),
                 max_price=Max('price'),
                 total_value=Sum('price')
             )
+            products_today = summary['products_today']
+            products_yesterday = summary['products_yesterday']
 
             # Estadísticas por categoría
             category_stats = list(
@@ -76,14 +98,11 @@ class DashboardStatsView(APIView):
                 .order_by('-count')
             )
 
-            # Productos por día (últimos 7 días)
-            daily_stats = list(
-                Product.objects.filter(created_at__gte=week_ago)
-                .annotate(date=TruncDate('created_at'))
-                .values('date')
-                .annotate(count=Count('id'))
-                .order_by('date')
-            )
+            # Productos por día (últimos 7 días) desde el rollup diario
+            daily_stats = [
+                {'date': item['date'], 'count': item['count']}
+                for item in daily_totals(timezone.localtime(week_ago).date())
+            ]
 
             # Productos por hora (últimas 24 horas)
             hourly_stats = list(
@@ -121,16 +140,16 @@ class DashboardStatsView(APIView):
 
             data = {
                 'summary': {
-                    'total_products': total_products,
+                    'total_products': summary['total_products'],
                     'products_today': products_today,
                     'products_yesterday': products_yesterday,
-                    'products_this_week': products_this_week,
-                    'products_this_month': products_this_month,
+                    'products_this_week': summary['products_this_week'],
+                    'products_this_month': summary['products_this_month'],
                     'change_from_yesterday': round(change_from_yesterday, 2),
-                    'average_price': round(price_stats['avg_price'] or 0, 2),
-                    'min_price': round(price_stats['min_price'] or 0, 2),
-                    'max_price': round(price_stats['max_price'] or 0, 2),
-                    'total_value': round(price_stats['total_value'] or 0, 2),
+                    'average_price': round(summary['avg_price'] or 0, 2),
+                    'min_price': round(summary['min_price'] or 0, 2),
+                    'max_price': round(summary['max_price'] or 0, 2),
+                    'total_value': round(summary['total_value'] or 0, 2),
                 },
                 'charts': {
                     'daily_products': daily_stats,
@@ -156,7 +175,7 @@ class DashboardStatsView(APIView):
             )
 
 
-class ScrapingAnalyticsView(APIView):
+class ScrapingAnalyticsView(ReplicaReadMixin, APIView):
     """
     Vista para analytics específicos del scraping
     """
@@ -172,29 +191,34 @@ class ScrapingAnalyticsView(APIView):
             last_week = now - timedelta(days=7)
             last_month = now - timedelta(days=30)
 
-            # Actividad de scraping por período
+            # Actividad de scraping por período: últimas 24h sobre el índice de created_at,
+            # semana y mes (días completos) desde el rollup diario
+            week_day = timezone.localtime(last_week).date()
+            month_totals = {
+                item['date']: item['count']
+                for item in daily_totals(timezone.localtime(last_month).date())
+            }
             scraping_activity = {
                 'last_24h': Product.objects.filter(created_at__gte=last_24h).count(),
-                'last_week': Product.objects.filter(created_at__gte=last_week).count(),
-                'last_month': Product.objects.filter(created_at__gte=last_month).count(),
+                'last_week': sum(count for day, count in month_totals.items() if day >= week_day),
+                'last_month': sum(month_totals.values()),
             }
 
             # Promedio de productos por hora en las últimas 24h
             hourly_avg = scraping_activity['last_24h'] / 24 if scraping_activity['last_24h'] > 0 else 0
 
-            # Éxito del scraping por plataforma
+            # Éxito del scraping por plataforma (total y completos en una consulta agrupada)
             platform_success = {}
-            for platform_data in Product.objects.values('source_platform').annotate(count=Count('id')):
+            platform_rows = Product.objects.values('source_platform').annotate(
+                count=Count('id'),
+                complete=Count('id', filter=Q(title__isnull=False, price__gt=0, url__isnull=False))
+            )
+            for platform_data in platform_rows:
                 platform = platform_data['source_platform']
                 count = platform_data['count']
                 
                 # Calcular tasa de éxito basada en productos con datos completos
-                complete_products = Product.objects.filter(
-                    source_platform=platform,
-                    title__isnull=False,
-                    price__gt=0,
-                    url__isnull=False
-                ).count()
+                complete_products = platform_data['complete']
                 
                 success_rate = (complete_products / count * 100) if count > 0 else 0
                 
@@ -205,32 +229,33 @@ class ScrapingAnalyticsView(APIView):
                 }
 
             # Tiempo de respuesta del scraper (simulado basado en timestamps)
-            recent_products = Product.objects.filter(created_at__gte=last_24h).order_by('created_at')
+            recent_timestamps = list(
+                Product.objects.filter(created_at__gte=last_24h)
+                .order_by('created_at')
+                .values_list('created_at', flat=True)[:100]  # Primeros 100 para simular
+            )
             
             response_times = []
-            if recent_products.count() > 1:
-                for i in range(1, min(len(recent_products), 100)):  # Últimos 100 para simular
-                    time_diff = (recent_products[i].created_at - recent_products[i-1].created_at).total_seconds()
-                    if time_diff < 300:  # Solo si es menos de 5 minutos (scraping continuo)
-                        response_times.append(time_diff)
+            for previous, current in zip(recent_timestamps, recent_timestamps[1:]):
+                time_diff = (current - previous).total_seconds()
+                if time_diff < 300:  # Solo si es menos de 5 minutos (scraping continuo)
+                    response_times.append(time_diff)
 
             avg_response_time = sum(response_times) / len(response_times) if response_times else 0
 
-            # Categorías más scrapeadas
-            top_categories = list(
-                Product.objects.filter(created_at__gte=last_week)
-                .values('category')
-                .annotate(count=Count('id'))
-                .order_by('-count')[:10]
-            )
+            # Categorías más scrapeadas (rollup diario)
+            top_categories = [
+                {'category': item['category'], 'count': item['count']}
+                for item in daily_totals(week_day, by=('category',)).order_by('-count')[:10]
+            ]
 
-            # Calidad de datos
-            data_quality = {
-                'products_with_images': Product.objects.exclude(image='').count(),
-                'products_with_ratings': Product.objects.filter(rating__gt=0).count(),
-                'products_with_shipping_info': Product.objects.filter(shipping_time__gt=0).count(),
-                'total_products': Product.objects.count()
-            }
+            # Calidad de datos (una sola pasada)
+            data_quality = Product.objects.aggregate(
+                products_with_images=Count('id', filter=~Q(image='')),
+                products_with_ratings=Count('id', filter=Q(rating__gt=0)),
+                products_with_shipping_info=Count('id', filter=Q(shipping_time__gt=0)),
+                total_products=Count('id')
+            )
 
             # Calcular porcentajes de calidad
             total = data_quality['total_products']
@@ -261,7 +286,7 @@ class ScrapingAnalyticsView(APIView):
             )
 
 
-class TrendAnalysisView(APIView):
+class TrendAnalysisView(ReplicaReadMixin, APIView):
     """
     Vista para análisis de tendencias de productos
     """
@@ -277,70 +302,36 @@ class TrendAnalysisView(APIView):
                 days = 90  # Límite máximo
             
             start_date = timezone.now() - timedelta(days=days)
+            start_day = timezone.localtime(start_date).date()
 
-            # Tendencias de categorías
+            # Tendencias de categorías y de precios desde el rollup diario
+            # (una consulta: O(días × categorías) filas, sin recorrer Product)
             category_trends = defaultdict(list)
-            category_data = (
-                Product.objects.filter(created_at__gte=start_date)
-                .annotate(date=TruncDate('created_at'))
-                .values('date', 'category')
-                .annotate(count=Count('id'))
-                .order_by('date', 'category')
-            )
-
-            for item in category_data:
+            price_trends = defaultdict(list)
+            daily_counts = Counter()
+            for item in daily_totals(start_day, by=('date', 'category')):
                 category_trends[item['category']].append({
                     'date': item['date'],
                     'count': item['count']
                 })
+                price_trends[item['category']].append({
+                    'date': item['date'],
+                    'avg_price': round(item['price_sum'] / item['count'], 2) if item['count'] else None
+                })
+                daily_counts[item['date']] += item['count']
 
-            # Tendencias de precios por categoría
-            price_trends = {}
-            for category in category_trends.keys():
-                prices = list(
-                    Product.objects.filter(
-                        created_at__gte=start_date,
-                        category=category
-                    )
-                    .annotate(date=TruncDate('created_at'))
-                    .values('date')
-                    .annotate(avg_price=Avg('price'))
-                    .order_by('date')
-                )
-                price_trends[category] = prices
-
-            # Productos en tendencia (más scrapeados recientemente)
-            trending_terms = []
-            recent_titles = Product.objects.filter(
-                created_at__gte=start_date
-            ).values_list('title', flat=True)
-
-            # Análisis básico de palabras clave
-            word_counts = Counter()
-            for title in recent_titles:
-                words = title.lower().split()
-                # Filtrar palabras comunes y obtener palabras relevantes
-                relevant_words = [
-                    word for word in words 
-                    if len(word) > 3 and word not in ['with', 'from', 'this', 'that', 'fast', 'free']
-                ]
-                word_counts.update(relevant_words[:3])  # Solo primeras 3 palabras relevantes
-
-            trending_terms = word_counts.most_common(10)
+            # Productos en tendencia (términos más frecuentes en los títulos del periodo)
+            trending_terms = top_terms(since=start_day, limit=10)
 
             # Análisis de velocidad de scraping
-            scraping_velocity = list(
-                Product.objects.filter(created_at__gte=start_date)
-                .annotate(date=TruncDate('created_at'))
-                .values('date')
-                .annotate(count=Count('id'))
-                .order_by('date')
-            )
+            scraping_velocity = [
+                {'date': day, 'count': count} for day, count in sorted(daily_counts.items())
+            ]
 
             data = {
                 'period_days': days,
                 'category_trends': dict(category_trends),
-                'price_trends': price_trends,
+                'price_trends': dict(price_trends),
                 'trending_keywords': trending_terms,
                 'scraping_velocity': scraping_velocity,
                 'analysis_date': timezone.now()
@@ -356,7 +347,7 @@ class TrendAnalysisView(APIView):
             )
 
 
-class ProductMetricsView(APIView):
+class ProductMetricsView(ReplicaReadMixin, APIView):
     """
     Vista para métricas detalladas de productos
     """
@@ -367,75 +358,33 @@ class ProductMetricsView(APIView):
         Obtiene métricas detalladas por categoría, plataforma, etc.
         """
         try:
-            # Métricas por rango de precios
-            price_ranges = [
-                {'min': 0, 'max': 10, 'label': '$0-$10'},
-                {'min': 10, 'max': 25, 'label': '$10-$25'},
-                {'min': 25, 'max': 50, 'label': '$25-$50'},
-                {'min': 50, 'max': 100, 'label': '$50-$100'},
-                {'min': 100, 'max': 999999, 'label': '$100+'}
+            # Histogramas pedidos por el cliente: ?histogram=campo:l0,l1,... (repetible, con límite)
+            try:
+                custom_histograms = parse_histograms(request.query_params.getlist('histogram'))
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Distribuciones de precio, rating y envío (y las pedidas) en una sola consulta
+            histograms = compute_histograms(Product.objects.all(), [*DEFAULT_HISTOGRAMS, *custom_histograms])
+
+            price_distribution = histograms['price_distribution']
+            rating_distribution = [
+                {'rating': bucket['range'], 'count': bucket['count']}
+                for bucket in histograms['rating_distribution']
             ]
+            shipping_distribution = histograms['shipping_distribution']
 
-            price_distribution = []
-            for price_range in price_ranges:
-                count = Product.objects.filter(
-                    price__gte=price_range['min'],
-                    price__lt=price_range['max']
-                ).count()
-                
-                price_distribution.append({
-                    'range': price_range['label'],
-                    'count': count
-                })
-
-            # Métricas por rating
-            rating_distribution = []
-            for rating in [1, 2, 3, 4, 5]:
-                count = Product.objects.filter(
-                    rating__gte=rating,
-                    rating__lt=rating + 1
-                ).count()
-                
-                rating_distribution.append({
-                    'rating': f"{rating}★",
-                    'count': count
-                })
-
-            # Métricas de shipping
-            shipping_ranges = [
-                {'min': 0, 'max': 7, 'label': '1-7 días'},
-                {'min': 7, 'max': 15, 'label': '7-15 días'},
-                {'min': 15, 'max': 30, 'label': '15-30 días'},
-                {'min': 30, 'max': 999, 'label': '30+ días'}
-            ]
-
-            shipping_distribution = []
-            for ship_range in shipping_ranges:
-                count = Product.objects.filter(
-                    shipping_time__gte=ship_range['min'],
-                    shipping_time__lt=ship_range['max']
-                ).count()
-                
-                shipping_distribution.append({
-                    'range': ship_range['label'],
-                    'count': count
-                })
-
-            # Top palabras clave en títulos
-            all_titles = Product.objects.values_list('title', flat=True)
-            keyword_counts = Counter()
-            
-            for title in all_titles:
-                words = title.lower().split()
-                keywords = [word for word in words if len(word) > 4]
-                keyword_counts.update(keywords)
-
-            top_keywords = keyword_counts.most_common(20)
+            # Top palabras clave en títulos (tabla de frecuencias de términos),
+            # acotado a la ventana de retención del catálogo
+            horizon = retention_horizon_days()
+            since = timezone.localdate() - timedelta(days=horizon) if horizon else None
+            top_keywords = top_terms(since=since, limit=20)
 
             data = {
                 'price_distribution': price_distribution,
                 'rating_distribution': rating_distribution,
                 'shipping_distribution': shipping_distribution,
+                'histograms': {histogram.name: histograms[histogram.name] for histogram in custom_histograms},
                 'top_keywords': top_keywords,
                 'generated_at': timezone.now()
             }
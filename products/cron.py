@@ -5,7 +5,7 @@ Tareas programadas (cron jobs) para el dropship bot
 import logging
 from django.utils import timezone
 from products.models import Product
-from products.services.scraper import scrape_all_platforms
+from products.services.scraper import iter_all_platforms
 from products.services.notifications import notify_scraping_summary, notify_scraping_summary_with_product
 
 logger = logging.getLogger('products')
@@ -22,14 +22,11 @@ def scrape_products():
         # Configuración de scraping
         products_per_platform = 5
         
-        # Ejecutar scraping
-        products = scrape_all_platforms(count_per_platform=products_per_platform)
-        logger.info(f"Scraping completado: {len(products)} productos obtenidos")
+        # Ejecutar scraping y persistir cada página según llega
+        from products.services.product_manager import import_product_pages
         
-        # Procesar productos
-        from products.services.product_manager import bulk_import_products
-        
-        stats = bulk_import_products(products)
+        stats = import_product_pages(iter_all_platforms(count_per_platform=products_per_platform))
+        logger.info(f"Scraping completado: {stats['received']} productos obtenidos")
         new_products = stats['created']
         existing_products = stats['existing']
         errors = stats['errors']
@@ -55,6 +52,25 @@ def scrape_products():
             f"{existing_products} existentes, {errors} errores"
         )
         
+        # Métricas de espera del rate limiter compartido
+        from products.services.rate_limiter import get_rate_limiter
+        for host, host_stats in get_rate_limiter().get_stats().items():
+            logger.info(
+                f"Rate limit {host}: {host_stats['requests']} peticiones, "
+                f"espera media {host_stats['avg_wait']}s, máxima {host_stats['max_wait']:.2f}s"
+            )
+        
+        # Selectores de contenedor aprendidos (recorridos del árbol por página)
+        from products.services.selector_cache import get_selector_cache
+        selector_cache = get_selector_cache()
+        for key, layout_stats in selector_cache.get_stats().items():
+            logger.info(
+                f"Selectores {key}: ganador {layout_stats['winner']}, "
+                f"{layout_stats['scans_per_page']} recorridos/página, "
+                f"acierto al primer intento {layout_stats['first_try_rate']:.0%}"
+            )
+        selector_cache.save()
+        
         return f"Cron ejecutado: {new_products} nuevos productos agregados"
         
     except Exception as e:
@@ -72,22 +88,17 @@ def scrape_products():
 def cleanup_old_products():
     """
     Tarea cron para limpiar productos antiguos (opcional)
-    Mantiene solo los productos de los últimos 30 días
+    Aplica las ventanas de retención configuradas (por defecto 30 días) borrando
+    por bloques y, si está configurado, archivando antes de borrar
     """
     logger.info("Iniciando limpieza de productos antiguos")
     
     try:
-        from datetime import timedelta
+        from products.services.retention import RetentionRunner
         
-        # Productos más antiguos que 30 días
-        cutoff_date = timezone.now() - timedelta(days=30)
-        old_products = Product.objects.filter(created_at__lt=cutoff_date)
-        
-        count = old_products.count()
-        if count > 0:
-            old_products.delete()
-            logger.info(f"Eliminados {count} productos antiguos")
-        else:
+        report = RetentionRunner().run()
+        count = sum(result['deleted'] for result in report.values())
+        if count == 0:
             logger.info("No hay productos antiguos para eliminar")
         
         return f"Limpieza completada: {count} productos eliminados"
@@ -97,6 +108,54 @@ def cleanup_old_products():
         raise e
 
 
+def deliver_notifications():
+    """
+    Tarea cron para entregar las notificaciones pendientes del outbox
+    """
+    from products.services.notification_outbox import OutboxWorker
+    
+    try:
+        stats = OutboxWorker().drain()
+        return f"Notificaciones: {stats['sent']} enviadas, {stats['retry']} a reintentar, {stats['failed']} fallidas"
+    except Exception as e:
+        logger.error(f"Error entregando notificaciones: {e}")
+        raise e
+
+
+def rebuild_catalog_rollups():
+    """
+    Tarea cron para reconstruir los rollups del catálogo desde Product
+    (corrige escrituras que no pasaron por el modelo, p. ej. QuerySet.update)
+    """
+    from products.services.catalog_rollups import rebuild_catalog_rollups as rebuild
+    
+    try:
+        report = rebuild()
+        return "Rollups reconstruidos: " + ', '.join(
+            f"{name} {result['created']} filas" for name, result in report.items()
+        )
+    except Exception as e:
+        logger.error(f"Error reconstruyendo los rollups del catálogo: {e}")
+        raise e
+
+
+def build_catalog_snapshot():
+    """
+    Tarea cron para regenerar la instantánea columnar del catálogo
+    (no hace nada si CATALOG_SNAPSHOT_DIR no está configurado)
+    """
+    from products.services.catalog_snapshot import build_catalog_snapshot as build, snapshot_dir
+    
+    if snapshot_dir() is None:
+        return "Instantánea del catálogo desactivada"
+    try:
+        result = build()
+        return f"Instantánea del catálogo {result['version']}: {result['rows']} productos"
+    except Exception as e:
+        logger.error(f"Error generando la instantánea del catálogo: {e}")
+        raise e
+
+
 def health_check_cron():
     """
     Tarea cron para verificar salud del sistema
@@ -8,8 +8,10 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.paginator import Paginator
 from django.db.models import Avg, Count
 from django.utils import timezone
+from .db_router import ReplicaReadMixin
 from .models import Product
 from .services.scraper import AliExpressScraper
+from .services.search import search_products
 from django import forms
 
 
@@ -19,11 +21,11 @@ class ProductFinderForm(forms.Form):
     min_rating = forms.DecimalField(required=False, min_value=0, max_value=5, decimal_places=1, label="Rating mín")
     category = forms.CharField(required=False, max_length=100, label="Categoría contiene")
     max_shipping_days = forms.IntegerField(required=False, min_value=1, label="Envío máx (días)")
-    source = forms.ChoiceField(required=False, choices=[('aliexpress','AliExpress')], initial='aliexpress', label="Fuente")
+    source = forms.ChoiceField(required=False, choices=[('aliexpress','AliExpress'), ('catalog','Catálogo guardado')], initial='aliexpress', label="Fuente")
     search_term = forms.CharField(required=False, max_length=100, label="Buscar texto")
 
 
-class ProductFinderView(TemplateView):
+class ProductFinderView(ReplicaReadMixin, TemplateView):
     template_name = 'products/product_finder.html'
 
     def get_context_data(self, **kwargs):
@@ -32,7 +34,9 @@ class ProductFinderView(TemplateView):
         ctx['form'] = form
         ctx['results'] = []
         ctx['error'] = None
-        if self.request.GET.get('run') == '1' and form.is_valid():
+        if self.request.GET.get('run') == '1' and form.is_valid() and form.cleaned_data.get('source') == 'catalog':
+            ctx['results'] = self.search_catalog(form.cleaned_data)
+        elif self.request.GET.get('run') == '1' and form.is_valid():
             scraper = AliExpressScraper()
             search_term = form.cleaned_data.get('search_term') or 'electronics'
             try:
@@ -56,8 +60,27 @@ class ProductFinderView(TemplateView):
                 ctx['error'] = str(e)
         return ctx
 
-
-class DashboardView(TemplateView):
+    def search_catalog(self, data, limit=20):
+        """Busca en los productos guardados (índice de texto completo + filtros en la base de datos)"""
+        queryset = Product.objects.all()
+        if data.get('min_price') is not None:
+            queryset = queryset.filter(price__gte=data['min_price'])
+        if data.get('max_price') is not None:
+            queryset = queryset.filter(price__lte=data['max_price'])
+        if data.get('min_rating') is not None:
+            queryset = queryset.filter(rating__gte=data['min_rating'])
+        if data.get('category'):
+            queryset = queryset.filter(category__icontains=data['category'])
+        if data.get('max_shipping_days'):
+            queryset = queryset.filter(shipping_time__lte=data['max_shipping_days'])
+        if data.get('search_term'):
+            queryset = search_products(queryset, data['search_term']).order_by('-search_rank', '-created_at')
+        else:
+            queryset = queryset.order_by('-created_at')
+        return list(queryset[:limit])
+
+
+class DashboardView(ReplicaReadMixin, TemplateView):
     """
     Vista principal del dashboard
     """
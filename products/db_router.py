@@ -0,0 +1,118 @@
+"""
+Router de base de datos con réplica de lectura (DATABASE_REPLICA_URL)
+
+Solo las vistas marcadas con ``ReplicaReadMixin`` (analytics, dashboard y
+listados) leen de la réplica, y solo en peticiones GET/HEAD/OPTIONS. El resto
+de lecturas, todas las escrituras, la ingesta, Celery y el cron siguen en
+``default``.
+
+Guarda de retraso: cualquier escritura fija el primario para las lecturas del
+mismo contexto durante ``DATABASE_REPLICA_LAG_SECONDS``; ``ReplicaPinMiddleware``
+lo propaga a las peticiones siguientes del mismo cliente con una cookie, de modo
+que quien acaba de escribir lee sus propios cambios aunque la réplica vaya
+retrasada.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from math import ceil
+
+from django.conf import settings
+from django.db import connections
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE = 'db_primary_until'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+_primary_until = ContextVar('primary_until', default=0.0)
+
+
+def replica_enabled() -> bool:
+    return bool(getattr(settings, 'DATABASE_REPLICA_URL', None)) and REPLICA_ALIAS in connections.settings
+
+
+def replica_lag() -> float:
+    return float(getattr(settings, 'DATABASE_REPLICA_LAG_SECONDS', 5))
+
+
+def pin_primary(seconds=None) -> float:
+    """Fija el primario para las lecturas del contexto actual durante ``seconds``"""
+    until = time.time() + (replica_lag() if seconds is None else seconds)
+    _primary_until.set(max(until, _primary_until.get()))
+    return _primary_until.get()
+
+
+def primary_pinned() -> bool:
+    return _primary_until.get() > time.time()
+
+
+@contextmanager
+def read_from_replica():
+    """Lecturas del bloque a la réplica (salvo que el primario esté fijado)"""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """Lecturas de vistas de solo lectura a la réplica; escrituras según el comportamiento por defecto (primario)"""
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and not primary_pinned() and replica_enabled():
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        pin_primary()
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Misma base de datos lógica: los objetos leídos de la réplica se relacionan con los del primario
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+class ReplicaPinMiddleware:
+    """Propaga la guarda de retraso entre peticiones del mismo cliente con una cookie"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        now = time.time()
+        try:
+            pinned = min(float(request.COOKIES.get(PIN_COOKIE, 0)), now + replica_lag())
+        except ValueError:
+            pinned = 0.0
+        token = _primary_until.set(pinned)
+        try:
+            response = self.get_response(request)
+            until = _primary_until.get()
+            if until > pinned and until > time.time():
+                response.set_cookie(
+                    PIN_COOKIE, f'{until:.3f}', max_age=ceil(until - now), httponly=True, samesite='Lax'
+                )
+            return response
+        finally:
+            _primary_until.reset(token)
+
+
+class ReplicaReadMixin:
+    """Vistas de solo lectura (APIView o vistas genéricas) que leen de la réplica en peticiones seguras"""
+
+    replica_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in self.replica_methods:
+            return super().dispatch(request, *args, **kwargs)
+        with read_from_replica():
+            response = super().dispatch(request, *args, **kwargs)
+            # Las plantillas se renderizan fuera de dispatch: renderizar aquí para que lean de la réplica
+            if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+                response.render()
+        return response
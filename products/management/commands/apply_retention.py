@@ -0,0 +1,93 @@
+"""
+Comando de Django para aplicar la retención de productos antiguos
+
+Borra por bloques de ids en transacciones cortas, con ventanas por plataforma y
+archivo opcional (NDJSON comprimido o Parquet) antes de borrar.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.services.retention import ARCHIVE_FORMATS, RetentionRunner, get_retention_policies
+
+
+class Command(BaseCommand):
+    help = 'Elimina por bloques los productos fuera de su ventana de retención'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Ventana por defecto en días (por defecto PRODUCT_RETENTION_DAYS)'
+        )
+        parser.add_argument(
+            '--platform-days',
+            action='append',
+            default=None,
+            metavar='PLATAFORMA=DIAS',
+            help='Ventana de una plataforma (repetible; sustituye a PRODUCT_RETENTION_DAYS_BY_PLATFORM)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Productos por bloque de borrado'
+        )
+        parser.add_argument(
+            '--archive',
+            choices=ARCHIVE_FORMATS,
+            default=None,
+            help='Archivar los productos antes de borrarlos'
+        )
+        parser.add_argument(
+            '--archive-dir',
+            default=None,
+            help='Directorio de los archivos (por defecto PRODUCT_RETENTION_ARCHIVE_DIR)'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Segundos de pausa entre bloques'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo contar los productos que se eliminarían'
+        )
+
+    def handle(self, *args, **options):
+        by_platform = None
+        if options['platform_days']:
+            by_platform = {}
+            for item in options['platform_days']:
+                platform, _, days = item.partition('=')
+                if not platform or not days.strip().lstrip('-').isdigit():
+                    raise CommandError(f"Formato inválido: {item} (usar plataforma=dias)")
+                by_platform[platform.strip()] = int(days)
+
+        try:
+            runner = RetentionRunner(
+                policies=get_retention_policies(options['days'], by_platform),
+                chunk_size=options['chunk_size'],
+                archive_format=options['archive'],
+                archive_dir=options['archive_dir'],
+                dry_run=options['dry_run'],
+                pause=options['pause'],
+            )
+            report = runner.run()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for label, result in report.items():
+            if options['dry_run']:
+                self.stdout.write(f"[dry-run] {label} ({result['days']} días): {result['would_delete']} productos")
+                continue
+            line = f"{label} ({result['days']} días): {result['deleted']} eliminados en {result['chunks']} bloques"
+            if result['archive']:
+                line += f" | archivo {result['archive']}"
+            self.stdout.write(line)
+
+        key = 'would_delete' if options['dry_run'] else 'deleted'
+        total = sum(result[key] for result in report.values())
+        self.stdout.write(self.style.SUCCESS(f"Total: {total} productos"))
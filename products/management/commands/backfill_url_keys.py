@@ -0,0 +1,56 @@
+"""
+Comando de Django para rellenar Product.url_key en los productos existentes
+
+La migración 0013 ya rellena las claves al migrar; el comando sirve para
+repetirlo (p. ej. tras importar filas con SQL directo). Recorre la tabla por
+bloques de id (sin cargarla entera) y calcula el hash de la URL canónica. Si
+varios productos tienen la misma URL canónica sobrevive el más reciente (la
+misma regla que la deduplicación) y el resto se elimina: un duplicado sin
+url_key no podría volver a guardarse (``save()`` calcula la clave y choca con el
+índice único). Con --dry-run solo se cuentan.
+"""
+
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.models import Product
+from products.services.catalog_rollups import collect_deletions
+from products.services.url_canonical import backfill_url_keys
+
+
+@contextmanager
+def _deleting():
+    # Los borrados descuentan los rollups una vez por bloque
+    with transaction.atomic(), collect_deletions():
+        yield
+
+
+class Command(BaseCommand):
+    help = 'Calcula url_key por bloques para los productos que no la tienen'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Productos por bloque'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo contar, sin escribir'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        stats = backfill_url_keys(
+            Product, chunk_size=max(1, options['chunk_size']), dry_run=dry_run, deleting=_deleting
+        )
+
+        prefix = '[dry-run] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Revisados {stats['scanned']} | con clave {stats['updated']} | "
+            f"duplicados {stats['duplicates']} | eliminados {stats['deleted']}"
+        ))
@@ -0,0 +1,158 @@
+"""
+Comando de Django para medir las consultas calientes del catálogo de productos
+
+Genera un catálogo sintético, ejecuta las consultas de la API, analytics y cron
+con y sin los índices de ``Product`` y muestra el tiempo y el plan (EXPLAIN) de
+cada una. Todo ocurre dentro de una transacción que se deshace al terminar
+(incluido el DROP INDEX de la comparación), así que no deja rastro.
+Soporta SQLite y PostgreSQL (DDL transaccional).
+"""
+
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Avg, Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from products.models import Product
+
+CATEGORIES = [f'Category {i}' for i in range(20)]
+PLATFORMS = ['aliexpress', 'amazon', 'ebay', 'temu']
+
+
+class Rollback(Exception):
+    pass
+
+
+def build_catalog(rows: int, seed: int = 42):
+    """Productos sintéticos repartidos en 90 días"""
+    rng = random.Random(seed)
+    now = timezone.now()
+    for i in range(rows):
+        yield Product(
+            title=f'Synthetic product {i}',
+            price=Decimal(rng.randint(100, 50000)) / 100,
+            url=f'https://bench.example.com/catalog/{i}.html',
+            created_at=now - timedelta(seconds=rng.randint(0, 90 * 24 * 3600)),
+            shipping_time=rng.randint(3, 60),
+            category=rng.choice(CATEGORIES),
+            rating=Decimal(rng.randint(0, 500)) / 100 if rng.random() > 0.1 else None,
+            source_platform=rng.choice(PLATFORMS),
+        )
+
+
+def catalog_queries():
+    """(nombre, queryset, ejecución) con las mismas formas que los endpoints"""
+    now = timezone.now()
+    return [
+        ('API list: recientes', Product.objects.order_by('-created_at'),
+         lambda qs: list(qs[:20])),
+        ('API list: plataformas + precio', Product.objects.filter(
+            source_platform__in=['aliexpress'], price__gte=10, price__lte=50).order_by('-created_at'),
+         lambda qs: list(qs[:20])),
+        ('API by_platform', Product.objects.filter(source_platform='temu').order_by('-created_at'),
+         lambda qs: list(qs[:20])),
+        ('API recent / health 24h', Product.objects.filter(created_at__gte=now - timedelta(hours=24)),
+         lambda qs: qs.count()),
+        ('cron cleanup > 30 días', Product.objects.filter(created_at__lt=now - timedelta(days=30)),
+         lambda qs: qs.count()),
+        ('analytics tendencia categoría', Product.objects.filter(
+            category='Category 3', created_at__gte=now - timedelta(days=30))
+         .annotate(date=TruncDate('created_at')).values('date').annotate(avg_price=Avg('price')).order_by('date'),
+         list),
+        ('analytics por día (7 días)', Product.objects.filter(created_at__gte=now - timedelta(days=7))
+         .annotate(date=TruncDate('created_at')).values('date').annotate(count=Count('id')).order_by('date'),
+         list),
+        ('analytics top rating', Product.objects.filter(rating__gte=4.0).order_by('-rating', '-created_at'),
+         lambda qs: list(qs[:10])),
+        ('analytics más baratos', Product.objects.filter(price__gt=0).order_by('price'),
+         lambda qs: list(qs[:10])),
+        ('analytics más caros', Product.objects.order_by('-price'),
+         lambda qs: list(qs[:10])),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Muestra planes EXPLAIN y tiempos de las consultas del catálogo con y sin índices'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=100000,
+            help='Productos del catálogo sintético'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Repeticiones por consulta (se muestra la mediana)'
+        )
+        parser.add_argument(
+            '--no-compare',
+            action='store_true',
+            help='No repetir las consultas sin índices'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Base de datos no soportada para el benchmark: {connection.vendor}')
+
+        self.repeat = max(1, options['repeat'])
+        try:
+            with transaction.atomic():
+                start = time.perf_counter()
+                Product.objects.bulk_create(build_catalog(options['rows']), batch_size=5000)
+                self._analyze()
+                self.stdout.write(
+                    f"Catálogo sintético: {options['rows']} productos en {time.perf_counter() - start:.1f}s "
+                    f"({connection.vendor})"
+                )
+
+                indexed = self._run_all(show_plans=True)
+                if not options['no_compare']:
+                    self._drop_indexes()
+                    self._analyze()
+                    plain = self._run_all(show_plans=False)
+                    self._summary(indexed, plain)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def _run_all(self, show_plans: bool):
+        timings = {}
+        for name, queryset, execute in catalog_queries():
+            samples = []
+            for _ in range(self.repeat):
+                start = time.perf_counter()
+                execute(queryset.all())
+                samples.append((time.perf_counter() - start) * 1000)
+            timings[name] = statistics.median(samples)
+            if show_plans:
+                self.stdout.write(self.style.SUCCESS(f'\n{name}  ({timings[name]:.2f} ms)'))
+                for line in queryset.explain().splitlines():
+                    self.stdout.write(f'  {line}')
+        return timings
+
+    def _summary(self, indexed, plain):
+        self.stdout.write(f"\n{'consulta':<34}{'sin índices':>14}{'con índices':>14}{'mejora':>9}")
+        for name, with_ms in indexed.items():
+            without_ms = plain[name]
+            self.stdout.write(
+                f'{name:<34}{without_ms:>11.2f} ms{with_ms:>11.2f} ms{without_ms / max(with_ms, 1e-6):>8.1f}x'
+            )
+
+    def _drop_indexes(self):
+        with connection.cursor() as cursor:
+            for index in Product._meta.indexes:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(Product._meta.db_table)}')
@@ -0,0 +1,96 @@
+"""
+Comando de Django para comparar la extracción de campos por tarjeta:
+select_one por selector frente al plan de extracción compilado
+"""
+
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.management.commands.benchmark_parser import build_benchmark_page
+from products.services.advanced_scraper import AdvancedAliExpressScraper
+from products.services.extraction_plan import ExtractionPlan
+from products.services.html_parser import parse_html
+from products.services.selector_cache import select_containers
+
+
+class Command(BaseCommand):
+    help = 'Mide tarjetas/segundo extrayendo campos con selectores sueltos y con plan compilado'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            action='append',
+            default=[],
+            help='Página de resultados guardada (se puede repetir); por defecto una página sintética'
+        )
+        parser.add_argument(
+            '--items',
+            type=int,
+            default=60,
+            help='Productos de la página sintética'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=10,
+            help='Repeticiones por página'
+        )
+
+    def handle(self, *args, **options):
+        pages = []
+        for path in options['file']:
+            try:
+                pages.append((path, Path(path).read_bytes()))
+            except OSError as e:
+                raise CommandError(f'No se pudo leer {path}: {e}')
+        if not pages:
+            pages = [('sintética', build_benchmark_page(items=options['items']))]
+
+        iterations = max(1, options['iterations'])
+        scraper = AdvancedAliExpressScraper()
+        try:
+            cards = []
+            for name, content in pages:
+                soup = parse_html(content)
+                selector, elements = select_containers(
+                    soup, scraper.advanced_selectors['product_containers'], key=name
+                )
+                self.stdout.write(f'{name}: {len(elements)} tarjetas (contenedor {selector})')
+                cards.extend(elements)
+            if not cards:
+                raise CommandError('No se encontraron tarjetas de producto en las páginas')
+
+            plan = ExtractionPlan(scraper._extraction_fields())
+            legacy_time, legacy = self._run(lambda el: scraper._extract_single_product_advanced(el, 'bench'),
+                                             cards, iterations)
+            plan_time, planned = self._run(lambda el: scraper._extract_single_product_advanced(el, 'bench', plan),
+                                           cards, iterations)
+        finally:
+            scraper.close()
+
+        total = len(cards) * iterations
+        self.stdout.write(f"{'método':<22}{'tarjetas/s':>12}{'µs/tarjeta':>12}{'productos':>11}")
+        for label, elapsed, products in (('select_one por campo', legacy_time, legacy),
+                                         ('plan compilado', plan_time, planned)):
+            self.stdout.write(
+                f'{label:<22}{total / elapsed:>12.0f}{elapsed / total * 1e6:>12.1f}{len(products):>11}'
+            )
+        self.stdout.write(f'Aceleración: x{legacy_time / plan_time:.2f}')
+        self.stdout.write(f'Plan: {plan.get_stats()}')
+
+        if self._signature(legacy) != self._signature(planned):
+            self.stdout.write(self.style.WARNING('Los dos métodos no extrajeron los mismos campos'))
+
+    @staticmethod
+    def _run(extract, cards, iterations):
+        products = []
+        start = time.perf_counter()
+        for _ in range(iterations):
+            products = [product for product in (extract(card) for card in cards) if product]
+        return time.perf_counter() - start, products
+
+    @staticmethod
+    def _signature(products):
+        return [(p['title'], p['price'], p.get('url'), p.get('image')) for p in products]
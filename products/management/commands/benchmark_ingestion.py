@@ -0,0 +1,129 @@
+"""
+Comando de Django para medir la ingesta de productos: fila a fila frente a por conjuntos
+
+Usa la base de datos configurada (SQLite por defecto, PostgreSQL con DATABASE_URL).
+Cada escenario se ejecuta dentro de una transacción que se deshace al terminar,
+por lo que no deja filas en la base de datos.
+"""
+
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+
+from products.models import Product
+from products.services.product_manager import ProductManager
+from products.signals import product_created_notification
+
+
+class QueryCounter:
+    """execute_wrapper que cuenta consultas sin guardarlas"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Rollback(Exception):
+    pass
+
+
+def build_rows(rows: int, run_id: str):
+    return [
+        {
+            'title': f'Benchmark Product {i}',
+            'price': Decimal('10.00') + Decimal(i % 500) / 10,
+            'url': f'https://bench.example.com/{run_id}/item/{i}.html',
+            'image': f'https://ae01.alicdn.com/kf/{i}.jpg',
+            'shipping_time': 7 + i % 20,
+            'category': 'Electronics',
+            'rating': Decimal('4.50'),
+            'source_platform': 'aliexpress',
+        }
+        for i in range(rows)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Mide la ingesta de productos (fila a fila vs por conjuntos) a distintos volúmenes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=[1000, 10000, 100000],
+            help='Volúmenes a medir'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Tamaño de lote de bulk_create_or_update_products'
+        )
+        parser.add_argument(
+            '--per-row-max',
+            type=int,
+            default=10000,
+            help='No medir el camino fila a fila por encima de este volumen (0 = siempre)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        per_row_max = options['per_row_max']
+        self.stdout.write(f'Base de datos: {connection.vendor} ({connection.settings_dict["NAME"]})')
+        self.stdout.write(f"{'camino':<14}{'filas':>9}  {'fase':<10}{'segundos':>10}{'filas/s':>11}{'consultas':>11}")
+
+        # Las notificaciones de productos nuevos no forman parte de la medida
+        post_save.disconnect(product_created_notification, sender=Product)
+        try:
+            for rows in options['rows']:
+                paths = ['conjuntos']
+                if not per_row_max or rows <= per_row_max:
+                    paths.insert(0, 'fila a fila')
+                for path in paths:
+                    self._run(path, rows, batch_size)
+        finally:
+            post_save.connect(product_created_notification, sender=Product)
+
+    def _run(self, path: str, rows: int, batch_size: int):
+        data = build_rows(rows, uuid.uuid4().hex[:8])
+        # Segunda pasada: mismas URLs, 10% con precio distinto
+        changed = [
+            dict(row, price=row['price'] + 1) if i % 10 == 0 else row
+            for i, row in enumerate(data)
+        ]
+
+        try:
+            with transaction.atomic():
+                self._measure(path, rows, 'inserción', data, batch_size, update_existing=False)
+                self._measure(path, rows, 'upsert', changed, batch_size, update_existing=True)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def _measure(self, path, rows, phase, data, batch_size, update_existing):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            if path == 'conjuntos':
+                stats = ProductManager.bulk_create_or_update_products(data, update_existing, batch_size)
+            else:
+                stats = {'created': 0, 'updated': 0, 'unchanged': 0, 'existing': 0, 'errors': 0}
+                for i in range(0, len(data), batch_size):
+                    batch_stats = ProductManager._process_batch_per_row(data[i:i + batch_size], update_existing)
+                    for key, value in batch_stats.items():
+                        stats[key] += value
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f'{path:<14}{rows:>9}  {phase:<10}{elapsed:>10.2f}{rows / elapsed:>11.0f}{counter.count:>11}'
+        )
+        if stats['errors']:
+            self.stdout.write(self.style.WARNING(f'  errores: {stats}'))
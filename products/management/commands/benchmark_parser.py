@@ -0,0 +1,111 @@
+"""
+Comando de Django para medir el coste de parseo por página de cada backend HTML
+"""
+
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.services.advanced_scraper import AdvancedAliExpressScraper
+from products.services.html_parser import PARSER_BACKENDS, parse_product_containers
+
+
+def build_benchmark_page(items: int = 60, noise: int = 400) -> bytes:
+    """
+    Genera una página de búsqueda sintética con estructura parecida a la real:
+    cabecera con scripts y estilos, navegación, tarjetas de producto y pie
+    """
+    head = ''.join(
+        f'<script>window.__cfg_{i} = {{"k": "{"x" * 200}"}};</script><style>.c{i}{{color:#{i:06x}}}</style>'
+        for i in range(40)
+    )
+    nav = ''.join(
+        f'<li class="nav-entry"><a href="/category/{i}.html"><span>Categoría {i}</span></a></li>'
+        for i in range(noise)
+    )
+    cards = []
+    for i in range(items):
+        cards.append(
+            f'<div class="product-item" data-item-id="{100000 + i}">'
+            f'<div class="img-wrap"><img src="//ae01.alicdn.com/kf/S{i}.jpg" alt="img"></div>'
+            f'<div class="info"><h3><a title="Wireless Bluetooth Earbuds Model {i} Noise Cancelling" '
+            f'href="//www.aliexpress.com/item/{100000 + i}.html">Wireless Bluetooth Earbuds Model {i}</a></h3>'
+            f'<div class="price-current"><span class="price-text">US ${10 + i % 30}.{i % 100:02d}</span></div>'
+            f'<div class="rating"><span class="star-rating">4.{i % 10}</span><span>{i * 7} vendidos</span></div>'
+            f'</div></div>'
+        )
+    footer = ''.join(f'<p class="footer-link"><a href="/help/{i}">Ayuda {i}</a></p>' for i in range(noise))
+    return (
+        f'<!DOCTYPE html><html><head><title>Resultados</title>{head}</head><body>'
+        f'<header><ul class="nav">{nav}</ul></header>'
+        f'<main><div class="search-results">{"".join(cards)}</div></main>'
+        f'<footer>{footer}</footer></body></html>'
+    ).encode('utf-8')
+
+
+class Command(BaseCommand):
+    help = 'Mide el tiempo de parseo por página con cada backend HTML (con y sin parseo parcial)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            action='append',
+            default=[],
+            help='Página HTML guardada a usar (se puede repetir); por defecto una página sintética'
+        )
+        parser.add_argument(
+            '--items',
+            type=int,
+            default=60,
+            help='Productos de la página sintética'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Repeticiones por combinación'
+        )
+
+    def handle(self, *args, **options):
+        pages = []
+        for path in options['file']:
+            try:
+                pages.append(Path(path).read_bytes())
+            except OSError as e:
+                raise CommandError(f'No se pudo leer {path}: {e}')
+        if not pages:
+            pages = [build_benchmark_page(items=options['items'])]
+
+        iterations = max(1, options['iterations'])
+        scraper = AdvancedAliExpressScraper()
+        selectors = scraper.advanced_selectors['product_containers']
+        total_kb = sum(len(page) for page in pages) / 1024
+
+        self.stdout.write(f'{len(pages)} página(s), {total_kb:.0f} KB, {iterations} iteraciones')
+        self.stdout.write(f"{'backend':<14}{'parcial':<9}{'parseo ms/pág':>15}{'total ms/pág':>15}{'productos':>11}")
+
+        try:
+            for backend in PARSER_BACKENDS:
+                for strain in (False, True):
+                    parse_time = 0.0
+                    total_time = 0.0
+                    products = 0
+                    for _ in range(iterations):
+                        for page in pages:
+                            start = time.perf_counter()
+                            soup = parse_product_containers(page, selectors, backend=backend, strain=strain)
+                            parsed = time.perf_counter()
+                            found = scraper._extract_products_with_advanced_selectors(soup, 1000, 'earbuds')
+                            end = time.perf_counter()
+                            parse_time += parsed - start
+                            total_time += end - start
+                            products = len(found)
+
+                    runs = iterations * len(pages)
+                    self.stdout.write(
+                        f"{backend:<14}{'sí' if strain else 'no':<9}"
+                        f"{parse_time / runs * 1000:>15.2f}{total_time / runs * 1000:>15.2f}{products:>11}"
+                    )
+        finally:
+            scraper.close()
@@ -0,0 +1,113 @@
+"""
+Comando de Django para comparar la búsqueda de productos: LIKE frente a texto completo
+
+Genera un catálogo sintético con títulos realistas, y para cada consulta mide la
+primera página de resultados y el total (lo que hace la API con ``?search=``)
+con ``icontains`` (el camino anterior) y con el backend de la base de datos
+(FTS5 en SQLite, tsvector + GIN en PostgreSQL). Todo ocurre dentro de una
+transacción que se deshace al terminar.
+"""
+
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from products.models import Product
+from products.services.search import LikeSearchBackend, get_search_backend
+
+ADJECTIVES = ['wireless', 'portable', 'smart', 'mini', 'magnetic', 'waterproof', 'led', 'ergonomic',
+              'bluetooth', 'foldable', 'rechargeable', 'stainless', 'vintage', 'ultra', 'digital']
+NOUNS = ['earbuds', 'charger', 'phone case', 'keyboard', 'mouse', 'lamp', 'speaker', 'watch', 'cable',
+         'backpack', 'bottle', 'camera', 'drone', 'headphones', 'tripod', 'projector', 'fan', 'scale']
+EXTRAS = ['pro', 'max', 'lite', '2024', 'usb-c', 'for iphone', 'for android', 'kit', 'set', 'holder']
+CATEGORIES = ['Electronics', 'Home', 'Sports', 'Beauty', 'Toys', 'Office', 'Garden', 'Automotive']
+
+QUERIES = ['wireless earbuds', 'keyb', 'projector', 'magnetic phone case', 'usb', 'zzzz']
+
+
+class Rollback(Exception):
+    pass
+
+
+def build_catalog(rows: int, seed: int = 7):
+    rng = random.Random(seed)
+    for i in range(rows):
+        yield Product(
+            title=f'{rng.choice(ADJECTIVES).title()} {rng.choice(NOUNS)} {rng.choice(EXTRAS)} {i}',
+            price=Decimal(rng.randint(100, 20000)) / 100,
+            url=f'https://bench.example.com/search/{i}.html',
+            category=rng.choice(CATEGORIES),
+            source_platform='aliexpress',
+        )
+
+
+class Command(BaseCommand):
+    help = 'Compara la búsqueda por LIKE con el índice de texto completo a distintos volúmenes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=[100000, 1000000],
+            help='Volúmenes a medir'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Repeticiones por consulta (se muestra la mediana)'
+        )
+        parser.add_argument(
+            '--query',
+            action='append',
+            default=None,
+            help='Consulta a medir (repetible; por defecto un juego de consultas típicas)'
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if isinstance(backend, LikeSearchBackend):
+            raise CommandError('La base de datos no tiene índice de texto completo (¿falta migrate o FTS5?)')
+
+        self.repeat = max(1, options['repeat'])
+        queries = options['query'] or QUERIES
+        for rows in options['rows']:
+            try:
+                with transaction.atomic():
+                    start = time.perf_counter()
+                    Product.objects.bulk_create(build_catalog(rows), batch_size=5000)
+                    self.stdout.write(self.style.SUCCESS(
+                        f"\n{rows} productos ({connection.vendor}, índice {backend.name}) "
+                        f"insertados en {time.perf_counter() - start:.1f}s"
+                    ))
+                    self.stdout.write(
+                        f"{'consulta':<22}{'resultados':>11}{'LIKE':>12}{backend.name:>12}{'mejora':>9}"
+                    )
+                    for query in queries:
+                        self._compare(query, backend)
+                    raise Rollback()
+            except Rollback:
+                pass
+
+    def _compare(self, query, backend):
+        like_ms, total = self._measure(LikeSearchBackend(), query, ('-created_at',))
+        indexed_ms, indexed_total = self._measure(backend, query, ('-search_rank', '-created_at'))
+        matched = f'{total}' if total == indexed_total else f'{total}/{indexed_total}'
+        self.stdout.write(
+            f'{query:<22}{matched:>11}{like_ms:>9.1f} ms{indexed_ms:>9.1f} ms{like_ms / max(indexed_ms, 1e-6):>8.1f}x'
+        )
+
+    def _measure(self, backend, query, ordering):
+        samples, total = [], 0
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            queryset = backend.search(Product.objects.all(), query)
+            total = queryset.count()
+            list(queryset.order_by(*ordering)[:20])
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples), total
@@ -0,0 +1,181 @@
+"""
+Comando de Django para medir la escritura concurrente en SQLite
+
+Lanza N procesos productores que ingieren productos a la vez en tres escenarios:
+
+* directo: cada productor escribe con la configuración SQLite por defecto
+* directo+perfil: igual, con el perfil de concurrencia (WAL, busy_timeout, IMMEDIATE)
+* cola+perfil: los productores envían a un único proceso escritor (IngestWriter)
+
+Cada escenario usa una base de datos SQLite temporal recién migrada, por lo que
+no toca db.sqlite3.
+"""
+
+import multiprocessing
+import shutil
+import tempfile
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, connections
+from django.test.utils import override_settings
+
+from products.models import Product
+from products.services.product_manager import bulk_import_products
+from products.services.sqlite_concurrency import IngestWriter, submit_to_queue
+
+SCENARIOS = (
+    ('directo', False, False),
+    ('directo+perfil', True, False),
+    ('cola+perfil', True, True),
+)
+
+
+def build_rows(producer: int, start: int, count: int, run_id: str):
+    return [
+        {
+            'title': f'Concurrency Product {producer}-{i}',
+            'price': Decimal('5.00') + Decimal(i % 300) / 10,
+            'url': f'https://bench.example.com/{run_id}/{producer}/{i}.html',
+            'shipping_time': 10,
+            'rating': Decimal('4.20'),
+            'source_platform': 'aliexpress',
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def run_producer(producer, rows, chunk, run_id, target, results):
+    """Proceso productor: escribe directamente o envía a la cola del escritor"""
+    stats = {'errors': 0, 'max_latency': 0.0}
+    for start in range(0, rows, chunk):
+        batch = build_rows(producer, start, min(chunk, rows - start), run_id)
+        began = time.perf_counter()
+        if target is not None:
+            submit_to_queue(target, batch)
+        else:
+            try:
+                stats['errors'] += bulk_import_products(batch, batch_size=chunk)['errors']
+            except DatabaseError:
+                stats['errors'] += len(batch)
+        stats['max_latency'] = max(stats['max_latency'], time.perf_counter() - began)
+    connection.close()
+    results.put(stats)
+
+
+def run_writer(source, max_rows, results):
+    """Proceso escritor único"""
+    results.put(IngestWriter(source=source, max_rows=max_rows).run())
+
+
+class Command(BaseCommand):
+    help = 'Mide la ingesta concurrente en SQLite: escritura directa frente a escritor único'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--producers',
+            type=int,
+            default=4,
+            help='Procesos productores'
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=2000,
+            help='Productos por productor'
+        )
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=50,
+            help='Productos por envío/escritura de cada productor'
+        )
+        parser.add_argument(
+            '--writer-max-rows',
+            type=int,
+            default=500,
+            help='Filas máximas por transacción del escritor único'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Este benchmark solo aplica a SQLite')
+
+        settings_dict = connections['default'].settings_dict
+        original = (settings_dict['NAME'], dict(settings_dict.get('OPTIONS', {})))
+        workdir = Path(tempfile.mkdtemp(prefix='sqlite-bench-'))
+        context = multiprocessing.get_context('fork')
+
+        self.stdout.write(
+            f"{options['producers']} productores x {options['rows']} productos (envíos de {options['chunk']})"
+        )
+        self.stdout.write(
+            f"{'escenario':<16}{'segundos':>10}{'filas/s':>10}{'guardadas':>11}{'errores':>9}"
+            f"{'lat. máx (s)':>14}{'transacciones':>15}"
+        )
+        try:
+            for name, profile, use_queue in SCENARIOS:
+                self._use_database(settings_dict, workdir / f"{name.replace('+', '_')}.sqlite3", profile)
+                with override_settings(SQLITE_CONCURRENCY=profile):
+                    call_command('migrate', verbosity=0, interactive=False)
+                    connections.close_all()
+                    self._run(name, use_queue, context, options)
+        finally:
+            connections.close_all()
+            settings_dict['NAME'], settings_dict['OPTIONS'] = original
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _use_database(self, settings_dict, path, profile):
+        connections.close_all()
+        settings_dict['NAME'] = str(path)
+        options = settings_dict.setdefault('OPTIONS', {})
+        if profile:
+            options['transaction_mode'] = 'IMMEDIATE'
+        else:
+            options.pop('transaction_mode', None)
+
+    def _run(self, name, use_queue, context, options):
+        run_id = uuid.uuid4().hex[:8]
+        results = context.Queue()
+        target = context.Queue() if use_queue else None
+        writer = None
+        if use_queue:
+            writer = context.Process(target=run_writer, args=(target, options['writer_max_rows'], results))
+            writer.start()
+
+        start = time.perf_counter()
+        producers = [
+            context.Process(
+                target=run_producer,
+                args=(index, options['rows'], options['chunk'], run_id, target, results)
+            )
+            for index in range(options['producers'])
+        ]
+        for process in producers:
+            process.start()
+        producer_stats = [results.get() for _ in producers]
+        for process in producers:
+            process.join()
+
+        transactions = '-'
+        if writer is not None:
+            target.put(None)
+            writer_stats = results.get()
+            writer.join()
+            transactions = writer_stats['transactions']
+        elapsed = time.perf_counter() - start
+
+        saved = Product.objects.count()
+        connection.close()
+        errors = sum(stats['errors'] for stats in producer_stats)
+        if writer is not None:
+            errors += writer_stats['errors']
+        latency = max(stats['max_latency'] for stats in producer_stats)
+        self.stdout.write(
+            f'{name:<16}{elapsed:>10.2f}{saved / elapsed:>10.0f}{saved:>11}{errors:>9}'
+            f'{latency:>14.3f}{transactions!s:>15}'
+        )
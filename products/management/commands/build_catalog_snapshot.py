@@ -0,0 +1,46 @@
+"""
+Comando de Django para generar la instantánea columnar del catálogo
+
+Escribe las columnas numéricas de ``Product`` como ficheros NumPy en
+``CATALOG_SNAPSHOT_DIR`` (o ``--dir``) y la publica como la instantánea actual.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.services.catalog_snapshot import build_catalog_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Genera la instantánea columnar (NumPy, mapeada en memoria) del catálogo de productos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir',
+            default=None,
+            help='Directorio de las instantáneas (por defecto CATALOG_SNAPSHOT_DIR)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Productos leídos por consulta'
+        )
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=None,
+            help='Versiones a conservar en disco (por defecto CATALOG_SNAPSHOT_KEEP)'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] <= 0:
+            raise CommandError('--chunk-size debe ser > 0')
+        try:
+            result = build_catalog_snapshot(
+                directory=options['dir'], chunk_size=options['chunk_size'], keep=options['keep']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Instantánea {result['version']}: {result['rows']} productos en {result['path']}"
+        ))
@@ -0,0 +1,61 @@
+"""
+Comando de Django para entregar las notificaciones pendientes del outbox
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.services.notification_outbox import OutboxWorker, get_outbox_stats
+
+
+class Command(BaseCommand):
+    help = 'Entrega por lotes las notificaciones pendientes del outbox (Telegram/Discord)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Filas por lote (por defecto NOTIFICATION_OUTBOX_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Máximo de lotes por pasada (por defecto hasta vaciar)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Seguir entregando indefinidamente (worker)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Segundos de espera entre pasadas con --loop'
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Solo mostrar filas del outbox por estado'
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            for status, total in get_outbox_stats().items():
+                self.stdout.write(f'{status:<10}{total:>8}')
+            return
+
+        worker = OutboxWorker(batch_size=options['batch_size'])
+        while True:
+            stats = worker.drain(max_batches=options['max_batches'])
+            if stats['claimed'] or not options['loop']:
+                self.stdout.write(
+                    f"Lotes: {stats['batches']} | enviadas: {stats['sent']} | "
+                    f"a reintentar: {stats['retry']} | fallidas: {stats['failed']}"
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
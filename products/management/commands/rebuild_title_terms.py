@@ -0,0 +1,51 @@
+"""
+Comando de Django para reconstruir la frecuencia de términos de los títulos (ProductTermFrequency)
+
+Backfill inicial tras la migración y realineado con el catálogo después de
+borrados o de cambios hechos fuera de la ingesta.
+"""
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from products.services.title_terms import rebuild_title_terms
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye la frecuencia diaria de términos de los títulos de productos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            default=None,
+            metavar='AAAA-MM-DD',
+            help='Reconstruir solo desde este día (por defecto todo el histórico)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Reconstruir solo los últimos N días'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since'] and options['days'] is not None:
+            raise CommandError('Usar --since o --days, no ambos')
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError(f"Fecha inválida: {options['since']} (usar AAAA-MM-DD)")
+        elif options['days'] is not None:
+            if options['days'] < 0:
+                raise CommandError('--days debe ser >= 0')
+            since = timezone.localdate() - timedelta(days=options['days'])
+
+        result = rebuild_title_terms(since)
+        self.stdout.write(self.style.SUCCESS(
+            f"Términos de títulos reconstruidos desde {since or 'el inicio'}: "
+            f"{result['created']} filas ({result['deleted']} borradas)"
+        ))
@@ -0,0 +1,53 @@
+"""
+Comando de Django para servir el escritor único de ingesta
+
+Arranca ``IngestWriter`` en un hilo y expone su cola en INGEST_WRITER_ADDRESS.
+Con ``INGEST_WRITER_ENABLED=True`` los workers de Celery, el cron y los comandos
+(``ProductIngestion``) envían sus productos a esta cola en lugar de escribir
+cada uno en SQLite.
+"""
+
+from django.core.management.base import BaseCommand
+
+from products.services.sqlite_concurrency import IngestWriter, serve_ingest_queue
+
+
+class Command(BaseCommand):
+    help = 'Sirve la cola del escritor único de productos (modo SQLite de alta concurrencia)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-rows',
+            type=int,
+            default=None,
+            help='Filas máximas por transacción (por defecto INGEST_WRITER_MAX_ROWS)'
+        )
+        parser.add_argument(
+            '--max-wait',
+            type=float,
+            default=None,
+            help='Segundos de espera para agrupar envíos (por defecto INGEST_WRITER_MAX_WAIT)'
+        )
+        parser.add_argument(
+            '--update-existing',
+            action='store_true',
+            help='Actualizar productos existentes'
+        )
+
+    def handle(self, *args, **options):
+        writer = IngestWriter(
+            max_rows=options['max_rows'],
+            max_wait=options['max_wait'],
+            update_existing=options['update_existing'],
+        ).start()
+        try:
+            serve_ingest_queue(writer)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stats = writer.stop()
+            self.stdout.write(self.style.SUCCESS(
+                f"Escritor detenido: {stats['created']} creados | {stats['updated']} actualizados | "
+                f"{stats['submissions']} envíos en {stats['transactions']} transacciones | {stats['errors']} errores | "
+                f"{stats['failed_submissions']} envíos no escritos"
+            ))
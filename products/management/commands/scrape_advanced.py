@@ -6,7 +6,7 @@ from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 from products.services.advanced_scraper import AdvancedAliExpressScraper
 from products.models import Product
-from products.services.product_manager import ProductManager
+from products.services.product_manager import ProductIngestion
 import logging
 
 logger = logging.getLogger('products')
@@ -39,6 +39,19 @@ class Command(BaseCommand):
             action='store_true',
             help='Usar scraping concurrente'
         )
+        parser.add_argument(
+            '--engine',
+            type=str,
+            choices=['threads', 'async'],
+            default='threads',
+            help='Motor de descarga: threads (ThreadPoolExecutor) o async (asyncio)'
+        )
+        parser.add_argument(
+            '--async-concurrency',
+            type=int,
+            default=8,
+            help='Peticiones simultáneas con --engine async'
+        )
         parser.add_argument(
             '--save',
             action='store_true',
@@ -55,6 +68,7 @@ class Command(BaseCommand):
         count = options['count']
         max_pages = options['max_pages']
         concurrent = options['concurrent']
+        engine = options['engine']
         save_to_db = options['save']
         verbose = options['verbose']
 
@@ -67,11 +81,12 @@ class Command(BaseCommand):
             self.stdout.write(f"Productos solicitados: {count}")
             self.stdout.write(f"Páginas máximas: {max_pages}")
             self.stdout.write(f"Modo concurrente: {'Sí' if concurrent else 'No'}")
+            self.stdout.write(f"Motor: {engine}")
             self.stdout.write(f"Guardar en DB: {'Sí' if save_to_db else 'No'}")
 
         try:
             # Crear scraper avanzado
-            scraper = AdvancedAliExpressScraper()
+            scraper = AdvancedAliExpressScraper(async_concurrency=options['async_concurrency'])
             
             # Ejecutar scraping
             start_time = timezone.now()
@@ -79,8 +94,10 @@ class Command(BaseCommand):
                 search_term=search_term,
                 count=count,
                 max_pages=max_pages,
-                concurrent_requests=concurrent
+                concurrent_requests=concurrent,
+                engine=engine
             )
+            scraper.close()
             end_time = timezone.now()
             
             duration = (end_time - start_time).total_seconds()
@@ -124,56 +141,29 @@ class Command(BaseCommand):
             if save_to_db:
                 self.stdout.write("\n💾 Guardando productos en la base de datos...")
                 
-                manager = ProductManager()
-                saved_count = 0
-                updated_count = 0
-                error_count = 0
+                def report_chunk(chunk_stats):
+                    if verbose:
+                        self.stdout.write(
+                            f"  ✓ Bloque {chunk_stats['chunks']}: {chunk_stats['created']} nuevos, "
+                            f"{chunk_stats['updated']} actualizados"
+                        )
                 
-                for product in result.products:
-                    try:
-                        # Verificar si ya existe
-                        existing = Product.objects.filter(
-                            title=product['title'],
-                            source_platform='aliexpress_advanced'
-                        ).first()
-                        
-                        if existing:
-                            # Actualizar producto existente
-                            for field, value in product.items():
-                                if hasattr(existing, field):
-                                    setattr(existing, field, value)
-                            existing.save()
-                            updated_count += 1
-                            if verbose:
-                                self.stdout.write(f"  ↻ Actualizado: {product['title'][:40]}...")
-                        else:
-                            # Crear nuevo producto
-                            new_product = Product.objects.create(
-                                title=product['title'],
-                                price=product['price'],
-                                url=product['url'],
-                                image=product['image'],
-                                shipping_time=product['shipping_time'],
-                                category=product['category'],
-                                rating=product['rating'],
-                                source_platform='aliexpress_advanced'
-                            )
-                            saved_count += 1
-                            if verbose:
-                                self.stdout.write(f"  ✓ Guardado: {product['title'][:40]}...")
-                        
-                    except Exception as e:
-                        error_count += 1
-                        if verbose:
-                            self.stdout.write(
-                                self.style.ERROR(f"  ✗ Error guardando {product['title'][:30]}...: {e}")
-                            )
+                # Misma etapa de ingesta que la tarea Celery y el cron (upsert por URL)
+                ingestion = ProductIngestion(update_existing=True, on_chunk=report_chunk)
+                ingestion.extend(
+                    dict(product, source_platform='aliexpress_advanced') for product in result.products
+                )
+                save_stats = ingestion.flush()
+                saved_count = save_stats['created']
+                updated_count = save_stats['updated']
+                error_count = save_stats['errors']
                 
                 self.stdout.write(
                     self.style.SUCCESS(f"\n📊 Resumen de guardado:")
                 )
                 self.stdout.write(f"  ✅ Productos nuevos: {saved_count}")
                 self.stdout.write(f"  ↻ Productos actualizados: {updated_count}")
+                self.stdout.write(f"  = Sin cambios (no reescritos): {save_stats['unchanged']}")
                 self.stdout.write(f"  ❌ Errores: {error_count}")
                 
                 # Estadísticas finales
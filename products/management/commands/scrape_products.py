@@ -6,7 +6,7 @@ import logging
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from products.models import Product
-from products.services.scraper import scrape_all_platforms
+from products.services.scraper import iter_all_platforms
 
 logger = logging.getLogger('products')
 
@@ -47,14 +47,14 @@ class Command(BaseCommand):
                 # Scrapear plataforma específica
                 from products.services.scraper import ScraperFactory
                 scraper = ScraperFactory.get_scraper(platform)
-                products = scraper.scrape_products(count=count)
-                self.stdout.write(f'Scrapeados {len(products)} productos de {platform}')
+                pages = scraper.iter_product_pages(count=count)
             else:
                 # Scrapear todas las plataformas
-                products = scrape_all_platforms(count_per_platform=count)
-                self.stdout.write(f'Scrapeados {len(products)} productos totales')
+                pages = iter_all_platforms(count_per_platform=count)
             
             if dry_run:
+                products = [product for page_products in pages for product in page_products]
+                self.stdout.write(f'Scrapeados {len(products)} productos')
                 self.stdout.write(
                     self.style.WARNING('Modo dry-run: No se guardaron productos en la base de datos')
                 )
@@ -62,10 +62,17 @@ class Command(BaseCommand):
                     self.stdout.write(f"  - {product['title']} - ${product['price']}")
                 return
             
-            # Guardar productos en la base de datos
-            from products.services.product_manager import bulk_import_products
+            # Guardar cada página en la base de datos según llega
+            from products.services.product_manager import import_product_pages
             
-            stats = bulk_import_products(products)
+            def report_page(page, page_stats):
+                self.stdout.write(
+                    f"Página {page}: {page_stats['received']} productos recibidos, "
+                    f"{page_stats['created']} nuevos"
+                )
+            
+            stats = import_product_pages(pages, on_page=report_page)
+            self.stdout.write(f"Scrapeados {stats['received']} productos")
             new_products = stats['created']
             existing_products = stats['existing']
             errors = stats['errors']
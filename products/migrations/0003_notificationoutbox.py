@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_scrapejob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scrapejob',
+            name='query',
+            field=models.CharField(help_text='Término de búsqueda', max_length=300),
+        ),
+        migrations.AlterField(
+            model_name='scrapejob',
+            name='source',
+            field=models.CharField(help_text='Scraper usado', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='scrapejob',
+            name='task_id',
+            field=models.CharField(blank=True, help_text='ID real de la tarea Celery', max_length=255, null=True),
+        ),
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('product_created', 'Product created')], default='product_created', max_length=50)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, help_text='No entregar antes de esta fecha (reintentos y reservas)')),
+                ('delivered', models.JSONField(blank=True, default=list, help_text='Servicios ya entregados, no se reenvían al reintentar')),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Notificación pendiente',
+                'verbose_name_plural': 'Notificaciones pendientes',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx')],
+            },
+        ),
+    ]
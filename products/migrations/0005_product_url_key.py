@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='url_key',
+            field=models.CharField(blank=True, editable=False, help_text='Hash de la URL canónica (identidad del producto entre scrapers)', max_length=32, null=True, unique=True),
+        ),
+    ]
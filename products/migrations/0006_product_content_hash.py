@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_url_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, help_text='Huella del contenido (CONTENT_FIELDS) para omitir actualizaciones sin cambios', max_length=16, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-17 00:02
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceObservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('observed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('rating', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True)),
+                ('shipping_time', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='price_observations', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Observación de precio',
+                'verbose_name_plural': 'Observaciones de precio',
+                'indexes': [models.Index(fields=['product', 'observed_at'], name='priceobs_product_time_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+"""
+Índice de texto completo de productos en PostgreSQL
+
+Columna generada ``search_vector`` (título con peso A, categoría con peso B) e
+índice GIN. En SQLite el índice es una tabla FTS5 con triggers que se crea tras
+cada migrate (``products.services.search.ensure_search_index``), porque Django
+reconstruye la tabla al alterarla en SQLite y los triggers se perderían.
+"""
+
+from django.db import migrations
+
+
+def add_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "ALTER TABLE products_product ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(category, '')), 'B')"
+        ") STORED"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS product_search_vector_idx ON products_product USING GIN (search_vector)"
+    )
+
+
+def remove_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS product_search_vector_idx")
+    schema_editor.execute("ALTER TABLE products_product DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_priceobservation'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, remove_search_vector),
+    ]
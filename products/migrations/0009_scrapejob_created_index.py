@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scrapejob',
+            index=models.Index(fields=['created_at', 'id'], name='scrapejob_created_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 00:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_scrapejob_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(blank=True, default='', help_text="'' para productos sin categoría", max_length=200)),
+                ('source_platform', models.CharField(max_length=100)),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('price_sum', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('price_min', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('price_max', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('rating_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Estadística diaria de productos',
+                'verbose_name_plural': 'Estadísticas diarias de productos',
+                'constraints': [models.UniqueConstraint(fields=('date', 'category', 'source_platform'), name='dailystats_key_unique')],
+            },
+        ),
+    ]
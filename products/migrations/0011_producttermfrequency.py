@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-17 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_productdailystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTermFrequency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('term', models.CharField(max_length=64)),
+                ('product_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Frecuencia de término',
+                'verbose_name_plural': 'Frecuencias de términos',
+                'constraints': [models.UniqueConstraint(fields=('date', 'term'), name='termfreq_key_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 01:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_producttermfrequency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='claimed_by',
+            field=models.CharField(blank=True, help_text='Reserva del worker que la está entregando', max_length=32, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+"""
+Rellena Product.url_key de los productos anteriores a la migración 0005
+
+Sin clave, la ingesta por lotes (sondeo por ``url_key``) no encuentra esas filas
+y choca con el índice único de ``url``. Misma lógica que el comando
+``backfill_url_keys``: por cada URL canónica sobrevive el producto más reciente.
+"""
+
+from django.db import migrations
+
+
+def fill_url_keys(apps, schema_editor):
+    from products.services.url_canonical import backfill_url_keys
+
+    # Los borrados de aquí no pasan por las señales de los rollups; los realinea
+    # el cron diario (rebuild_catalog_rollups)
+    backfill_url_keys(apps.get_model('products', 'Product'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_notificationoutbox_claimed_by'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_url_keys, migrations.RunPython.noop),
+    ]
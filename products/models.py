@@ -1,8 +1,13 @@
+import hashlib
+from decimal import Decimal
+
 from django.db import models
 from django.utils import timezone
 import uuid
 from django.core.validators import MinValueValidator
 
+from products.services.url_canonical import product_url_key
+
 
 class Product(models.Model):
     """
@@ -11,6 +16,10 @@ class Product(models.Model):
     title = models.CharField(max_length=500, help_text="Título del producto")
     price = models.DecimalField(max_digits=10, decimal_places=2, help_text="Precio del producto")
     url = models.URLField(unique=True, help_text="URL única del producto para evitar duplicados")
+    url_key = models.CharField(
+        max_length=32, unique=True, null=True, blank=True, editable=False,
+        help_text="Hash de la URL canónica (identidad del producto entre scrapers)"
+    )
     image = models.URLField(blank=True, null=True, help_text="URL de la imagen del producto")
     created_at = models.DateTimeField(default=timezone.now, help_text="Fecha de creación")
     
@@ -31,15 +40,66 @@ class Product(models.Model):
         max_length=100, default='aliexpress',
         help_text="Plataforma de origen del producto"
     )
+    content_hash = models.CharField(
+        max_length=16, null=True, blank=True, editable=False,
+        help_text="Huella del contenido (CONTENT_FIELDS) para omitir actualizaciones sin cambios"
+    )
+    
+    # Campos que forman la huella de contenido
+    CONTENT_FIELDS = ('title', 'price', 'rating', 'shipping_time', 'image', 'category')
     
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Producto"
         verbose_name_plural = "Productos"
+        # Elegidos a partir de las consultas de la API, analytics y cron
+        # (ver el comando benchmark_catalog_queries)
+        indexes = [
+            # Orden por defecto, recientes/24h, health check y limpieza por antigüedad
+            models.Index(fields=['created_at'], name='product_created_at_idx'),
+            # Tendencias por categoría en un rango de fechas
+            models.Index(fields=['category', 'created_at'], name='product_category_created_idx'),
+            # Filtro por plataformas + rango de precio del listado
+            models.Index(fields=['source_platform', 'price'], name='product_platform_price_idx'),
+            # Listado por plataforma ordenado por fecha
+            models.Index(fields=['source_platform', 'created_at'], name='product_platform_created_idx'),
+            # Rango de precio y rankings más baratos/caros
+            models.Index(fields=['price'], name='product_price_idx'),
+            # Top rating (rating >= x ORDER BY -rating, -created_at)
+            models.Index(fields=['rating', 'created_at'], name='product_rating_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - ${self.price}"
     
+    @classmethod
+    def fingerprint(cls, values) -> str:
+        """Huella de los CONTENT_FIELDS de ``values`` (normalizados como los guarda la base de datos)"""
+        parts = []
+        for name in cls.CONTENT_FIELDS:
+            field = cls._meta.get_field(name)
+            value = field.to_python(values.get(name))
+            if isinstance(value, Decimal):
+                value = value.quantize(Decimal(1).scaleb(-field.decimal_places))
+            parts.append('' if value is None else str(value))
+        return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=8).hexdigest()
+    
+    def compute_content_hash(self) -> str:
+        return self.fingerprint({name: getattr(self, name) for name in self.CONTENT_FIELDS})
+    
+    def save(self, *args, **kwargs):
+        """Mantener url_key y content_hash sincronizados con los campos de los que derivan"""
+        update_fields = kwargs.get('update_fields')
+        derived = set()
+        if self.url:
+            self.url_key = product_url_key(self.url)
+            derived.add('url_key')
+        self.content_hash = self.compute_content_hash()
+        derived.add('content_hash')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *derived}
+        super().save(*args, **kwargs)
+    
     def is_recently_added(self):
         """Verifica si el producto fue agregado en las últimas 24 horas"""
         from datetime import timedelta
@@ -74,6 +134,10 @@ class ScrapeJob(models.Model):
         ordering = ['-created_at']
         verbose_name = "Scrape Job"
         verbose_name_plural = "Scrape Jobs"
+        indexes = [
+            # Paginación por cursor del listado (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='scrapejob_created_idx'),
+        ]
 
     def mark_started(self):
         self.status = self.Status.STARTED
@@ -120,3 +184,120 @@ class ScrapeJob(models.Model):
 
     def __str__(self):
         return f"ScrapeJob({self.query} - {self.status})"
+
+
+class NotificationOutbox(models.Model):
+    """
+    Notificaciones pendientes de entregar (patrón outbox)
+
+    Se escriben en la misma transacción que el producto y las entrega un worker
+    aparte, de modo que la ingesta no espera a Telegram/Discord.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        SENT = 'SENT', 'Sent'
+        FAILED = 'FAILED', 'Failed'
+
+    class Event(models.TextChoices):
+        PRODUCT_CREATED = 'product_created', 'Product created'
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='notifications')
+    event = models.CharField(max_length=50, choices=Event.choices, default=Event.PRODUCT_CREATED)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now, help_text="No entregar antes de esta fecha (reintentos y reservas)")
+    claimed_by = models.CharField(max_length=32, blank=True, null=True, help_text="Reserva del worker que la está entregando")
+    delivered = models.JSONField(default=list, blank=True, help_text="Servicios ya entregados, no se reenvían al reintentar")
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Notificación pendiente"
+        verbose_name_plural = "Notificaciones pendientes"
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+        ]
+
+    def __str__(self):
+        return f"NotificationOutbox({self.event} #{self.product_id} - {self.status})"
+
+
+class PriceObservation(models.Model):
+    """
+    Histórico de precio/rating/envío de un producto (solo se añade, nunca se edita)
+
+    Se escribe una fila al crear el producto y otra cada vez que cambia alguno
+    de los tres valores; la lectura es siempre por producto y rango de fechas,
+    cubierta por el índice (product, observed_at).
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='price_observations', db_index=False)
+    observed_at = models.DateTimeField(default=timezone.now)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    rating = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
+    shipping_time = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Observación de precio"
+        verbose_name_plural = "Observaciones de precio"
+        indexes = [
+            models.Index(fields=['product', 'observed_at'], name='priceobs_product_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"PriceObservation(#{self.product_id} {self.observed_at:%Y-%m-%d %H:%M} ${self.price})"
+
+
+class ProductDailyStats(models.Model):
+    """
+    Resumen diario de productos por categoría y plataforma (tabla de rollup)
+
+    Una fila por (día de ``created_at`` en la zona horaria local, categoría,
+    plataforma) con número de productos, suma/mínimo/máximo de precio y suma de
+    ratings. Se mantiene de forma incremental con cada alta, edición o borrado
+    (ver ``services/catalog_rollups.py``) y ``rebuild_daily_stats`` la reconstruye; analytics lee estas filas en lugar de agrupar ``Product``.
+    """
+    date = models.DateField()
+    category = models.CharField(max_length=200, blank=True, default='', help_text="'' para productos sin categoría")
+    source_platform = models.CharField(max_length=100)
+    product_count = models.PositiveIntegerField(default=0)
+    price_sum = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    price_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    price_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    rating_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Estadística diaria de productos"
+        verbose_name_plural = "Estadísticas diarias de productos"
+        constraints = [
+            # También sirve de índice para los rangos de fechas de analytics
+            models.UniqueConstraint(fields=['date', 'category', 'source_platform'], name='dailystats_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"ProductDailyStats({self.date} {self.category or '-'} / {self.source_platform}: {self.product_count})"
+
+
+class ProductTermFrequency(models.Model):
+    """
+    Número de productos creados cada día cuyo título contiene un término
+
+    Tabla de rollup para los rankings de palabras clave (ver
+    ``services/title_terms.py``); se mantiene con cada alta, edición o borrado.
+    """
+    date = models.DateField()
+    term = models.CharField(max_length=64)
+    product_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Frecuencia de término"
+        verbose_name_plural = "Frecuencias de términos"
+        constraints = [
+            # También sirve de índice para los rankings por rango de fechas
+            models.UniqueConstraint(fields=['date', 'term'], name='termfreq_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"ProductTermFrequency({self.date} {self.term}: {self.product_count})"
@@ -0,0 +1,271 @@
+"""
+Paginación por cursor (keyset) para los listados de la API
+
+``PageNumberPagination`` ejecuta un ``COUNT(*)`` en cada página y salta las
+anteriores con ``OFFSET``, así que las páginas profundas son cada vez más
+lentas. Aquí el cursor guarda la posición del último elemento servido en el
+orden del listado (por defecto ``-created_at`` con ``id`` como desempate) y la
+página siguiente se pide con ``WHERE (created_at, id) < (c, i)`` sobre el
+índice: la página N cuesta lo mismo que la primera.
+
+* ``?page_size=`` (o el parámetro de la subclase) limitado a ``API_MAX_PAGE_SIZE``.
+* ``?total=exact`` añade ``count`` con un ``COUNT(*)``; ``?total=estimate`` cuenta
+  hasta ``API_COUNT_ESTIMATE_CAP`` filas y, por encima, usa la estimación del
+  planificador en PostgreSQL (``count_is_estimate`` indica si es aproximado).
+* Órdenes que no se pueden recorrer por keyset (relevancia de búsqueda, campos
+  con NULL) guardan un desplazamiento en el cursor.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+DEFAULT_ORDERING = ('-created_at',)
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
+
+
+def estimate_count(queryset: QuerySet, cap: int) -> Tuple[int, bool]:
+    """
+    Total aproximado: exacto hasta ``cap`` filas; por encima, la estimación del
+    planificador en PostgreSQL o ``cap`` como cota inferior en otras bases de datos.
+
+    Returns:
+        Tupla (total, es_estimacion)
+    """
+    counted = queryset.order_by()[:cap].count()
+    if counted < cap:
+        return counted, False
+    if connections[queryset.db].vendor == 'postgresql':
+        try:
+            plan = json.loads(queryset.order_by().explain(format='json'))
+            return max(int(plan[0]['Plan']['Plan Rows']), cap), True
+        except (ValueError, KeyError, IndexError, TypeError):
+            pass
+    return cap, True
+
+
+class KeysetPagination(BasePagination):
+    """Paginación por cursor sobre el orden del queryset con la clave primaria como desempate"""
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    total_query_param = 'total'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.total = self.get_total(queryset, request)
+
+        self.model = queryset.model
+        self.ordering = self.get_ordering(queryset)
+        self.keyset = self.get_keyset(self.model, self.ordering)
+        cursor = self.decode_cursor(request)
+
+        if self.keyset is None:
+            return self._paginate_offset(queryset, cursor)
+        return self._paginate_keyset(queryset, cursor)
+
+    def get_page_size(self, request) -> int:
+        max_page_size = int(getattr(settings, 'API_MAX_PAGE_SIZE', 100))
+        default = min(api_settings.PAGE_SIZE or 20, max_page_size)
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return default
+        if page_size <= 0:
+            return default
+        return min(page_size, max_page_size)
+
+    def get_total(self, queryset, request) -> Optional[Tuple[int, bool]]:
+        mode = request.query_params.get(self.total_query_param)
+        if mode == 'exact':
+            return queryset.count(), False
+        if mode == 'estimate':
+            return estimate_count(queryset, int(getattr(settings, 'API_COUNT_ESTIMATE_CAP', 10000)))
+        return None
+
+    def get_ordering(self, queryset) -> Tuple:
+        """Orden efectivo del queryset (``order_by``, el de ``Meta`` o ``-created_at``)"""
+        if queryset.query.order_by:
+            return tuple(queryset.query.order_by)
+        if queryset.query.default_ordering and queryset.model._meta.ordering:
+            return tuple(queryset.model._meta.ordering)
+        return DEFAULT_ORDERING
+
+    @staticmethod
+    def get_keyset(model, ordering) -> Optional[List[Tuple[str, bool]]]:
+        """
+        Campos (nombre, descendente) para recorrer por keyset, con la clave primaria
+        como desempate; ``None`` si algún término no es un campo propio no nulo.
+        """
+        pk_name = model._meta.pk.name
+        keyset = []
+        for term in ordering:
+            if not isinstance(term, str) or '__' in term or term.lstrip('-') in ('', '?'):
+                return None
+            name = term.lstrip('-')
+            if name == 'pk':
+                name = pk_name
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if not field.concrete or field.null or field.is_relation:
+                return None
+            keyset.append((name, term.startswith('-')))
+            if name == pk_name:
+                return keyset
+        keyset.append((pk_name, keyset[-1][1] if keyset else True))
+        return keyset
+
+    # Cursor
+
+    def decode_cursor(self, request) -> Optional[dict]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if not isinstance(cursor, dict):
+                raise ValueError
+            if self.keyset is None:
+                cursor['o'] = int(cursor['o'])
+                if cursor['o'] < 0:
+                    raise ValueError
+            else:
+                values = cursor['p']
+                if not isinstance(values, list) or len(values) != len(self.keyset):
+                    raise ValueError
+                cursor['p'] = [
+                    self.model._meta.get_field(name).to_python(value)
+                    for (name, _), value in zip(self.keyset, values)
+                ]
+                cursor['r'] = bool(cursor.get('r'))
+        except (KeyError, TypeError, ValueError, UnicodeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, cursor: dict) -> str:
+        raw = json.dumps(cursor, separators=(',', ':')).encode('utf-8')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, base64.urlsafe_b64encode(raw).decode('ascii'))
+
+    def _position(self, obj) -> list:
+        return [_encode_value(getattr(obj, name)) for name, _ in self.keyset]
+
+    # Estrategias
+
+    def _paginate_keyset(self, queryset, cursor):
+        reverse = bool(cursor and cursor['r'])
+        order_by = [
+            f"{'-' if descending != reverse else ''}{name}" for name, descending in self.keyset
+        ]
+        queryset = queryset.order_by(*order_by)
+        if cursor:
+            queryset = queryset.filter(self._after(cursor['p'], reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_following = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        has_next = True if reverse else has_following
+        has_previous = has_following if reverse else cursor is not None
+        if results:
+            self.next_cursor = {'p': self._position(results[-1])} if has_next else None
+            self.previous_cursor = {'p': self._position(results[0]), 'r': 1} if has_previous else None
+        else:
+            # Página vacía (p. ej. tras borrar filas): volver desde la misma posición
+            position = [_encode_value(value) for value in cursor['p']] if cursor else None
+            self.next_cursor = {'p': position} if cursor and reverse else None
+            self.previous_cursor = {'p': position, 'r': 1} if cursor and not reverse else None
+        return results
+
+    def _after(self, values, reverse) -> Q:
+        """``(a, b, ...) > (x, y, ...)`` en el sentido del recorrido, como OR de prefijos iguales"""
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self.keyset, values):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def _paginate_offset(self, queryset, cursor):
+        offset = cursor['o'] if cursor else 0
+        results = list(queryset[offset:offset + self.page_size + 1])
+        has_next = len(results) > self.page_size
+        self.next_cursor = {'o': offset + self.page_size} if has_next else None
+        self.previous_cursor = {'o': max(offset - self.page_size, 0)} if offset > 0 else None
+        return results[:self.page_size]
+
+    # Respuesta
+
+    def get_next_link(self) -> Optional[str]:
+        return self.encode_cursor(self.next_cursor) if self.next_cursor else None
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.previous_cursor:
+            return None
+        if self.previous_cursor == {'o': 0}:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.previous_cursor)
+
+    def get_paginated_data(self, data) -> dict:
+        payload = {}
+        if self.total is not None:
+            payload['count'], payload['count_is_estimate'] = self.total
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return payload
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'description': 'Solo con ?total=exact|estimate'},
+                'count_is_estimate': {'type': 'boolean'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class ScrapeJobPagination(KeysetPagination):
+    """Listado de jobs: ``?limit=`` como tamaño de página (nombre histórico del endpoint)"""
+
+    page_size_query_param = 'limit'
+
+    def get_paginated_data(self, data) -> dict:
+        payload = super().get_paginated_data(data)
+        payload['limit'] = self.page_size
+        return payload
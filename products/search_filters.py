@@ -0,0 +1,27 @@
+"""
+Filtros DRF de búsqueda por relevancia para la API de productos
+"""
+
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from .services.search import SEARCH_FIELDS, has_search_rank, search_products
+
+
+class ProductSearchFilter(SearchFilter):
+    """``?search=`` sobre el índice de texto completo (FTS5 / tsvector) en lugar de ``icontains``"""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+        fields = getattr(view, 'search_fields', None) or SEARCH_FIELDS
+        return search_products(queryset, query, fields=fields)
+
+
+class RelevanceOrderingFilter(OrderingFilter):
+    """Con ``?search=`` y sin ``?ordering=`` ordena por relevancia en lugar de por el orden por defecto"""
+
+    def filter_queryset(self, request, queryset, view):
+        if self.ordering_param not in request.query_params and has_search_rank(queryset):
+            return queryset.order_by('-search_rank', '-created_at')
+        return super().filter_queryset(request, queryset, view)
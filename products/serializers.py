@@ -4,6 +4,7 @@ Serializers para la API REST de productos
 
 from rest_framework import serializers
 from .models import Product, ScrapeJob
+from .services.url_canonical import product_url_key
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -66,6 +67,15 @@ class ProductCreateSerializer(serializers.ModelSerializer):
             'source_platform'
         ]
     
+    def validate_url(self, value):
+        """Validar que no exista ya el producto con otra variante de la misma URL"""
+        duplicates = Product.objects.filter(url_key=product_url_key(value))
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError("Ya existe un producto con esta URL")
+        return value
+    
     def validate_price(self, value):
         """Validar que el precio sea positivo"""
         if value <= 0:
@@ -7,11 +7,16 @@ import random
 import time
 import re
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from decimal import Decimal
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, quote_plus
+from .rate_limiter import get_rate_limiter
+from .http_cache import get_http_cache, install_http_cache
+from .html_parser import parse_product_containers
+from .selector_cache import get_selector_cache, layout_key, select_containers
+from .extraction_plan import ExtractionPlan
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
@@ -33,7 +38,7 @@ class AdvancedAliExpressScraper:
     Scraper avanzado para AliExpress con selectores mejorados y funcionalidades adicionales
     """
     
-    def __init__(self):
+    def __init__(self, async_concurrency: int = 8):
         self.base_url = "https://www.aliexpress.com"
         self.search_url = "https://www.aliexpress.com/wholesale"
         
@@ -63,6 +68,16 @@ class AdvancedAliExpressScraper:
         
         self.session = requests.Session()
         self._update_headers()
+        # Cache HTTP en disco + rate limit compartido por host
+        self.http_cache = get_http_cache()
+        install_http_cache(self.session, self.http_cache)
+        
+        # Motor asíncrono (se crea bajo demanda con engine='async')
+        self.async_concurrency = async_concurrency
+        self._async_fetcher = None
+        
+        # Planes de extracción compilados por layout (host + selector de contenedor)
+        self._extraction_plans = {}
         
         # Selectores mejorados y más específicos
         self.advanced_selectors = {
@@ -196,6 +211,7 @@ class AdvancedAliExpressScraper:
         count: int = 5,
         max_pages: int = 3,
         concurrent_requests: bool = True,
+        engine: str = 'threads',
         **kwargs
     ) -> ScrapingResult:
         """
@@ -206,6 +222,7 @@ class AdvancedAliExpressScraper:
             count: Número de productos deseados
             max_pages: Máximo número de páginas a scrapear
             concurrent_requests: Si usar requests concurrentes
+            engine: 'threads' (ThreadPoolExecutor) o 'async' (asyncio + aiohttp)
             
         Returns:
             ScrapingResult: Resultado estructurado del scraping
@@ -219,7 +236,8 @@ class AdvancedAliExpressScraper:
             'pages_scraped': 0,
             'fallback_used': False,
             'scraping_method': 'advanced',
-            'concurrent': concurrent_requests
+            'concurrent': concurrent_requests,
+            'engine': engine
         }
         
         try:
@@ -227,14 +245,16 @@ class AdvancedAliExpressScraper:
             optimized_term = self._optimize_search_term_advanced(search_term)
             metadata['optimized_term'] = optimized_term
             
-            if concurrent_requests:
-                # Scraping concurrente de múltiples páginas
-                all_products = self._scrape_concurrent_pages(optimized_term, count, max_pages)
-            else:
-                # Scraping secuencial
-                all_products = self._scrape_sequential_pages(optimized_term, count, max_pages)
+            pages = self._iter_pages(optimized_term, count, max_pages, concurrent_requests, engine)
+            try:
+                for page_products in pages:
+                    all_products.extend(page_products)
+                    if len(all_products) >= count:
+                        break
+            finally:
+                pages.close()
             
-            metadata['pages_scraped'] = min(max_pages, len(all_products) // (count // max_pages) + 1)
+            metadata['pages_scraped'] = min(max_pages, len(all_products) // max(1, count // max_pages) + 1)
             
             # Si no se obtuvieron suficientes productos, usar fallback mejorado
             if len(all_products) < count:
@@ -276,6 +296,57 @@ class AdvancedAliExpressScraper:
                 metadata=metadata
             )
     
+    def iter_product_pages(
+        self, 
+        search_term: str = "electronics", 
+        count: int = 5,
+        max_pages: int = 3,
+        concurrent_requests: bool = True,
+        engine: str = 'threads',
+        fallback: bool = True,
+        **kwargs
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Versión en streaming de scrape_products_advanced: entrega los productos
+        validados de cada página en cuanto esa página se procesa
+        
+        Solo se mantiene en memoria la página en curso (más las que estén en
+        vuelo). Si faltan productos al terminar, el fallback llega como una
+        última página. Cerrar el generador cancela las páginas pendientes.
+        
+        Yields:
+            List[Dict]: Productos normalizados de una página (nunca más de ``count`` en total)
+        """
+        logger.info(f"Iniciando scraping en streaming para '{search_term}' ({count} productos, {max_pages} páginas)")
+        
+        remaining = count
+        try:
+            optimized_term = self._optimize_search_term_advanced(search_term)
+            pages = self._iter_pages(optimized_term, count, max_pages, concurrent_requests, engine)
+            try:
+                for page_products in pages:
+                    page_products = self._validate_and_enhance_products(page_products[:remaining])
+                    if not page_products:
+                        continue
+                    remaining -= len(page_products)
+                    yield page_products
+                    if remaining <= 0:
+                        return
+            finally:
+                pages.close()
+        except Exception as e:
+            logger.error(f"Error en scraping avanzado en streaming: {e}")
+        
+        if fallback and remaining > 0:
+            yield self._validate_and_enhance_products(
+                self._generate_enhanced_fallback_products(remaining, search_term)
+            )
+    
+    def iter_products(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        """Productos normalizados uno a uno, página a página (ver iter_product_pages)"""
+        for page_products in self.iter_product_pages(**kwargs):
+            yield from page_products
+    
     def _optimize_search_term_advanced(self, search_term: str) -> str:
         """
         Optimización avanzada del término de búsqueda con análisis de contexto
@@ -312,69 +383,113 @@ class AdvancedAliExpressScraper:
         
         return search_term
     
-    def _scrape_concurrent_pages(self, search_term: str, count: int, max_pages: int) -> List[Dict[str, Any]]:
+    def _iter_pages(
+        self, 
+        search_term: str, 
+        count: int, 
+        max_pages: int, 
+        concurrent_requests: bool = True, 
+        engine: str = 'threads'
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Genera los productos de cada página en cuanto esa página está lista
+        """
+        products_per_page = max(1, count // max_pages)
+        if engine == 'async':
+            # Descarga asíncrona de todas las páginas con un único cliente
+            return self._iter_async_pages(search_term, products_per_page, max_pages)
+        if concurrent_requests:
+            # Scraping concurrente de múltiples páginas
+            return self._iter_concurrent_pages(search_term, products_per_page, max_pages)
+        # Scraping secuencial
+        return self._iter_sequential_pages(search_term, products_per_page, max_pages)
+    
+    def _iter_concurrent_pages(self, search_term: str, products_per_page: int, max_pages: int) -> Iterator[List[Dict[str, Any]]]:
         """
         Scraping concurrente de múltiples páginas para mejor rendimiento
         """
         logger.info(f"Iniciando scraping concurrente de {max_pages} páginas")
         
-        all_products = []
-        
-        with ThreadPoolExecutor(max_workers=3) as executor:  # Límite para no sobrecargar
+        executor = ThreadPoolExecutor(max_workers=3)  # Límite para no sobrecargar
+        try:
             # Crear futures para cada página
-            futures = []
-            for page in range(1, max_pages + 1):
-                future = executor.submit(self._scrape_single_page, search_term, page, count // max_pages)
-                futures.append(future)
+            futures = [
+                executor.submit(self._scrape_single_page, search_term, page, products_per_page)
+                for page in range(1, max_pages + 1)
+            ]
             
-            # Recopilar resultados
+            # Entregar resultados según terminan
             for future in as_completed(futures):
                 try:
-                    page_products = future.result(timeout=30)  # Timeout de 30 segundos
-                    all_products.extend(page_products)
-                    
-                    if len(all_products) >= count:
-                        break
-                        
+                    yield future.result(timeout=30)  # Timeout de 30 segundos
                 except Exception as e:
                     logger.warning(f"Error en página concurrente: {e}")
-        
-        return all_products
+        finally:
+            # Si el consumidor se detiene no se descargan las páginas pendientes
+            executor.shutdown(wait=False, cancel_futures=True)
     
-    def _scrape_sequential_pages(self, search_term: str, count: int, max_pages: int) -> List[Dict[str, Any]]:
+    def _iter_sequential_pages(self, search_term: str, products_per_page: int, max_pages: int) -> Iterator[List[Dict[str, Any]]]:
         """
-        Scraping secuencial de páginas con delays inteligentes
+        Scraping secuencial de páginas
         """
         logger.info(f"Iniciando scraping secuencial de {max_pages} páginas")
         
-        all_products = []
-        
         for page in range(1, max_pages + 1):
             try:
-                # Delay aleatorio entre páginas
-                if page > 1:
-                    time.sleep(random.uniform(2, 4))
-                
-                page_products = self._scrape_single_page(search_term, page, count // max_pages)
-                all_products.extend(page_products)
-                
+                page_products = self._scrape_single_page(search_term, page, products_per_page)
                 logger.debug(f"Página {page}: {len(page_products)} productos")
-                
-                if len(all_products) >= count:
-                    break
-                    
+                yield page_products
             except Exception as e:
                 logger.warning(f"Error en página {page}: {e}")
                 continue
+    
+    def _iter_async_pages(self, search_term: str, products_per_page: int, max_pages: int) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Scraping asíncrono: las páginas se descargan en paralelo y se parsean según llegan
+        """
+        logger.info(f"Iniciando scraping asíncrono de {max_pages} páginas (concurrencia {self.async_concurrency})")
         
-        return all_products
+        fetcher = self._get_async_fetcher()
+        urls = [self._build_page_url(search_term, page) for page in range(1, max_pages + 1)]
+        
+        for url, content in fetcher.iter_pages(urls):
+            if not content:
+                continue
+            try:
+                yield self._parse_page_products(content, products_per_page, search_term)
+            except Exception as e:
+                logger.warning(f"Error parseando página asíncrona {url}: {e}")
+    
+    def _get_async_fetcher(self):
+        """Devuelve el fetcher asíncrono del scraper (un cliente con pool por instancia)"""
+        if self._async_fetcher is None:
+            from .async_fetcher import AsyncPageFetcher
+            # aiohttp negocia su propia compresión
+            headers = {k: v for k, v in self.session.headers.items() if k.lower() != 'accept-encoding'}
+            self._async_fetcher = AsyncPageFetcher(
+                headers=headers,
+                concurrency=self.async_concurrency,
+                http_cache=self.http_cache,
+            )
+        return self._async_fetcher
+    
+    def close(self):
+        """Libera la sesión HTTP y el cliente asíncrono"""
+        if self._async_fetcher is not None:
+            self._async_fetcher.close()
+            self._async_fetcher = None
+        self.session.close()
+    
+    def _build_page_url(self, search_term: str, page: int) -> str:
+        """Construye la URL de búsqueda para una página"""
+        return f"{self.search_url}?SearchText={quote_plus(search_term)}&page={page}&shipCountry=ES&isFreeShip=y&isFastShip=y"
     
     def _scrape_single_page(self, search_term: str, page: int, products_per_page: int) -> List[Dict[str, Any]]:
         """
         Scraping de una sola página con selectores avanzados
         """
         # Construir URL con parámetros de página
-        url = f"{self.search_url}?SearchText={quote_plus(search_term)}&page={page}&shipCountry=ES&isFreeShip=y&isFastShip=y"
+        url = self._build_page_url(search_term, page)
         
         # Actualizar headers para esta petición
         self._update_headers()
@@ -383,12 +498,15 @@ class AdvancedAliExpressScraper:
         if not response:
             return []
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        return self._parse_page_products(response.content, products_per_page, search_term)
+    
+    def _parse_page_products(self, content: bytes, products_per_page: int, search_term: str) -> List[Dict[str, Any]]:
+        """Parsea el HTML de una página de resultados y extrae productos"""
+        # Solo se construyen los subárboles que pueden ser contenedores de producto
+        soup = parse_product_containers(content, self.advanced_selectors['product_containers'])
         
         # Extraer productos con selectores avanzados
-        products = self._extract_products_with_advanced_selectors(soup, products_per_page, search_term)
-        
-        return products
+        return self._extract_products_with_advanced_selectors(soup, products_per_page, search_term)
     
     def _make_request_with_smart_retry(self, url: str, max_retries: int = 3) -> Optional[requests.Response]:
         """
@@ -410,7 +528,8 @@ class AdvancedAliExpressScraper:
                     return response
                 elif response.status_code == 429:  # Rate limit
                     logger.warning(f"Rate limit detectado, esperando...")
-                    time.sleep(random.uniform(5, 10))
+                    # Retrasar a todos los procesos que comparten el host
+                    get_rate_limiter().penalize(url, random.uniform(5, 10))
                     continue
                 elif response.status_code in [403, 404]:
                     logger.warning(f"Error {response.status_code}, cambiando estrategia...")
@@ -438,23 +557,24 @@ class AdvancedAliExpressScraper:
         """
         products = []
         
-        # Probar selectores de contenedor en orden de prioridad
-        product_elements = []
-        for selector in self.advanced_selectors['product_containers']:
-            try:
-                elements = soup.select(selector)
-                if elements and len(elements) >= 5:  # Mínimo elementos significativos
-                    product_elements = elements
-                    logger.debug(f"Usando selector de contenedor: {selector} ({len(elements)} elementos)")
-                    break
-            except Exception as e:
-                logger.debug(f"Error con selector {selector}: {e}")
-                continue
+        # Probar selectores de contenedor (primero el que ganó la última vez en este layout)
+        selector, product_elements = select_containers(
+            soup,
+            self.advanced_selectors['product_containers'],
+            key=layout_key(self.search_url),
+            min_elements=5,  # Mínimo elementos significativos
+            cache=get_selector_cache(),
+        )
+        if selector:
+            logger.debug(f"Usando selector de contenedor: {selector} ({len(product_elements)} elementos)")
         
         if not product_elements:
             logger.warning("No se encontraron contenedores de productos con selectores avanzados")
             return []
         
+        # Todos los campos de cada tarjeta se resuelven con el plan compilado del layout
+        plan = self._get_extraction_plan(f"{layout_key(self.search_url)}|{selector}")
+        
         # Procesar elementos con mejor filtrado
         processed = 0
         for element in product_elements:
@@ -462,7 +582,7 @@ class AdvancedAliExpressScraper:
                 break
                 
             try:
-                product = self._extract_single_product_advanced(element, search_term)
+                product = self._extract_single_product_advanced(element, search_term, plan)
                 if product and self._validate_product_quality(product):
                     # Normalizar producto
                     normalized = self._normalize_product_advanced(product)
@@ -476,26 +596,69 @@ class AdvancedAliExpressScraper:
         logger.debug(f"Procesados {processed} elementos, extraídos {len(products)} productos válidos")
         return products
     
-    def _extract_single_product_advanced(self, element, search_term: str) -> Optional[Dict[str, Any]]:
+    def _extraction_fields(self) -> Dict[str, List[tuple]]:
+        """Candidatos (selector, atributo) de cada campo en orden de prioridad"""
+        selectors = self.advanced_selectors
+        return {
+            'title': [(s, 'text') for s in selectors['title_selectors']],
+            'price': [(s, 'text') for s in selectors['price_selectors']],
+            'url': [(s, 'href') for s in selectors['url_selectors']],
+            # src primero; data-src / data-original para imágenes lazy load
+            'image': [
+                (s, attribute)
+                for attribute in ('src', 'data-src', 'data-original')
+                for s in selectors['image_selectors']
+            ],
+            'rating': [(s, 'text') for s in selectors['rating_selectors']],
+        }
+    
+    def _get_extraction_plan(self, layout: str) -> ExtractionPlan:
+        """Plan compilado (y memorizado) para un layout"""
+        plan = self._extraction_plans.get(layout)
+        if plan is None:
+            plan = self._extraction_plans.setdefault(layout, ExtractionPlan(self._extraction_fields()))
+        return plan
+    
+    def _extract_fields_with_selectors(self, element) -> Dict[str, Optional[str]]:
+        """Resuelve los campos con un select_one por selector (sin plan compilado)"""
+        fields = {}
+        for name, candidates in self._extraction_fields().items():
+            fields[name] = None
+            for attribute in dict.fromkeys(attribute for _, attribute in candidates):
+                selectors = [s for s, a in candidates if a == attribute]
+                fields[name] = self._extract_with_selectors(element, selectors, attribute)
+                if fields[name]:
+                    break
+        return fields
+    
+    def _extract_single_product_advanced(
+        self, 
+        element, 
+        search_term: str, 
+        plan: Optional[ExtractionPlan] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Extracción avanzada de un solo producto con múltiples selectores
+        
+        Con ``plan`` todos los campos se resuelven en un único recorrido de la tarjeta.
         """
         product = {}
+        fields = plan.extract(element) if plan is not None else self._extract_fields_with_selectors(element)
         
         # Extraer título con múltiples selectores
-        title = self._extract_with_selectors(element, self.advanced_selectors['title_selectors'], 'text')
+        title = fields['title']
         if not title or len(title) < 10:
             return None
         product['title'] = title
         
         # Extraer precio con validación avanzada
-        price = self._extract_price_advanced(element)
+        price = self._extract_price_advanced(element, fields['price'])
         if not price or price <= 0:
             return None
         product['price'] = price
         
         # Extraer URL
-        url = self._extract_with_selectors(element, self.advanced_selectors['url_selectors'], 'href')
+        url = fields['url']
         if url:
             if url.startswith('//'):
                 url = 'https:' + url
@@ -503,20 +666,15 @@ class AdvancedAliExpressScraper:
                 url = self.base_url + url
             product['url'] = url
         
-        # Extraer imagen
-        image = self._extract_with_selectors(element, self.advanced_selectors['image_selectors'], 'src')
-        if not image:
-            # Intentar con data-src o data-original
-            image = self._extract_with_selectors(element, self.advanced_selectors['image_selectors'], 'data-src')
-            if not image:
-                image = self._extract_with_selectors(element, self.advanced_selectors['image_selectors'], 'data-original')
+        # Extraer imagen (src, data-src o data-original)
+        image = fields['image']
         
         if image and image.startswith('//'):
             image = 'https:' + image
         product['image'] = image
         
         # Extraer rating
-        rating = self._extract_rating_advanced(element)
+        rating = self._extract_rating_advanced(element, fields['rating'])
         product['rating'] = rating
         
         # Determinar categoría avanzada
@@ -551,13 +709,12 @@ class AdvancedAliExpressScraper:
         
         return None
     
-    def _extract_price_advanced(self, element) -> float:
+    def _extract_price_advanced(self, element, price_text: Optional[str] = None) -> float:
         """
         Extracción avanzada de precios con múltiples patrones
-        """
-        # Intentar con selectores específicos primero
-        price_text = self._extract_with_selectors(element, self.advanced_selectors['price_selectors'], 'text')
         
+        ``price_text`` es el texto ya resuelto por los selectores de precio, si lo hay.
+        """
         if not price_text:
             # Buscar cualquier texto que parezca un precio
             all_text = element.get_text()
@@ -588,13 +745,12 @@ class AdvancedAliExpressScraper:
         
         return 0.0
     
-    def _extract_rating_advanced(self, element) -> float:
+    def _extract_rating_advanced(self, element, rating_text: Optional[str] = None) -> float:
         """
         Extracción avanzada de ratings con múltiples patrones
-        """
-        # Intentar con selectores específicos
-        rating_text = self._extract_with_selectors(element, self.advanced_selectors['rating_selectors'], 'text')
         
+        ``rating_text`` es el texto ya resuelto por los selectores de rating, si lo hay.
+        """
         if not rating_text:
             # Buscar atributos data-rating
             rating_attr = element.get('data-rating')
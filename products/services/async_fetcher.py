@@ -0,0 +1,185 @@
+"""
+Motor de descarga asíncrono para el scraping de páginas de búsqueda
+Usa un único cliente aiohttp con pool de conexiones por scraper y backoff no bloqueante
+"""
+
+import asyncio
+import logging
+import random
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .rate_limiter import get_rate_limiter
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - dependencia opcional
+    aiohttp = None
+
+logger = logging.getLogger('products')
+
+
+class AsyncPageFetcher:
+    """
+    Descarga páginas de forma concurrente con asyncio
+
+    El fetcher mantiene su propio event loop y una sola ``ClientSession`` que se
+    reutiliza entre crawls, de modo que las conexiones keep-alive se comparten
+    entre todas las páginas de un mismo scraper.
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        concurrency: int = 8,
+        timeout: float = 20,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        rate_limiter=None,
+        http_cache=None,
+    ):
+        if aiohttp is None:
+            raise ImportError("aiohttp es requerido para engine='async' (pip install aiohttp)")
+
+        self.headers = dict(headers or {})
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+        self.max_retries = max(1, int(max_retries))
+        self.backoff_base = backoff_base
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        # DiskHTTPCache opcional compartida con la sesión síncrona del scraper
+        self.http_cache = http_cache
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session = None
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'failures': 0,
+        }
+
+    def iter_pages(self, urls: List[str]) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """
+        Descarga las URLs y las entrega según van terminando (no en orden)
+
+        Permite parsear y persistir la primera página sin esperar a las demás. Si
+        el consumidor deja de iterar, las descargas pendientes se cancelan.
+
+        Yields:
+            Tuple[str, Optional[bytes]]: (url, contenido); None si falló
+        """
+        if not urls:
+            return
+        loop = self._get_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(url: str) -> Tuple[str, Optional[bytes]]:
+            async with semaphore:
+                # La sesión se crea (una sola vez) dentro del loop en marcha
+                return url, await self._fetch_with_retry(self._get_session(), url)
+
+        pending = {loop.create_task(bounded(url)) for url in urls}
+        try:
+            while pending:
+                done, pending = loop.run_until_complete(
+                    asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            if pending:
+                for task in pending:
+                    task.cancel()
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+
+    def close(self):
+        """Cierra la sesión HTTP y el event loop propios"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        if self._session is not None and not self._session.closed:
+            self._loop.run_until_complete(self._session.close())
+        self._session = None
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):  # pragma: no cover - limpieza best-effort
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def _fetch_with_retry(self, session, url: str) -> Optional[bytes]:
+        """Petición con reintentos y backoff exponencial sin bloquear el loop"""
+        entry = self.http_cache.get(url) if self.http_cache is not None else None
+        if entry is not None and self.http_cache.is_fresh(entry):
+            self.http_cache.record('hits')
+            return entry['body']
+
+        request_headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                request_headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        for attempt in range(self.max_retries):
+            if attempt > 0:
+                self.stats['retries'] += 1
+                delay = random.uniform(self.backoff_base * 2 ** (attempt - 1), self.backoff_base * 2 ** attempt)
+                await asyncio.sleep(delay)
+
+            # Turno en el limitador compartido (con backend de cache hace E/S): se
+            # pide en un hilo y se espera sin bloquear el loop
+            wait = await asyncio.to_thread(self.rate_limiter.reserve, url)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            try:
+                self.stats['requests'] += 1
+                async with session.get(url, headers=request_headers) as response:
+                    if response.status == 304 and entry is not None:
+                        self.http_cache.record('revalidated')
+                        self.http_cache.refresh(url, entry, response.headers)
+                        return entry['body']
+                    if response.status == 200:
+                        body = await response.read()
+                        if self.http_cache is not None:
+                            self.http_cache.record('misses')
+                            self.http_cache.put(url, 200, response.headers, body)
+                        return body
+                    if response.status == 429:
+                        logger.warning(f"Rate limit detectado (async): {url}")
+                        await asyncio.to_thread(self.rate_limiter.penalize, url, self.backoff_base * 2 ** attempt)
+                        continue
+                    if response.status in (403, 404):
+                        logger.warning(f"Error {response.status} (async), reintentando: {url}")
+                        continue
+                    logger.warning(f"Estado HTTP {response.status} (async): {url}")
+            except asyncio.TimeoutError:
+                logger.warning(f"Timeout async en intento {attempt + 1}: {url}")
+            except aiohttp.ClientError as e:
+                logger.warning(f"Error async en intento {attempt + 1}: {e}")
+
+        self.stats['failures'] += 1
+        logger.error(f"Falló después de {self.max_retries} intentos (async): {url}")
+        return None
@@ -10,8 +10,9 @@ import random
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
 import requests
-from bs4 import BeautifulSoup
 from urllib.parse import quote_plus, urlencode
+from .http_cache import install_http_cache
+from .html_parser import parse_product_containers
 
 logger = logging.getLogger('bot_scraper')
 
@@ -26,6 +27,8 @@ class AliExpressBot:
         # Configurar sesión para simular navegador real
         self.session = requests.Session()
         self.setup_session()
+        # Cache HTTP en disco + rate limit compartido por host
+        install_http_cache(self.session)
         
         # URLs base de AliExpress
         self.base_url = "https://www.aliexpress.com"
@@ -145,8 +148,6 @@ class AliExpressBot:
                 else:
                     logger.warning(f"⚠️  Estado HTTP: {response.status_code}")
                 
-                time.sleep(self.delay_between_requests)
-                
             except Exception as e:
                 logger.warning(f"⚠️  Error en intento {retry + 1}: {e}")
                 time.sleep(self.delay_between_requests * 2)
@@ -161,7 +162,6 @@ class AliExpressBot:
     def _extract_products_from_page(self, html_content: bytes, search_term: str) -> List[Dict[str, Any]]:
         """Extrae productos de la página HTML de AliExpress"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
             products = []
             
             # Buscar contenedores de productos (múltiples selectores)
@@ -172,6 +172,8 @@ class AliExpressBot:
                 '.product-item',
                 'div[data-product-id]'
             ]
+            # Los enlaces a /item/ se conservan para el fallback por enlaces
+            soup = parse_product_containers(html_content, product_selectors + ['a[href*="/item/"]'])
             
             product_elements = []
             for selector in product_selectors:
@@ -0,0 +1,99 @@
+"""
+Sincronización de los rollups del catálogo con las escrituras de ``Product``
+
+Los rollups (``ProductDailyStats`` y ``ProductTermFrequency``) reflejan el catálogo actual:
+
+* La ingesta por lotes los escribe explícitamente (``bulk_create``/``bulk_update``
+  no emiten señales y emite su ``post_save`` con ``rollups_recorded=True``).
+* El resto de altas y ediciones (API, admin, ingesta fila a fila) y todos los
+  borrados (API, admin, retención, deduplicación) llegan por las señales de
+  ``products/signals.py``, dentro de la transacción de la escritura.
+* Los borrados por bloques se agrupan con ``collect_deletions()``: se descuentan
+  una vez al salir del bloque en lugar de producto a producto.
+
+Lo que modifique ``Product`` sin pasar por el modelo (``QuerySet.update``, SQL
+directo) lo corrige ``rebuild_catalog_rollups`` (cron diario).
+"""
+
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+
+from products.models import Product
+from products.services.daily_stats import (
+    ROLLUP_FIELDS, local_day, rebuild_daily_stats, record_created_products, refresh_daily_stats, stats_key,
+)
+from products.services.title_terms import (
+    apply_term_deltas, rebuild_title_terms, record_title_terms, term_deltas, title_change_deltas, title_terms,
+)
+
+logger = logging.getLogger('products')
+
+# Campos de Product de los que dependen los rollups
+ROLLUP_SOURCE_FIELDS = (*ROLLUP_FIELDS, 'title')
+
+_pending = threading.local()
+
+
+def rollup_values(product: Product) -> Product:
+    """Copia de los campos de los rollups (valores "antes" de una edición)"""
+    return Product(**{name: getattr(product, name) for name in ROLLUP_SOURCE_FIELDS})
+
+
+def record_products_added(products: Iterable[Product]) -> None:
+    products = list(products)
+    record_created_products(products)
+    record_title_terms(products)
+
+
+def record_product_changed(before: Product, after: Product) -> None:
+    """Ajusta los rollups a una edición (``before``: valores anteriores, ver ``rollup_values``)"""
+    if any(getattr(before, name) != getattr(after, name) for name in ROLLUP_FIELDS):
+        refresh_daily_stats({stats_key(before), stats_key(after)})
+    if title_terms(before.title) != title_terms(after.title) or local_day(before.created_at) != local_day(after.created_at):
+        apply_term_deltas(title_change_deltas(before, after))
+
+
+def record_products_removed(products: Iterable[Product]) -> None:
+    """Descuenta productos ya borrados: recalcula sus grupos desde ``Product`` y resta sus términos"""
+    products = list(products)
+    refresh_daily_stats({stats_key(product) for product in products})
+    deltas = Counter()
+    deltas.subtract(term_deltas(products))
+    apply_term_deltas(deltas)
+
+
+def record_product_deleted(product: Product) -> None:
+    """Borrado de un producto (``post_delete``): inmediato o diferido hasta el final del bloque"""
+    pending = getattr(_pending, 'products', None)
+    if pending is not None:
+        pending.append(product)
+    else:
+        record_products_removed([product])
+
+
+@contextmanager
+def collect_deletions():
+    """
+    Agrupa los borrados del bloque y ajusta los rollups una sola vez al salir
+
+    Usar dentro de la transacción del borrado: ``with transaction.atomic(), collect_deletions():``
+    """
+    if getattr(_pending, 'products', None) is not None:
+        yield
+        return
+    _pending.products = []
+    try:
+        yield
+        products: List[Product] = _pending.products
+    finally:
+        _pending.products = None
+    if products:
+        record_products_removed(products)
+
+
+def rebuild_catalog_rollups() -> Dict[str, Dict[str, int]]:
+    """Reconstruye todos los rollups desde ``Product``"""
+    return {'daily_stats': rebuild_daily_stats(), 'title_terms': rebuild_title_terms()}
@@ -0,0 +1,342 @@
+"""
+Instantánea columnar del catálogo en ficheros NumPy mapeados en memoria
+
+Muchas lecturas solo necesitan columnas numéricas. ``build_catalog_snapshot``
+(cron o comando ``build_catalog_snapshot``) las escribe periódicamente como
+ficheros ``.npy`` en ``CATALOG_SNAPSHOT_DIR``:
+
+* ``price`` en céntimos (int64), ``rating`` en centésimas (int16) y
+  ``shipping_time`` (int32), con ``-1`` para NULL;
+* ``category`` y ``platform`` codificados por diccionario (int32; los valores
+  están en ``manifest.json``) y ``created_at`` en microsegundos epoch (int64).
+
+Cada versión se escribe en su propio directorio y se publica reemplazando el
+fichero ``CURRENT`` (``os.replace``), así que nunca se lee una instantánea a
+medias. ``get_catalog_snapshot`` abre los ficheros con ``mmap_mode='r'``: todos
+los workers de gunicorn comparten las mismas páginas de solo lectura de la
+caché del sistema operativo, sin consultar la base de datos.
+
+``SnapshotQuery`` aplica los filtros de ``ProductFilter`` (salvo palabras clave,
+que necesitan el índice de texto completo) como máscaras vectorizadas y
+calcula conteos, estadísticas e histogramas. Requiere numpy (requirements.txt;
+se importa de forma opcional): sin él, o sin instantánea reciente, las lecturas van a la base de datos.
+"""
+
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from products.models import Product
+from products.services.daily_stats import day_start
+from products.services.filters import ProductFilter
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - dependencia opcional
+    numpy = None
+
+logger = logging.getLogger('products')
+
+SNAPSHOT_FORMAT = 1
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+NULL = -1
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Columna -> tipo NumPy
+COLUMNS = {
+    'id': 'int64',
+    'price': 'int64',
+    'rating': 'int16',
+    'shipping_time': 'int32',
+    'category': 'int32',
+    'platform': 'int32',
+    'created_at': 'int64',
+}
+# Escala de los campos numéricos guardados como enteros
+SCALES = {'price': 100, 'rating': 100, 'shipping_time': 1}
+
+_loaded: Dict[str, 'CatalogSnapshot'] = {}
+
+
+def snapshot_dir() -> Optional[Path]:
+    directory = getattr(settings, 'CATALOG_SNAPSHOT_DIR', '')
+    return Path(directory) if directory else None
+
+
+def _scaled(value, scale: int, rounding=ROUND_FLOOR) -> int:
+    return int((Decimal(str(value)) * scale).to_integral_value(rounding=rounding))
+
+
+def _epoch_us(value: datetime) -> int:
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+class _Dictionary:
+    """Codificación por diccionario (valor -> código consecutivo; None -> NULL)"""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, value: Optional[str]) -> int:
+        if value is None:
+            return NULL
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def _write_snapshot(staging: Path, version: str, built_at: datetime, chunk_size: int) -> int:
+    """Escribe columnas y manifiesto en ``staging``. Devuelve el número de filas."""
+    queryset = Product.objects.order_by()
+    max_id = queryset.aggregate(max_id=Max('id'))['max_id'] or 0
+    queryset = queryset.filter(id__lte=max_id)
+    capacity = queryset.count()
+    arrays = {
+        name: numpy.lib.format.open_memmap(staging / f'{name}.npy', mode='w+', dtype=dtype, shape=(capacity,))
+        for name, dtype in COLUMNS.items()
+    }
+    categories, platforms = _Dictionary(), _Dictionary()
+
+    rows, last_id = 0, 0
+    while rows < capacity:
+        chunk = list(
+            queryset.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'price', 'rating', 'shipping_time', 'category', 'source_platform', 'created_at')
+            [:min(chunk_size, capacity - rows)]
+        )
+        if not chunk:
+            break
+        end = rows + len(chunk)
+        arrays['id'][rows:end] = [row[0] for row in chunk]
+        arrays['price'][rows:end] = [_scaled(row[1], 100) for row in chunk]
+        arrays['rating'][rows:end] = [NULL if row[2] is None else _scaled(row[2], 100) for row in chunk]
+        arrays['shipping_time'][rows:end] = [NULL if row[3] is None else row[3] for row in chunk]
+        arrays['category'][rows:end] = [categories.encode(row[4]) for row in chunk]
+        arrays['platform'][rows:end] = [platforms.encode(row[5]) for row in chunk]
+        arrays['created_at'][rows:end] = [_epoch_us(row[6]) for row in chunk]
+        rows, last_id = end, chunk[-1][0]
+
+    for array in arrays.values():
+        array.flush()
+    del arrays
+
+    manifest = {
+        'format': SNAPSHOT_FORMAT,
+        'version': version,
+        'built_at': built_at.isoformat(),
+        'rows': rows,
+        'columns': COLUMNS,
+        'categories': categories.values,
+        'platforms': platforms.values,
+    }
+    (staging / MANIFEST_FILE).write_text(json.dumps(manifest), encoding='utf-8')
+    return rows
+
+
+def build_catalog_snapshot(
+    directory: Optional[Path] = None,
+    chunk_size: int = 5000,
+    keep: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Escribe una nueva instantánea y la publica como la actual
+
+    Recorre ``Product`` por bloques de id (sin cargar todo el catálogo en memoria)
+    hasta el mayor id existente al empezar.
+
+    Returns:
+        Dict: versión, filas y ruta de la instantánea
+    """
+    if numpy is None:
+        raise ValueError("La instantánea del catálogo requiere numpy (pip install numpy)")
+    directory = Path(directory) if directory else snapshot_dir()
+    if directory is None:
+        raise ValueError("CATALOG_SNAPSHOT_DIR no configurado")
+    keep = max(1, keep or getattr(settings, 'CATALOG_SNAPSHOT_KEEP', 2))
+    directory.mkdir(parents=True, exist_ok=True)
+
+    built_at = timezone.now()
+    version = f"snapshot-{built_at:%Y%m%dT%H%M%S%f}"
+    staging = directory / f'.{version}.tmp'
+    staging.mkdir()
+
+    try:
+        rows = _write_snapshot(staging, version, built_at, chunk_size)
+        # Publicar: renombrar el directorio y después el puntero (ambos atómicos)
+        target = directory / version
+        os.replace(staging, target)
+        pointer = directory / f'.{CURRENT_FILE}.tmp'
+        pointer.write_text(version, encoding='utf-8')
+        os.replace(pointer, directory / CURRENT_FILE)
+    except BaseException:
+        # Sin restos de una versión a medias (la actual sigue publicada)
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Los workers que aún tengan mapeada una versión borrada la siguen leyendo hasta recargar
+    for old in sorted(directory.glob('snapshot-*'))[:-keep]:
+        shutil.rmtree(old, ignore_errors=True)
+
+    logger.info(f"Instantánea del catálogo {version}: {rows} productos")
+    return {'version': version, 'rows': rows, 'path': str(target)}
+
+
+class CatalogSnapshot:
+    """Instantánea abierta en modo solo lectura (páginas compartidas entre procesos)"""
+
+    def __init__(self, path: Path):
+        manifest = json.loads((path / MANIFEST_FILE).read_text(encoding='utf-8'))
+        if manifest.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"Formato de instantánea no soportado: {manifest.get('format')}")
+        self.path = path
+        self.version = manifest['version']
+        self.rows = manifest['rows']
+        self.built_at = datetime.fromisoformat(manifest['built_at'])
+        self.categories: List[str] = manifest['categories']
+        self.platforms: List[str] = manifest['platforms']
+        self.columns = {
+            name: numpy.load(path / f'{name}.npy', mmap_mode='r')[:self.rows]
+            for name in COLUMNS
+        }
+
+    @property
+    def age(self) -> float:
+        return (timezone.now() - self.built_at).total_seconds()
+
+    def query(self, product_filter: Optional[ProductFilter] = None) -> Optional['SnapshotQuery']:
+        """Consulta con los filtros de ``product_filter``; ``None`` si alguno no se puede evaluar aquí"""
+        mask = numpy.ones(self.rows, dtype=bool)
+        for config in (product_filter.filters if product_filter else []):
+            condition = self._condition(config)
+            if condition is None:
+                return None
+            mask &= condition
+        return SnapshotQuery(self, mask)
+
+    def _condition(self, config: Dict[str, Any]):
+        columns = self.columns
+        kind = config['type']
+        if kind == 'price':
+            condition = numpy.ones(self.rows, dtype=bool)
+            if config['min_price'] is not None:
+                condition &= columns['price'] >= _scaled(config['min_price'], 100, ROUND_CEILING)
+            if config['max_price'] is not None:
+                condition &= columns['price'] <= _scaled(config['max_price'], 100, ROUND_FLOOR)
+            return condition
+        if kind == 'rating':
+            rating = columns['rating']
+            return (rating != NULL) & (rating >= _scaled(config['min_rating'], 100, ROUND_CEILING))
+        if kind == 'shipping_time':
+            shipping = columns['shipping_time']
+            return (shipping != NULL) & (shipping <= config['max_days'])
+        if kind == 'platform':
+            codes = [code for code, value in enumerate(self.platforms) if value in config['platforms']]
+            return numpy.isin(columns['platform'], codes)
+        if kind == 'category':
+            # icontains sobre el diccionario (pocos valores) en lugar de sobre cada fila
+            codes = [
+                code for code, value in enumerate(self.categories)
+                if any(category in value.lower() for category in config['categories'])
+            ]
+            return numpy.isin(columns['category'], codes)
+        return None
+
+
+class SnapshotQuery:
+    """Subconjunto de la instantánea (máscara booleana) con agregados vectorizados"""
+
+    def __init__(self, snapshot: CatalogSnapshot, mask):
+        self.snapshot = snapshot
+        self.mask = mask
+
+    def column(self, name: str):
+        return self.snapshot.columns[name][self.mask]
+
+    def count(self) -> int:
+        return int(numpy.count_nonzero(self.mask))
+
+    def ids(self) -> List[int]:
+        return self.column('id').tolist()
+
+    def created_between(self, start: datetime, end: Optional[datetime] = None) -> int:
+        created = self.column('created_at')
+        condition = created >= _epoch_us(start)
+        if end is not None:
+            condition &= created < _epoch_us(end)
+        return int(numpy.count_nonzero(condition))
+
+    def stats(self) -> Dict[str, Any]:
+        """Mismas claves que la acción ``stats`` de la API de productos"""
+        prices = self.column('price')
+        total = int(prices.size)
+        today = timezone.now().date()
+        platform_codes = numpy.unique(self.column('platform'))
+        category_codes = numpy.unique(self.column('category'))
+        return {
+            'total_products': total,
+            'average_price': Decimal(int(prices.sum())) / (100 * total) if total else 0,
+            'min_price': Decimal(int(prices.min())) / 100 if total else 0,
+            'max_price': Decimal(int(prices.max())) / 100 if total else 0,
+            'platforms': [self.snapshot.platforms[code] for code in platform_codes.tolist()],
+            'categories': [
+                self.snapshot.categories[code] for code in category_codes.tolist()
+                if code != NULL and self.snapshot.categories[code]
+            ],
+            'products_today': self.created_between(day_start(today), day_start(today + timedelta(days=1))),
+            'products_this_week': self.created_between(day_start(today - timedelta(days=7))),
+        }
+
+    def histogram(self, field: str, edges: Sequence) -> List[int]:
+        """Conteos por intervalo ``[edges[i], edges[i + 1])`` de un campo numérico"""
+        scale = SCALES[field]
+        values = self.column(field)
+        values = values[values != NULL]
+        scaled_edges = numpy.array([_scaled(edge, scale, ROUND_CEILING) for edge in edges], dtype='int64')
+        positions = numpy.searchsorted(scaled_edges, values, side='right') - 1
+        inside = positions[(positions >= 0) & (positions < len(edges) - 1)]
+        return numpy.bincount(inside, minlength=len(edges) - 1).tolist()
+
+
+def get_catalog_snapshot(max_age: Optional[float] = None) -> Optional[CatalogSnapshot]:
+    """
+    Instantánea actual de este proceso (se recarga cuando ``CURRENT`` cambia)
+
+    ``None`` sin numpy, sin ``CATALOG_SNAPSHOT_DIR``, sin instantánea publicada o
+    si es más antigua que ``CATALOG_SNAPSHOT_MAX_AGE`` segundos.
+    """
+    directory = snapshot_dir()
+    if numpy is None or directory is None:
+        return None
+    try:
+        current = (directory / CURRENT_FILE).read_text(encoding='utf-8').strip()
+    except OSError:
+        return None
+
+    snapshot = _loaded.get(str(directory))
+    if snapshot is None or snapshot.version != current:
+        try:
+            snapshot = CatalogSnapshot(directory / current)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Instantánea del catálogo no disponible ({current}): {e}")
+            return None
+        _loaded[str(directory)] = snapshot
+
+    max_age = getattr(settings, 'CATALOG_SNAPSHOT_MAX_AGE', 1800) if max_age is None else max_age
+    if snapshot.age > max_age:
+        return None
+    return snapshot
@@ -0,0 +1,228 @@
+"""
+Rollup diario de productos (ProductDailyStats)
+
+Refleja el catálogo actual y se escribe de forma incremental, dentro de la
+transacción de cada escritura:
+
+* Productos nuevos: ``record_created_products`` suma sus valores a la fila de
+  su (día, categoría, plataforma) — una lectura con bloqueo de las filas
+  afectadas y un ``bulk_update``/``bulk_create``, sin tocar ``Product``.
+* Productos actualizados o borrados: el mínimo/máximo no se puede "restar", así
+  que ``refresh_daily_stats`` recalcula desde ``Product`` solo los grupos tocados.
+
+La ingesta por lotes llama a estas funciones directamente; las altas, ediciones
+y borrados desde la API, el admin, la retención o la deduplicación llegan por
+señales (``services/catalog_rollups.py``). ``rebuild_daily_stats`` (comando
+``rebuild_daily_stats`` y cron diario) lo realinea con el catálogo y sirve de backfill.
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from products.models import Product, ProductDailyStats
+
+logger = logging.getLogger('products')
+
+StatsKey = Tuple[date, str, str]
+
+# Campos de Product que alteran el rollup al cambiar
+ROLLUP_FIELDS = ('created_at', 'category', 'source_platform', 'price', 'rating')
+STATS_FIELDS = ('product_count', 'price_sum', 'price_min', 'price_max', 'rating_sum', 'rating_count')
+
+
+def local_day(created_at: datetime) -> date:
+    """Día en la zona horaria local (el mismo que ``TruncDate``)"""
+    return timezone.localtime(created_at).date() if timezone.is_aware(created_at) else created_at.date()
+
+
+def stats_key(product: Product) -> StatsKey:
+    """(día local de creación, categoría, plataforma) de un producto"""
+    return local_day(product.created_at), product.category or '', product.source_platform
+
+
+def day_start(day: date) -> datetime:
+    """Medianoche local de ``day`` (los rangos por ``created_at`` usan su índice; ``__date`` no)"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _empty_row(key: StatsKey) -> ProductDailyStats:
+    day, category, platform = key
+    return ProductDailyStats(date=day, category=category, source_platform=platform)
+
+
+def _lock_rows(keys: Set[StatsKey]) -> Dict[StatsKey, ProductDailyStats]:
+    """Filas existentes de ``keys`` bloqueadas hasta el final de la transacción"""
+    rows = ProductDailyStats.objects.select_for_update().filter(
+        date__in={key[0] for key in keys},
+        category__in={key[1] for key in keys},
+        source_platform__in={key[2] for key in keys},
+    )
+    return {
+        key: row for row in rows
+        if (key := (row.date, row.category, row.source_platform)) in keys
+    }
+
+
+def _save_rows(rows: Iterable[ProductDailyStats], fields) -> None:
+    new_rows, existing_rows = [], []
+    for row in rows:
+        (existing_rows if row.pk else new_rows).append(row)
+    if existing_rows:
+        ProductDailyStats.objects.bulk_update(existing_rows, fields)
+    if new_rows:
+        ProductDailyStats.objects.bulk_create(new_rows)
+
+
+def record_created_products(products: Iterable[Product]) -> int:
+    """Suma los productos nuevos al rollup. Devuelve el número de filas tocadas."""
+    deltas: Dict[StatsKey, ProductDailyStats] = {}
+    for product in products:
+        if product.pk is None or product.price is None:
+            continue
+        key = stats_key(product)
+        delta = deltas.setdefault(key, _empty_row(key))
+        price = Decimal(product.price)
+        delta.product_count += 1
+        delta.price_sum += price
+        delta.price_min = price if delta.price_min is None else min(delta.price_min, price)
+        delta.price_max = price if delta.price_max is None else max(delta.price_max, price)
+        if product.rating is not None:
+            delta.rating_sum += Decimal(product.rating)
+            delta.rating_count += 1
+    if not deltas:
+        return 0
+
+    with transaction.atomic():
+        rows = _lock_rows(set(deltas))
+        for key, delta in deltas.items():
+            row = rows.get(key)
+            if row is None:
+                rows[key] = delta
+                continue
+            row.product_count += delta.product_count
+            row.price_sum += delta.price_sum
+            row.rating_sum += delta.rating_sum
+            row.rating_count += delta.rating_count
+            row.price_min = delta.price_min if row.price_min is None else min(row.price_min, delta.price_min)
+            row.price_max = delta.price_max if row.price_max is None else max(row.price_max, delta.price_max)
+        _save_rows(rows.values(), STATS_FIELDS)
+    return len(deltas)
+
+
+def aggregate_products(queryset) -> Iterable[Dict[str, Any]]:
+    """Agrupa productos como las filas del rollup (una fila por día, categoría y plataforma)"""
+    return (
+        queryset
+        .annotate(day=TruncDate('created_at'), group_category=Coalesce('category', Value('')))
+        .values('day', 'group_category', 'source_platform')
+        .annotate(
+            product_count=Count('id'),
+            price_sum=Sum('price'),
+            price_min=Min('price'),
+            price_max=Max('price'),
+            rating_sum=Sum('rating'),
+            rating_count=Count('rating'),
+        )
+        .order_by()
+    )
+
+
+def _row_from_group(group: Dict[str, Any]) -> ProductDailyStats:
+    return ProductDailyStats(
+        date=group['day'],
+        category=group['group_category'],
+        source_platform=group['source_platform'],
+        product_count=group['product_count'],
+        price_sum=group['price_sum'] or 0,
+        price_min=group['price_min'],
+        price_max=group['price_max'],
+        rating_sum=group['rating_sum'] or 0,
+        rating_count=group['rating_count'],
+    )
+
+
+def _key_filter(key: StatsKey) -> Q:
+    day, category, platform = key
+    category_q = Q(category=category) if category else Q(category='') | Q(category__isnull=True)
+    day_q = Q(created_at__gte=day_start(day), created_at__lt=day_start(day + timedelta(days=1)))
+    return day_q & Q(source_platform=platform) & category_q
+
+
+def refresh_daily_stats(keys: Iterable[StatsKey], chunk_size: int = 100) -> int:
+    """Recalcula desde ``Product`` los grupos indicados (y borra los que quedaron vacíos)"""
+    keys = sorted(set(keys))
+    if not keys:
+        return 0
+
+    with transaction.atomic():
+        # Por tramos: un OR por grupo, acotado por el límite de profundidad de expresiones de SQLite
+        for start in range(0, len(keys), chunk_size):
+            _refresh_groups(set(keys[start:start + chunk_size]))
+    return len(keys)
+
+
+def _refresh_groups(keys: Set[StatsKey]) -> None:
+    condition = Q()
+    for key in keys:
+        condition |= _key_filter(key)
+    rows = _lock_rows(keys)
+    fresh = {
+        (group['day'], group['group_category'], group['source_platform']): group
+        for group in aggregate_products(Product.objects.filter(condition))
+    }
+    for key in keys:
+        row, group = rows.get(key), fresh.get(key)
+        if group is None:
+            if row is not None:
+                row.delete()
+                del rows[key]
+            continue
+        refreshed = _row_from_group(group)
+        refreshed.pk = row.pk if row is not None else None
+        rows[key] = refreshed
+    _save_rows(rows.values(), STATS_FIELDS)
+
+
+def rebuild_daily_stats(since: Optional[date] = None, batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Reconstruye el rollup desde ``Product`` (desde ``since`` o completo) en una transacción
+
+    Returns:
+        Dict: filas borradas y creadas
+    """
+    products = Product.objects.all()
+    existing = ProductDailyStats.objects.all()
+    if since is not None:
+        products = products.filter(created_at__gte=day_start(since))
+        existing = existing.filter(date__gte=since)
+
+    with transaction.atomic():
+        deleted, _ = existing.delete()
+        rows = ProductDailyStats.objects.bulk_create(
+            (_row_from_group(group) for group in aggregate_products(products).iterator()),
+            batch_size=batch_size,
+        )
+    logger.info(f"Rollup diario reconstruido desde {since or 'el inicio'}: {len(rows)} filas ({deleted} borradas)")
+    return {'deleted': deleted, 'created': len(rows)}
+
+
+def daily_totals(since: date, by: Tuple[str, ...] = ('date',)):
+    """Filas del rollup desde ``since`` sumadas por ``by`` (``count``, ``price_sum``, ``rating_sum``, ``rating_count``)"""
+    return (
+        ProductDailyStats.objects.filter(date__gte=since)
+        .values(*by)
+        .annotate(
+            count=Sum('product_count'),
+            price_sum=Sum('price_sum'),
+            rating_sum=Sum('rating_sum'),
+            rating_count=Sum('rating_count'),
+        )
+        .order_by(*by)
+    )
@@ -0,0 +1,186 @@
+"""
+Planes de extracción compilados para tarjetas de producto
+
+En lugar de lanzar un ``select_one`` por cada selector candidato de cada campo
+(título, precio, URL, imagen, rating), el plan compila todos los selectores una
+vez y resuelve todos los campos en un único recorrido del subárbol de la tarjeta.
+Además memoriza, por campo, el primer selector que funcionó: en las tarjetas
+siguientes del mismo layout solo se comprueban esos selectores y el resto se
+evalúa únicamente si alguno falla. Los campos que el layout no tiene (ningún
+candidato casa en varias tarjetas seguidas) se dejan de buscar y solo se
+vuelven a probar cada ``REPROBE_EVERY`` tarjetas.
+
+La semántica de cada candidato es la de ``_extract_with_selectors``: cuenta la
+primera coincidencia del selector en orden de documento; si su valor no es
+válido se pasa al siguiente candidato.
+"""
+
+import logging
+import re
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import soupsieve
+from bs4 import Tag
+
+logger = logging.getLogger('products')
+
+# Etiqueta del último compuesto del selector ('h3 a[href]' -> 'a', '.title' -> None)
+_LEADING_TAG = re.compile(r'^[a-zA-Z][\w-]*')
+
+# Tarjetas seguidas sin el campo para darlo por ausente, y cada cuántas se reintenta
+ABSENT_AFTER = 3
+REPROBE_EVERY = 25
+
+Candidate = Tuple[str, str]  # (selector, atributo | 'text')
+
+
+def rightmost_tag(selector: str) -> Optional[str]:
+    """Nombre de etiqueta exigido por el último compuesto del selector, si lo hay"""
+    depth = 0
+    quote = None
+    start = 0
+    for i, char in enumerate(selector):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char in '[(':
+            depth += 1
+        elif char in '])':
+            depth -= 1
+        elif depth == 0 and (char.isspace() or char in '>+~'):
+            start = i + 1
+        elif depth == 0 and char == ',':
+            return None  # listas de selectores: sin filtro por etiqueta
+    match = _LEADING_TAG.match(selector[start:].strip())
+    return match.group(0).lower() if match else None
+
+
+def candidate_value(tag: Tag, attribute: str) -> Optional[str]:
+    """Valor de un candidato o None si no es válido"""
+    if attribute == 'text':
+        text = tag.get_text(strip=True)
+        return text if text and len(text) > 2 else None
+    value = tag.get(attribute)
+    if isinstance(value, list):
+        value = ' '.join(value)
+    if value and value.strip():
+        return value.strip()
+    return None
+
+
+class ExtractionPlan:
+    """Plan compilado para un conjunto de campos con sus candidatos en orden de prioridad"""
+
+    def __init__(self, fields: Dict[str, Sequence[Candidate]]):
+        self.fields = {name: list(candidates) for name, candidates in fields.items()}
+        self._compiled = {}
+        self._tag_index: Dict[Optional[str], List[str]] = {}
+        for candidates in self.fields.values():
+            for selector, _ in candidates:
+                if selector in self._compiled:
+                    continue
+                try:
+                    self._compiled[selector] = soupsieve.compile(selector)
+                except Exception as e:
+                    logger.debug(f"Selector no válido en plan de extracción {selector}: {e}")
+                    self._compiled[selector] = None
+                    continue
+                self._tag_index.setdefault(rightmost_tag(selector), []).append(selector)
+        self._unions: Dict[frozenset, soupsieve.SoupSieve] = {}
+        self._memo: Dict[str, int] = {}
+        self._absent: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {'cards': 0, 'fast_path': 0, 'full_walks': 0}
+
+    def _union(self, selectors) -> soupsieve.SoupSieve:
+        """Selector lista 'a, b, c' compilado (cacheado) para recorrer la tarjeta una sola vez"""
+        key = frozenset(selectors)
+        union = self._unions.get(key)
+        if union is None:
+            union = self._unions.setdefault(key, soupsieve.compile(', '.join(sorted(key))))
+        return union
+
+    def _first_matches(self, element: Tag, selectors) -> Dict[str, Tag]:
+        """Primera coincidencia (orden de documento) de cada selector en un único recorrido"""
+        pending = {s for s in selectors if self._compiled.get(s)}
+        found = {}
+        if not pending:
+            return found
+        # El recorrido lo hace la lista compilada; solo las etiquetas que casan con
+        # alguno de los selectores se comprueban después uno a uno
+        for node in self._union(pending).iselect(element):
+            for selector in self._tag_index.get(node.name, []) + self._tag_index.get(None, []):
+                if selector in pending and self._compiled[selector].match(node):
+                    found[selector] = node
+                    pending.discard(selector)
+            if not pending:
+                break
+        return found
+
+    def extract(self, element: Tag) -> Dict[str, Optional[str]]:
+        """Resuelve todos los campos de una tarjeta"""
+        result: Dict[str, Optional[str]] = {name: None for name in self.fields}
+        with self._lock:
+            memo = dict(self._memo)
+            self.stats['cards'] += 1
+            reprobe = self.stats['cards'] % REPROBE_EVERY == 0
+            absent = set() if reprobe else {
+                name for name, misses in self._absent.items() if misses >= ABSENT_AFTER
+            }
+
+        # 1) Camino rápido: solo el candidato memorizado de cada campo
+        unresolved = [name for name in self.fields if name not in memo and name not in absent]
+        memo_candidates = {name: self.fields[name][index] for name, index in memo.items()}
+        if memo_candidates:
+            matches = self._first_matches(element, {selector for selector, _ in memo_candidates.values()})
+            for name, (selector, attribute) in memo_candidates.items():
+                tag = matches.get(selector)
+                value = candidate_value(tag, attribute) if tag is not None else None
+                if value is None:
+                    unresolved.append(name)
+                else:
+                    result[name] = value
+        if not unresolved:
+            with self._lock:
+                self.stats['fast_path'] += 1
+            return result
+
+        # 2) Recorrido completo con todos los candidatos de los campos pendientes
+        selectors = {selector for name in unresolved for selector, _ in self.fields[name]}
+        matches = self._first_matches(element, selectors)
+        learned = {}
+        missing = []
+        for name in unresolved:
+            for index, (selector, attribute) in enumerate(self.fields[name]):
+                tag = matches.get(selector)
+                if tag is None:
+                    continue
+                value = candidate_value(tag, attribute)
+                if value is not None:
+                    result[name] = value
+                    learned[name] = index
+                    break
+            else:
+                missing.append(name)
+        with self._lock:
+            self.stats['full_walks'] += 1
+            self._memo.update(learned)
+            for name in learned:
+                self._absent.pop(name, None)
+            for name in missing:
+                self._absent[name] = self._absent.get(name, 0) + 1
+        return result
+
+    def memoized(self) -> Dict[str, Candidate]:
+        """Candidato memorizado por campo"""
+        with self._lock:
+            return {name: self.fields[name][index] for name, index in self._memo.items()}
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats['fast_path_rate'] = round(stats['fast_path'] / stats['cards'], 4) if stats['cards'] else 0.0
+        return stats
@@ -8,6 +8,7 @@ from typing import List, Dict, Any, Optional
 from decimal import Decimal
 from django.db.models import QuerySet
 from products.models import Product
+from products.services.search import phrase_matches, search_phrases
 
 logger = logging.getLogger('products')
 
@@ -156,29 +157,16 @@ class ProductFilter:
                 queryset = queryset.filter(price__lte=filter_config['max_price'])
         
         elif filter_type == 'keywords':
-            keywords = filter_config['keywords']
-            search_in_title = filter_config['search_in_title']
-            search_in_category = filter_config['search_in_category']
-            
-            if search_in_title and search_in_category:
-                # Buscar en título O categoría
-                from django.db.models import Q
-                keyword_q = Q()
-                for keyword in keywords:
-                    keyword_q |= Q(title__icontains=keyword) | Q(category__icontains=keyword)
-                queryset = queryset.filter(keyword_q)
-            elif search_in_title:
-                from django.db.models import Q
-                keyword_q = Q()
-                for keyword in keywords:
-                    keyword_q |= Q(title__icontains=keyword)
-                queryset = queryset.filter(keyword_q)
-            elif search_in_category:
-                from django.db.models import Q
-                keyword_q = Q()
-                for keyword in keywords:
-                    keyword_q |= Q(category__icontains=keyword)
-                queryset = queryset.filter(keyword_q)
+            # Alguna de las palabras clave (cada una como frase: sus términos seguidos),
+            # por el índice de texto completo (services.search)
+            fields = [
+                field for field, enabled in (
+                    ('title', filter_config['search_in_title']),
+                    ('category', filter_config['search_in_category']),
+                ) if enabled
+            ]
+            if fields:
+                queryset = search_phrases(queryset, filter_config['keywords'], fields=fields)
         
         elif filter_type == 'shipping_time':
             queryset = queryset.filter(shipping_time__lte=filter_config['max_days'])
@@ -215,15 +203,16 @@ class ProductFilter:
             search_in_title = filter_config['search_in_title']
             search_in_category = filter_config['search_in_category']
             
-            title = product.get('title', '').lower()
-            category = product.get('category', '').lower()
+            title = product.get('title') or ''
+            category = product.get('category') or ''
             
+            # Misma regla que la búsqueda en base de datos (services.search.phrase_matches)
             found_keyword = False
             for keyword in keywords:
-                if search_in_title and keyword in title:
+                if search_in_title and phrase_matches(title, keyword):
                     found_keyword = True
                     break
-                if search_in_category and keyword in category:
+                if search_in_category and phrase_matches(category, keyword):
                     found_keyword = True
                     break
             
@@ -0,0 +1,173 @@
+"""
+Histogramas de campos numéricos de productos
+
+Todos los histogramas pedidos se calculan en una sola consulta: cada intervalo
+``[a, b)`` es un ``Count('id', filter=Q(campo__gte=a, campo__lt=b))`` dentro del
+mismo ``aggregate()``, de modo que la tabla se recorre una vez sea cual sea el
+número de histogramas o de intervalos.
+
+Con ``HISTOGRAM_ENGINE=numpy`` (y numpy instalado) los campos se leen con un
+único ``values_list`` y se cuentan con ``numpy.searchsorted`` en memoria; puede
+compensar en SQLite con muchos histogramas de muchos intervalos.
+
+Con ``HISTOGRAM_ENGINE=snapshot`` los histogramas de todo el catálogo se cuentan
+sobre la instantánea columnar (``services/catalog_snapshot.py``) sin consultar
+la base de datos; con un queryset filtrado o sin instantánea reciente se usa SQL.
+"""
+
+import logging
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db.models import Count, Q, QuerySet
+
+from products.models import Product
+from products.services.catalog_snapshot import get_catalog_snapshot
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - dependencia opcional
+    numpy = None
+
+logger = logging.getLogger('products')
+
+HISTOGRAM_FIELDS = ('price', 'rating', 'shipping_time')
+HISTOGRAM_ENGINES = ('sql', 'numpy', 'snapshot')
+MAX_BUCKETS = 50
+# Límites de los histogramas pedidos en una sola petición (cada intervalo es un agregado)
+MAX_CUSTOM_HISTOGRAMS = 10
+MAX_TOTAL_BUCKETS = 200
+
+
+@dataclass(frozen=True)
+class Histogram:
+    """Histograma de ``field`` con intervalos ``[edges[i], edges[i + 1])``"""
+
+    name: str
+    field: str
+    edges: Tuple[Decimal, ...]
+    labels: Optional[Tuple[str, ...]] = None
+
+    def __post_init__(self):
+        if self.field not in HISTOGRAM_FIELDS:
+            raise ValueError(f"Campo no soportado: {self.field} (usar {', '.join(HISTOGRAM_FIELDS)})")
+        if len(self.edges) < 2:
+            raise ValueError(f"{self.name}: se necesitan al menos dos límites")
+        if len(self.edges) - 1 > MAX_BUCKETS:
+            raise ValueError(f"{self.name}: máximo {MAX_BUCKETS} intervalos")
+        if any(low >= high for low, high in self.buckets):
+            raise ValueError(f"{self.name}: los límites deben ser crecientes")
+        if self.labels is not None and len(self.labels) != len(self.edges) - 1:
+            raise ValueError(f"{self.name}: una etiqueta por intervalo")
+
+    @property
+    def buckets(self) -> List[Tuple[Decimal, Decimal]]:
+        return list(zip(self.edges, self.edges[1:]))
+
+    def label(self, index: int) -> str:
+        if self.labels:
+            return self.labels[index]
+        low, high = self.buckets[index]
+        return f'{low}-{high}'
+
+
+def parse_histogram(spec: str) -> Histogram:
+    """``"campo:l0,l1,...,ln"`` (p. ej. ``price:0,5,10,50``) → Histogram"""
+    field, _, edges = spec.partition(':')
+    try:
+        values = tuple(Decimal(edge.strip()) for edge in edges.split(',') if edge.strip())
+    except InvalidOperation:
+        raise ValueError(f"Límites inválidos en '{spec}' (usar campo:l0,l1,...)")
+    if any(not value.is_finite() for value in values):
+        raise ValueError(f"Límites inválidos en '{spec}'")
+    return Histogram(name=spec, field=field.strip(), edges=values)
+
+
+def parse_histograms(specs: Sequence[str]) -> List[Histogram]:
+    """Varios ``parse_histogram`` (sin repetidos) con límite de histogramas y de intervalos totales"""
+    specs = list(dict.fromkeys(specs))
+    if len(specs) > MAX_CUSTOM_HISTOGRAMS:
+        raise ValueError(f"Máximo {MAX_CUSTOM_HISTOGRAMS} histogramas por petición")
+    histograms = [parse_histogram(spec) for spec in specs]
+    if sum(len(histogram.buckets) for histogram in histograms) > MAX_TOTAL_BUCKETS:
+        raise ValueError(f"Máximo {MAX_TOTAL_BUCKETS} intervalos en total por petición")
+    return histograms
+
+
+def _sql_counts(queryset: QuerySet, histograms: Sequence[Histogram]) -> Dict[str, List[int]]:
+    aggregates = {}
+    for h, histogram in enumerate(histograms):
+        for b, (low, high) in enumerate(histogram.buckets):
+            aggregates[f'h{h}_{b}'] = Count(
+                'id', filter=Q(**{f'{histogram.field}__gte': low, f'{histogram.field}__lt': high})
+            )
+    result = queryset.order_by().aggregate(**aggregates)
+    return {
+        histogram.name: [result[f'h{h}_{b}'] for b in range(len(histogram.buckets))]
+        for h, histogram in enumerate(histograms)
+    }
+
+
+def _numpy_counts(queryset: QuerySet, histograms: Sequence[Histogram]) -> Dict[str, List[int]]:
+    fields = sorted({histogram.field for histogram in histograms})
+    rows = queryset.order_by().values_list(*fields)
+    columns = dict(zip(fields, zip(*rows))) if rows else {field: () for field in fields}
+    values = {
+        field: numpy.array([float(value) for value in column if value is not None], dtype=float)
+        for field, column in columns.items()
+    }
+    counts = {}
+    for histogram in histograms:
+        edges = numpy.array([float(edge) for edge in histogram.edges])
+        positions = numpy.searchsorted(edges, values[histogram.field], side='right') - 1
+        inside = positions[(positions >= 0) & (positions < len(edges) - 1)]
+        counts[histogram.name] = numpy.bincount(inside, minlength=len(edges) - 1).tolist()
+    return counts
+
+
+def _snapshot_counts(queryset: QuerySet, histograms: Sequence[Histogram]) -> Optional[Dict[str, List[int]]]:
+    # La instantánea cubre el catálogo completo: solo sirve para querysets sin filtrar
+    if queryset.model is not Product or queryset.query.where:
+        return None
+    snapshot = get_catalog_snapshot()
+    if snapshot is None:
+        return None
+    query = snapshot.query()
+    return {histogram.name: query.histogram(histogram.field, histogram.edges) for histogram in histograms}
+
+
+def compute_histograms(
+    queryset: QuerySet,
+    histograms: Iterable[Histogram],
+    engine: Optional[str] = None
+) -> Dict[str, List[Dict]]:
+    """
+    Calcula los histogramas sobre ``queryset`` en una sola consulta
+
+    Returns:
+        Dict: por nombre, lista de ``{'range', 'min', 'max', 'count'}``
+    """
+    histograms = list(histograms)
+    if not histograms:
+        return {}
+    engine = engine or getattr(settings, 'HISTOGRAM_ENGINE', 'sql')
+    if engine not in HISTOGRAM_ENGINES:
+        raise ValueError(f"Motor de histogramas no soportado: {engine}")
+    if engine == 'numpy' and numpy is None:
+        logger.warning("HISTOGRAM_ENGINE=numpy sin numpy instalado; se usa SQL")
+        engine = 'sql'
+
+    counts = None
+    if engine == 'snapshot':
+        counts = _snapshot_counts(queryset, histograms)
+    if counts is None:
+        counts = (_numpy_counts if engine == 'numpy' else _sql_counts)(queryset, histograms)
+    return {
+        histogram.name: [
+            {'range': histogram.label(index), 'min': low, 'max': high, 'count': counts[histogram.name][index]}
+            for index, (low, high) in enumerate(histogram.buckets)
+        ]
+        for histogram in histograms
+    }
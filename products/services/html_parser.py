@@ -0,0 +1,169 @@
+"""
+Parseo de HTML para los scrapers
+
+Centraliza la creación de ``BeautifulSoup`` para poder elegir el backend
+(``lxml`` por defecto, ``html.parser`` como alternativa pura Python) y, cuando
+solo interesan los contenedores de producto, construir únicamente esos
+subárboles con un ``SoupStrainer`` en lugar del DOM completo.
+"""
+
+import logging
+import re
+from typing import Iterable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+
+logger = logging.getLogger('products')
+
+PARSER_BACKENDS = ('lxml', 'html.parser')
+DEFAULT_BACKEND = 'lxml'
+
+# Selector simple: etiqueta opcional, clases y atributos ([a], [a="v"], [a*="v"], ...)
+_SIMPLE_SELECTOR = re.compile(r'^(?P<tag>[a-zA-Z][\w-]*)?(?P<rest>(?:\.[\w-]+|\[[^\]]+\])*)$')
+_CLASS_OR_ATTR = re.compile(r'\.(?P<cls>[\w-]+)|\[(?P<attr>[\w-]+)\s*(?:(?P<op>[~|^$*]?=)\s*["\']?(?P<value>[^"\'\]]*)["\']?)?\s*\]')
+# Pseudo-clases que solo restringen: quitarlas da un superconjunto del selector
+_PSEUDO = re.compile(r':(?:has|not|nth-[\w-]+|first-child|last-child)(?:\((?:[^()]|\([^()]*\))*\))?')
+
+_unavailable_backends = set()
+
+
+def get_parser_backend(backend: Optional[str] = None) -> str:
+    """Backend configurado (settings.SCRAPER_HTML_PARSER) con fallback a html.parser"""
+    if backend is None:
+        backend = DEFAULT_BACKEND
+        try:
+            from django.conf import settings
+            if settings.configured:
+                backend = getattr(settings, 'SCRAPER_HTML_PARSER', DEFAULT_BACKEND)
+        except ImportError:  # pragma: no cover - uso fuera de Django
+            pass
+    if backend not in PARSER_BACKENDS:
+        logger.warning(f"Backend de parseo desconocido '{backend}', usando html.parser")
+        return 'html.parser'
+    if backend in _unavailable_backends:
+        return 'html.parser'
+    return backend
+
+
+def strainer_enabled() -> bool:
+    """Indica si está activo el parseo parcial de contenedores (settings.SCRAPER_HTML_STRAINER)"""
+    try:
+        from django.conf import settings
+        if settings.configured:
+            return bool(getattr(settings, 'SCRAPER_HTML_STRAINER', True))
+    except ImportError:  # pragma: no cover - uso fuera de Django
+        pass
+    return True
+
+
+class ContainerStrainer(SoupStrainer):
+    """
+    SoupStrainer que conserva solo los elementos que casan con alguno de los
+    selectores simples dados (y todo su subárbol)
+
+    BeautifulSoup solo consulta el filtro para etiquetas de primer nivel: una vez
+    aceptado un contenedor, todos sus descendientes se construyen normalmente.
+    """
+
+    def __init__(self, rules: List[Tuple[Optional[str], List[Tuple[str, str, Optional[str]]]]]):
+        super().__init__()
+        self.rules = rules
+
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        attrs = attrs or {}
+        return any(_rule_matches(rule, name, attrs) for rule in self.rules)
+
+    def allow_string_creation(self, string: str) -> bool:
+        return False
+
+    def __repr__(self):
+        return f"<ContainerStrainer {len(self.rules)} reglas>"
+
+
+def _rule_matches(rule, name: str, attrs) -> bool:
+    tag, conditions = rule
+    if tag and tag != name:
+        return False
+    for attr, op, value in conditions:
+        actual = attrs.get(attr)
+        if actual is None:
+            return False
+        if isinstance(actual, (list, tuple)):
+            actual = ' '.join(actual)
+        if op == '' or value is None:
+            continue
+        if op == '~=' and value not in actual.split():
+            return False
+        if op == '=' and actual != value:
+            return False
+        if op == '*=' and value not in actual:
+            return False
+        if op == '^=' and not actual.startswith(value):
+            return False
+        if op == '$=' and not actual.endswith(value):
+            return False
+        if op == '|=' and not (actual == value or actual.startswith(value + '-')):
+            return False
+    return True
+
+
+def _parse_simple_selector(selector: str):
+    """Convierte un selector simple en regla; None si no se puede expresar"""
+    selector = _PSEUDO.sub('', selector.strip())
+    match = _SIMPLE_SELECTOR.match(selector)
+    if not selector or not match:
+        return None
+    tag = match.group('tag')
+    conditions = []
+    for part in _CLASS_OR_ATTR.finditer(match.group('rest')):
+        if part.group('cls'):
+            conditions.append(('class', '~=', part.group('cls')))
+        else:
+            conditions.append((part.group('attr'), part.group('op') or '', part.group('value')))
+    if tag is None and not conditions:
+        return None
+    return tag.lower() if tag else None, conditions
+
+
+def build_container_strainer(selectors: Iterable[str]) -> Optional[ContainerStrainer]:
+    """
+    Construye un filtro que conserva cualquier elemento que pueda casar con los selectores
+
+    Las pseudo-clases restrictivas (``:has``, ``:not``...) se ignoran, porque el
+    resultado es un superconjunto y el ``select`` posterior filtra igual. Si algún
+    selector depende de sus ancestros (combinadores, listas) no hay filtro seguro
+    y se devuelve None para parsear el documento completo.
+    """
+    rules = []
+    for selector in selectors:
+        rule = _parse_simple_selector(selector)
+        if rule is None:
+            logger.debug(f"Selector no compatible con parseo parcial: {selector}")
+            return None
+        rules.append(rule)
+    return ContainerStrainer(rules) if rules else None
+
+
+def parse_html(content, backend: Optional[str] = None, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Crea el BeautifulSoup con el backend configurado"""
+    backend = get_parser_backend(backend)
+    try:
+        return BeautifulSoup(content, backend, parse_only=parse_only)
+    except FeatureNotFound:
+        logger.warning(f"Backend de parseo '{backend}' no instalado, usando html.parser")
+        _unavailable_backends.add(backend)
+        return BeautifulSoup(content, 'html.parser', parse_only=parse_only)
+
+
+def parse_product_containers(content, selectors: Iterable[str], backend: Optional[str] = None,
+                             strain: Optional[bool] = None) -> BeautifulSoup:
+    """
+    Parsea solo los subárboles que pueden ser contenedores de producto
+
+    ``soup.select(selector)`` sobre el resultado devuelve los mismos elementos que
+    sobre el documento completo para cualquiera de los ``selectors``.
+    """
+    if strain is None:
+        strain = strainer_enabled()
+    strainer = build_container_strainer(selectors) if strain else None
+    return parse_html(content, backend=backend, parse_only=strainer)
@@ -0,0 +1,334 @@
+"""
+Cache HTTP en disco para las páginas de búsqueda de los scrapers
+
+Se monta como adaptador de ``requests.Session``: las respuestas GET 200 se guardan
+comprimidas (gzip) en disco con clave = URL normalizada. Dentro del TTL se sirven
+sin tocar la red; al caducar se revalidan con ETag / Last-Modified (304 = se
+reutiliza el cuerpo guardado). Las páginas de captcha o bloqueo se sirven con
+200 y no se guardan (``is_block_page``). El directorio tiene un tamaño máximo con
+expulsión LRU (por fecha de último acceso del fichero): el tamaño se lleva en
+memoria y el directorio solo se recorre al superarlo o cada ``RESCAN_EVERY`` escrituras.
+
+El adaptador es también el punto donde se aplica el rate limit compartido,
+de modo que los aciertos de cache no consumen presupuesto del host.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .rate_limiter import throttle
+
+logger = logging.getLogger('products')
+
+DEFAULT_TTL = 30 * 60
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+# Escrituras entre recorridos del directorio (resincroniza el tamaño con otros procesos)
+RESCAN_EVERY = 200
+
+# Parámetros de tracking que no cambian el contenido de la página
+TRACKING_PARAMS = {'spm', 'scm', 'initiative_id', 'gatewayadapt', '_t', 'pdp_ext_f', 'algo_pvid', 'algo_exp_id'}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normaliza una URL para usarla como clave de cache
+
+    Esquema y host en minúsculas, sin puerto por defecto ni fragmento, parámetros
+    ordenados y sin parámetros de tracking (utm_*, spm, ...).
+    """
+    if url.startswith('//'):
+        url = 'https:' + url
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    port = parts.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f"{host}:{port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')
+    )
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+
+# Marcas de páginas de captcha / bloqueo anti-bot servidas con 200
+BLOCK_PAGE_MARKERS = (
+    b'/_____tmd_____/punish',  # AliExpress (slider de verificación)
+    b'x5secdata',
+    b'baxia-punish',
+    b'/errors/validatecaptcha',  # Amazon
+    b'<title>robot check</title>',
+    b'<title>access denied</title>',
+    b'<title>attention required',  # Cloudflare
+)
+
+
+def is_block_page(body: bytes) -> bool:
+    """Si el cuerpo es una página de captcha o bloqueo en lugar de contenido"""
+    lowered = (body or b'').lower()
+    return any(marker in lowered for marker in BLOCK_PAGE_MARKERS)
+
+
+class DiskHTTPCache:
+    """Almacén de respuestas comprimidas en disco con TTL y límite de tamaño LRU"""
+
+    def __init__(self, directory, ttl: int = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Tamaño del directorio (None hasta el primer recorrido)
+        self._size: Optional[int] = None
+        self._writes_since_scan = 0
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'stores': 0,
+            'evictions': 0,
+            'blocked': 0,
+        }
+
+    def key_for(self, url: str) -> str:
+        return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.gz"
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Devuelve la entrada guardada (fresca o no) o None"""
+        path = self._path(self.key_for(url))
+        try:
+            with gzip.open(path, 'rb') as fh:
+                header_line, body = fh.read().split(b'\n', 1)
+            entry = json.loads(header_line)
+            entry['body'] = body
+            os.utime(path)  # último acceso para LRU
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError) as e:
+            logger.debug(f"Entrada de cache corrupta {path}: {e}")
+            self._remove(path)
+            return None
+
+    def is_fresh(self, entry: Dict[str, Any], now: Optional[float] = None) -> bool:
+        return (now or time.time()) - entry['stored_at'] < self.ttl
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes, stored_at: Optional[float] = None):
+        """Guarda una respuesta (escritura atómica vía fichero temporal)"""
+        if is_block_page(body):
+            logger.warning(f"Página de bloqueo/captcha, no se guarda en cache: {url}")
+            self.record('blocked')
+            return
+        path = self._path(self.key_for(url))
+        header = {
+            'url': normalize_url(url),
+            'status': status,
+            'headers': dict(headers),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'stored_at': stored_at or time.time(),
+        }
+        payload = json.dumps(header).encode('utf-8') + b'\n' + body
+        path.parent.mkdir(parents=True, exist_ok=True)
+        previous_size = self._file_size(path)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6) as fh:
+                fh.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar en cache {url}: {e}")
+            self._remove(Path(tmp_path))
+            return
+        with self._lock:
+            self.stats['stores'] += 1
+            self._writes_since_scan += 1
+            if self._size is not None:
+                self._size += self._file_size(path) - previous_size
+            scan = self._size is None or self._size > self.max_bytes or self._writes_since_scan >= RESCAN_EVERY
+        if scan:
+            self.evict()
+
+    def refresh(self, url: str, entry: Dict[str, Any], headers: Dict[str, str]):
+        """Marca como fresca una entrada revalidada con 304"""
+        merged = dict(entry['headers'])
+        for name in ('ETag', 'Last-Modified', 'Cache-Control', 'Expires', 'Date'):
+            if headers.get(name):
+                merged[name] = headers[name]
+        self.put(url, entry['status'], merged, entry['body'])
+
+    def evict(self):
+        """Recorre el directorio y expulsa las entradas menos usadas recientemente hasta cumplir max_bytes"""
+        files = []
+        total = 0
+        for path in self.directory.glob('*/*.gz'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        evicted = 0
+        if total > self.max_bytes:
+            files.sort()
+            for _, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                evicted += 1
+        with self._lock:
+            self._size = total
+            self._writes_since_scan = 0
+            self.stats['evictions'] += evicted
+
+    def clear(self):
+        for path in self.directory.glob('*/*.gz'):
+            self._remove(path)
+        with self._lock:
+            self._size = 0
+
+    def size_bytes(self) -> int:
+        return sum(path.stat().st_size for path in self.directory.glob('*/*.gz'))
+
+    def record(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['revalidated'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['revalidated']) / lookups, 4) if lookups else 0.0
+        return stats
+
+    @staticmethod
+    def _file_size(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _remove(path: Path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """
+    Adaptador de ``requests`` con cache en disco y rate limit por host
+
+    Solo se cachean GET sin streaming con respuesta 200. Las peticiones que salen a
+    la red pasan antes por el limitador compartido.
+    """
+
+    def __init__(self, http_cache: Optional[DiskHTTPCache] = None, rate_limit: bool = True, **kwargs):
+        super().__init__(**kwargs)
+        self.http_cache = http_cache
+        self.rate_limit = rate_limit
+
+    def send(self, request, stream=False, **kwargs):
+        cacheable = self.http_cache is not None and request.method == 'GET' and not stream
+        entry = self.http_cache.get(request.url) if cacheable else None
+
+        if entry is not None and self.http_cache.is_fresh(entry):
+            self.http_cache.record('hits')
+            return self._build_response(request, entry, 'HIT')
+
+        if entry is not None:
+            if entry.get('etag'):
+                request.headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        if self.rate_limit:
+            throttle(request.url)
+        response = super().send(request, stream=stream, **kwargs)
+
+        if not cacheable:
+            return response
+        if response.status_code == 304 and entry is not None:
+            self.http_cache.record('revalidated')
+            self.http_cache.refresh(request.url, entry, response.headers)
+            response.close()
+            return self._build_response(request, entry, 'REVALIDATED')
+
+        self.http_cache.record('misses')
+        if response.status_code == 200:
+            self.http_cache.put(request.url, response.status_code, response.headers, response.content)
+        return response
+
+    @staticmethod
+    def _build_response(request, entry: Dict[str, Any], cache_status: str) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        # El cuerpo se guarda ya descomprimido
+        response.headers.pop('Content-Encoding', None)
+        response.headers['X-Cache'] = cache_status
+        response._content = entry['body']
+        response.url = request.url
+        response.request = request
+        response.reason = 'OK'
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+
+_http_cache: Optional[DiskHTTPCache] = None
+_http_cache_loaded = False
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[DiskHTTPCache]:
+    """Cache compartida configurada desde settings (None si está deshabilitada)"""
+    global _http_cache, _http_cache_loaded
+    if not _http_cache_loaded:
+        with _http_cache_lock:
+            if not _http_cache_loaded:
+                _http_cache = _build_http_cache()
+                _http_cache_loaded = True
+    return _http_cache
+
+
+def _build_http_cache() -> Optional[DiskHTTPCache]:
+    config = {}
+    try:
+        from django.conf import settings
+        if settings.configured:
+            config = getattr(settings, 'SCRAPER_HTTP_CACHE', {})
+    except ImportError:  # pragma: no cover - uso fuera de Django
+        pass
+
+    if not config.get('ENABLED', False):
+        return None
+    return DiskHTTPCache(
+        directory=config.get('DIR', Path(tempfile.gettempdir()) / 'dropship_http_cache'),
+        ttl=int(config.get('TTL', DEFAULT_TTL)),
+        max_bytes=int(config.get('MAX_BYTES', DEFAULT_MAX_BYTES)),
+    )
+
+
+def install_http_cache(session: requests.Session, http_cache: Optional[DiskHTTPCache] = None) -> requests.Session:
+    """Monta el adaptador con cache y rate limit en una sesión de scraper"""
+    adapter = CachingHTTPAdapter(http_cache=http_cache or get_http_cache())
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
@@ -14,8 +14,9 @@ from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
 from urllib.parse import quote_plus, urljoin
-from bs4 import BeautifulSoup
 import json
+from .http_cache import install_http_cache
+from .html_parser import parse_html
 
 logger = logging.getLogger('informatica_bot')
 
@@ -25,6 +26,8 @@ class InformaticaBot:
     def __init__(self):
         self.session = requests.Session()
         self.base_url = 'https://www.aliexpress.com'
+        # Cache HTTP en disco + rate limit compartido por host
+        install_http_cache(self.session)
         
         # Headers realistas
         self.session.headers.update({
@@ -144,9 +147,6 @@ class InformaticaBot:
                     
                 productos_categoria = self._buscar_por_keyword(keyword, cat_nombre, 3)
                 productos_encontrados.extend(productos_categoria)
-                
-                # Pausa entre búsquedas
-                time.sleep(random.uniform(1, 3))
         
         # Limitar resultados finales
         productos_finales = productos_encontrados[:limite]
@@ -167,7 +167,7 @@ class InformaticaBot:
                 'g': 'y'
             }
             
-            # Hacer request
+            # Hacer request (el adaptador de la sesión aplica cache y rate limit)
             response = self.session.get(search_url, params=params, timeout=15)
             response.raise_for_status()
             
@@ -192,7 +192,8 @@ class InformaticaBot:
         productos = []
         
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            # Documento completo: el precio se busca en el contenedor padre del enlace
+            soup = parse_html(html_content)
             
             # Buscar enlaces de productos
             enlaces_productos = soup.find_all('a', href=re.compile(r'/item/\d+\.html'))
@@ -348,7 +349,6 @@ class InformaticaBot:
             logger.info(f"📊 Contando productos en: {categoria}")
             productos = self.buscar_productos_informatica(categoria, 5)
             resumen[categoria] = len(productos)
-            time.sleep(1)  # Pausa entre categorías
         
         return resumen
 
@@ -0,0 +1,176 @@
+"""
+Outbox de notificaciones de productos nuevos
+
+La ingesta solo inserta una fila en ``NotificationOutbox`` dentro de la misma
+transacción que el producto; un worker aparte (tarea Celery, cron o el comando
+``deliver_notifications``) reserva lotes de filas pendientes y las entrega a
+Telegram/Discord. Así la latencia de los webhooks no frena la ingesta.
+
+Reintentos seguros:
+- Cada lote se reserva con un único ``UPDATE`` condicional que marca las filas
+  con el token del worker (``claimed_by``) y mueve ``available_at`` al futuro
+  (``lease``), solo si siguen disponibles; el worker entrega únicamente las
+  filas que llevan su token. Si muere a mitad, vuelven a estar disponibles al
+  caducar la reserva. En PostgreSQL los candidatos se leen además con
+  ``SELECT ... FOR UPDATE SKIP LOCKED`` para no esperar a otros workers.
+- El resultado de la entrega solo se escribe si la reserva sigue siendo suya.
+- ``delivered`` guarda los servicios que ya recibieron la notificación; un
+  reintento solo envía a los que fallaron.
+- Los fallos se reintentan con espera exponencial hasta ``max_attempts``.
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from products.models import NotificationOutbox, Product
+
+logger = logging.getLogger('products')
+
+
+def enqueue_product_notifications(products: Iterable[Product]) -> int:
+    """Encola la notificación de productos nuevos (un único INSERT)"""
+    entries = [
+        NotificationOutbox(product=product, event=NotificationOutbox.Event.PRODUCT_CREATED)
+        for product in products
+        if product.pk is not None
+    ]
+    if entries:
+        NotificationOutbox.objects.bulk_create(entries)
+    return len(entries)
+
+
+class OutboxWorker:
+    """Entrega las notificaciones pendientes por lotes"""
+
+    def __init__(
+        self,
+        manager=None,
+        batch_size: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        retry_base_seconds: Optional[int] = None,
+        lease_seconds: Optional[int] = None
+    ):
+        if manager is None:
+            from products.services.notifications import notification_manager
+            manager = notification_manager
+        self.manager = manager
+        self.batch_size = batch_size or getattr(settings, 'NOTIFICATION_OUTBOX_BATCH_SIZE', 50)
+        self.max_attempts = max_attempts or getattr(settings, 'NOTIFICATION_OUTBOX_MAX_ATTEMPTS', 5)
+        self.retry_base_seconds = retry_base_seconds or getattr(settings, 'NOTIFICATION_OUTBOX_RETRY_SECONDS', 60)
+        self.lease_seconds = lease_seconds or getattr(settings, 'NOTIFICATION_OUTBOX_LEASE_SECONDS', 300)
+
+    def claim(self) -> List[NotificationOutbox]:
+        """Reserva un lote de filas pendientes para este worker (solo las que reserva él)"""
+        now = timezone.now()
+        token = uuid.uuid4().hex
+        available = NotificationOutbox.objects.filter(status=NotificationOutbox.Status.PENDING, available_at__lte=now)
+        with transaction.atomic():
+            candidates = available.order_by('id')
+            if connection.features.has_select_for_update_skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            ids = list(candidates.values_list('id', flat=True)[:self.batch_size])
+            if not ids:
+                return []
+            # Compara y reserva en un solo UPDATE: las filas que otro worker reservó
+            # entretanto ya no cumplen ``available_at <= now`` y no se tocan
+            claimed = available.filter(id__in=ids).update(
+                claimed_by=token,
+                available_at=now + timedelta(seconds=self.lease_seconds),
+                attempts=F('attempts') + 1
+            )
+        if not claimed:
+            return []
+        return list(
+            NotificationOutbox.objects.filter(id__in=ids, claimed_by=token)
+            .select_related('product').order_by('id')
+        )
+
+    def deliver(self, entry: NotificationOutbox) -> str:
+        """Entrega una fila reservada y devuelve su nuevo estado"""
+        pending_services = [name for name in self.manager.active_services if name not in entry.delivered]
+        errors = []
+        if pending_services:
+            results = self.manager.notify_new_product(entry.product, services=pending_services)
+            for name in pending_services:
+                result = results.get(name, {})
+                # Filtrado por reglas cuenta como entregado: reintentar no cambiaría nada
+                if result.get('sent') or result.get('filtered'):
+                    entry.delivered.append(name)
+                else:
+                    errors.append(f"{name}: {result.get('error') or 'sin resultado'}")
+
+        now = timezone.now()
+        if not errors:
+            entry.status = NotificationOutbox.Status.SENT
+            entry.sent_at = now
+            entry.last_error = None
+        else:
+            entry.last_error = '; '.join(errors)[:2000]
+            if entry.attempts >= self.max_attempts:
+                entry.status = NotificationOutbox.Status.FAILED
+                logger.error(f"Notificación del producto {entry.product_id} descartada tras {entry.attempts} intentos: {entry.last_error}")
+            else:
+                entry.available_at = now + timedelta(seconds=self.retry_base_seconds * 2 ** (entry.attempts - 1))
+        # Solo si la reserva sigue siendo nuestra (no caducó y la tomó otro worker)
+        written = NotificationOutbox.objects.filter(pk=entry.pk, claimed_by=entry.claimed_by).update(
+            status=entry.status,
+            sent_at=entry.sent_at,
+            last_error=entry.last_error,
+            available_at=entry.available_at,
+            delivered=entry.delivered,
+            claimed_by=None,
+        )
+        if not written:
+            logger.warning(f"Reserva de la notificación {entry.id} perdida; la entrega la reintentará otro worker")
+        entry.claimed_by = None
+        return entry.status
+
+    def run_once(self) -> Dict[str, int]:
+        """Reserva y entrega un lote"""
+        stats = {'claimed': 0, 'sent': 0, 'retry': 0, 'failed': 0}
+        for entry in self.claim():
+            stats['claimed'] += 1
+            try:
+                status = self.deliver(entry)
+            except Exception as e:
+                # La reserva caduca sola y la fila se reintentará
+                logger.error(f"Error entregando notificación {entry.id}: {e}")
+                stats['retry'] += 1
+                continue
+            if status == NotificationOutbox.Status.SENT:
+                stats['sent'] += 1
+            elif status == NotificationOutbox.Status.FAILED:
+                stats['failed'] += 1
+            else:
+                stats['retry'] += 1
+        return stats
+
+    def drain(self, max_batches: Optional[int] = None) -> Dict[str, int]:
+        """Entrega lotes hasta vaciar las filas disponibles (o ``max_batches``)"""
+        totals = {'claimed': 0, 'sent': 0, 'retry': 0, 'failed': 0, 'batches': 0}
+        while max_batches is None or totals['batches'] < max_batches:
+            stats = self.run_once()
+            if not stats['claimed']:
+                break
+            totals['batches'] += 1
+            for key, value in stats.items():
+                totals[key] += value
+        if totals['claimed']:
+            logger.info(f"Outbox de notificaciones: {totals}")
+        return totals
+
+
+def get_outbox_stats() -> Dict[str, int]:
+    """Filas del outbox por estado"""
+    from django.db.models import Count
+    counts = dict(
+        NotificationOutbox.objects.values_list('status').annotate(total=Count('id')).order_by()
+    )
+    return {status: counts.get(status, 0) for status in NotificationOutbox.Status.values}
@@ -441,12 +441,13 @@ class NotificationManager:
         
         logger.info(f"Servicios de notificación activos: {list(self.active_services.keys())}")
     
-    def notify_new_product(self, product: Product) -> Dict[str, Dict[str, Any]]:
+    def notify_new_product(self, product: Product, services: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
         """
         Notificar sobre un nuevo producto usando sistema avanzado
         
         Args:
             product: Producto a notificar
+            services: Limitar el envío a estos servicios activos (reintentos del outbox)
             
         Returns:
             Dict: Resultado detallado de envío por cada servicio
@@ -458,6 +459,8 @@ class NotificationManager:
         results = {}
         
         for service_name, service in self.active_services.items():
+            if services is not None and service_name not in services:
+                continue
             try:
                 result = service.send_product_notification(product)
                 results[service_name] = result
@@ -0,0 +1,92 @@
+"""
+Histórico de precios (PriceObservation)
+
+Escritura: la ingesta llama a ``record_price_observations`` con los productos
+creados y con los actualizados cuyo precio, rating o envío cambió; es un único
+``bulk_create`` por lote dentro de la transacción de la ingesta.
+
+Lectura: ``price_series`` devuelve la serie de un producto reducida por
+intervalos (hora/día/semana/mes) con mínimo, máximo, último valor y número de
+observaciones, todo calculado en SQL con funciones de ventana sobre el índice
+(product, observed_at). El coste depende de las observaciones del producto en
+el rango pedido, no del tamaño total de la tabla.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import Count, F, Max, Min, Window
+from django.db.models.functions import FirstValue, Trunc
+from django.utils import timezone
+
+from products.models import PriceObservation, Product
+
+logger = logging.getLogger('products')
+
+BUCKETS = ('hour', 'day', 'week', 'month')
+
+
+def observed_values(product: Product) -> Tuple[Any, Any, Any]:
+    """Valores que se historifican de un producto"""
+    return product.price, product.rating, product.shipping_time
+
+
+def record_price_observations(products: Iterable[Product], observed_at: Optional[datetime] = None) -> int:
+    """Añade una observación por producto (un único INSERT)"""
+    observed_at = observed_at or timezone.now()
+    observations = [
+        PriceObservation(
+            product_id=product.pk,
+            observed_at=observed_at,
+            price=product.price,
+            rating=product.rating,
+            shipping_time=product.shipping_time,
+        )
+        for product in products
+        if product.pk is not None and product.price is not None
+    ]
+    if observations:
+        PriceObservation.objects.bulk_create(observations)
+    return len(observations)
+
+
+def price_series(
+    product_id: int,
+    bucket: str = 'day',
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Serie reducida de un producto: por intervalo, precio mínimo/máximo/último,
+    último rating y envío, y número de observaciones
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"Intervalo no soportado: {bucket} (usar {', '.join(BUCKETS)})")
+
+    queryset = PriceObservation.objects.filter(product_id=product_id)
+    if since is not None:
+        queryset = queryset.filter(observed_at__gte=since)
+    if until is not None:
+        queryset = queryset.filter(observed_at__lt=until)
+
+    period = Trunc('observed_at', bucket)
+    partition = {'partition_by': [period]}
+    latest_first = {'partition_by': [period], 'order_by': F('observed_at').desc()}
+    rows = (
+        queryset
+        .annotate(
+            bucket=period,
+            min_price=Window(Min('price'), **partition),
+            max_price=Window(Max('price'), **partition),
+            observations=Window(Count('id'), **partition),
+            last_price=Window(FirstValue('price'), **latest_first),
+            last_rating=Window(FirstValue('rating'), **latest_first),
+            last_shipping_time=Window(FirstValue('shipping_time'), **latest_first),
+        )
+        .values('bucket', 'min_price', 'max_price', 'last_price', 'last_rating',
+                'last_shipping_time', 'observations')
+        .distinct()
+        .order_by('bucket')
+    )
+    return list(rows)
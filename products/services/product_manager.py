@@ -3,11 +3,24 @@ Servicio de gestión de productos con lógica de idempotencia
 """
 
 import logging
-from typing import List, Dict, Any, Tuple, Optional
+from typing import Callable, Iterable, List, Dict, Any, Tuple, Optional
 from decimal import Decimal
+from django.conf import settings
 from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
 from django.utils import timezone
 from products.models import Product
+from products.services.url_canonical import product_url_key, survivor_ordering
+from products.services.notification_outbox import enqueue_product_notifications
+from products.services.price_history import observed_values, record_price_observations
+from products.services.catalog_rollups import collect_deletions, rollup_values
+from products.services.daily_stats import (
+    ROLLUP_FIELDS, record_created_products, refresh_daily_stats, stats_key,
+)
+from products.services.title_terms import (
+    apply_term_deltas, term_deltas, title_change_deltas,
+)
 
 logger = logging.getLogger('products')
 
@@ -27,45 +40,73 @@ class ProductManager:
         Returns:
             Tuple[Product, bool]: (producto, fue_creado)
         """
+        product, outcome = ProductManager.upsert_product(product_data, update_existing)
+        return product, outcome == 'created'
+    
+    @staticmethod
+    def upsert_product(product_data: Dict[str, Any], update_existing: bool = False) -> Tuple[Product, str]:
+        """
+        Igual que ``create_or_update_product`` pero devuelve el resultado detallado
+        
+        Returns:
+            Tuple[Product, str]: (producto, 'created' | 'updated' | 'unchanged' | 'existing')
+        """
         url = product_data.get('url')
         if not url:
             raise ValueError("URL es requerida para idempotencia")
+        key = product_url_key(url)
         
         try:
-            # Buscar producto existente por URL
-            existing_product = Product.objects.filter(url=url).first()
+            # Buscar producto existente por la clave de la URL canónica
+            existing_product = Product.objects.filter(url_key=key).first()
             
             if existing_product:
-                if update_existing:
-                    # Actualizar producto existente
-                    for field, value in product_data.items():
-                        if hasattr(existing_product, field) and field != 'created_at':
-                            setattr(existing_product, field, value)
-                    
-                    existing_product.save()
-                    logger.info(f"Producto actualizado: {existing_product.title}")
-                    return existing_product, False
-                else:
-                    # Retornar producto existente sin modificar
-                    logger.debug(f"Producto ya existe: {existing_product.title}")
-                    return existing_product, False
+                return ProductManager._upsert_existing(existing_product, product_data, update_existing)
             
-            # Crear nuevo producto
-            product = Product.objects.create(**product_data)
+            # Crear nuevo producto (y su fila del outbox y los rollups, vía post_save, en la misma transacción)
+            with transaction.atomic():
+                product = Product.objects.create(**product_data)
+                record_price_observations([product])
             logger.info(f"Producto creado: {product.title}")
-            return product, True
+            return product, 'created'
             
         except IntegrityError as e:
             # Manejar carreras de condición (race conditions)
             logger.warning(f"IntegrityError al crear producto, buscando existente: {e}")
-            existing_product = Product.objects.filter(url=url).first()
+            existing_product = Product.objects.filter(Q(url_key=key) | Q(url=url)).first()
             if existing_product:
-                return existing_product, False
+                return ProductManager._upsert_existing(existing_product, product_data, update_existing)
             raise e
         except Exception as e:
             logger.error(f"Error creando/actualizando producto: {e}")
             raise e
     
+    @staticmethod
+    def _upsert_existing(
+        existing_product: Product,
+        product_data: Dict[str, Any],
+        update_existing: bool
+    ) -> Tuple[Product, str]:
+        """Rama de ``upsert_product`` para un producto que ya existe"""
+        if not update_existing:
+            # Retornar producto existente sin modificar
+            logger.debug(f"Producto ya existe: {existing_product.title}")
+            return existing_product, 'existing'
+        # Solo se escribe si la huella de contenido cambia, y solo las columnas cambiadas
+        if ProductManager._content_unchanged(existing_product, product_data):
+            logger.debug(f"Producto sin cambios: {existing_product.title}")
+            return existing_product, 'unchanged'
+        # Producto, histórico y rollups (post_save) en la misma transacción
+        with transaction.atomic():
+            before = observed_values(existing_product)
+            existing_product._rollup_before = rollup_values(existing_product)
+            changed = ProductManager._apply_changes(existing_product, product_data)
+            existing_product.save(update_fields=changed)
+            if observed_values(existing_product) != before:
+                record_price_observations([existing_product])
+        logger.info(f"Producto actualizado: {existing_product.title}")
+        return existing_product, 'updated'
+    
     @staticmethod
     def bulk_create_or_update_products(
         products_data: List[Dict[str, Any]], 
@@ -75,6 +116,12 @@ class ProductManager:
         """
         Crear o actualizar múltiples productos en lotes
         
+        Cada lote se resuelve por conjuntos: una consulta ``IN`` sobre ``url_key``
+        (hash de la URL canónica) para los productos ya existentes, un
+        ``bulk_create`` para los nuevos y un ``bulk_update`` solo
+        para las filas que realmente cambian. Si el lote falla (p. ej. otra
+        ejecución insertó la misma URL a la vez) se reprocesa fila a fila.
+        
         Args:
             products_data: Lista de datos de productos
             update_existing: Si True, actualiza productos existentes
@@ -86,6 +133,7 @@ class ProductManager:
         stats = {
             'created': 0,
             'updated': 0,
+            'unchanged': 0,
             'existing': 0,
             'errors': 0
         }
@@ -94,27 +142,172 @@ class ProductManager:
         for i in range(0, len(products_data), batch_size):
             batch = products_data[i:i + batch_size]
             
-            with transaction.atomic():
-                for product_data in batch:
-                    try:
-                        product, created = ProductManager.create_or_update_product(
-                            product_data, update_existing
-                        )
-                        
-                        if created:
-                            stats['created'] += 1
-                        elif update_existing and not created:
-                            stats['updated'] += 1
-                        else:
-                            stats['existing'] += 1
-                            
-                    except Exception as e:
-                        stats['errors'] += 1
-                        logger.error(f"Error procesando producto {product_data.get('title', 'Unknown')}: {e}")
+            try:
+                with transaction.atomic():
+                    batch_stats, created_products = ProductManager._upsert_batch(batch, update_existing)
+            except Exception as e:
+                logger.warning(f"Lote no procesable por conjuntos, procesando fila a fila: {e}")
+                batch_stats = ProductManager._process_batch_per_row(batch, update_existing)
+            else:
+                # bulk_create no emite post_save: emitirla para los productos nuevos
+                # (su notificación ya está en el outbox y los rollups ya están escritos)
+                for product in created_products:
+                    post_save.send(
+                        sender=Product, instance=product, created=True,
+                        update_fields=None, raw=False, using=product._state.db,
+                        outbox_enqueued=True, rollups_recorded=True
+                    )
+            
+            for key, value in batch_stats.items():
+                stats[key] += value
         
         logger.info(f"Procesamiento completado: {stats}")
         return stats
     
+    @staticmethod
+    def _upsert_batch(
+        batch: List[Dict[str, Any]], 
+        update_existing: bool
+    ) -> Tuple[Dict[str, int], List[Product]]:
+        """
+        Inserta/actualiza un lote con un número constante de consultas
+        
+        Con ``update_existing`` las huellas de contenido se comparan en memoria:
+        las filas sin cambios no se escriben y cuentan como ``unchanged``.
+        
+        Returns:
+            Tuple[Dict, List[Product]]: (estadísticas del lote, productos creados)
+        """
+        stats = {'created': 0, 'updated': 0, 'unchanged': 0, 'existing': 0, 'errors': 0}
+        
+        keys = {
+            product_data['url']: product_url_key(product_data['url'])
+            for product_data in batch if product_data.get('url')
+        }
+        # Sondeo por el índice estrecho de url_key en lugar de comparar URLs
+        existing = Product.objects.in_bulk(set(keys.values()), field_name='url_key') if keys else {}
+        
+        to_create: Dict[str, Product] = {}
+        to_update: Dict[str, Product] = {}
+        to_observe: Dict[str, Product] = {}
+        stale_stats = set()
+        retitled: List[Tuple[Product, Product]] = []
+        update_fields = set()
+        
+        for product_data in batch:
+            url = product_data.get('url')
+            if not url:
+                stats['errors'] += 1
+                logger.error(f"Error procesando producto {product_data.get('title', 'Unknown')}: URL es requerida para idempotencia")
+                continue
+            
+            # Ya existe en la base de datos o apareció antes en este mismo lote
+            key = keys[url]
+            target = existing.get(key) or to_create.get(key)
+            if target is not None:
+                if update_existing:
+                    changed = []
+                    before = observed_values(target)
+                    before_key = stats_key(target)
+                    before_title = Product(title=target.title, created_at=target.created_at)
+                    if not ProductManager._content_unchanged(target, product_data):
+                        changed = ProductManager._apply_changes(target, product_data)
+                    if changed:
+                        target.content_hash = target.compute_content_hash()
+                    if key not in existing:
+                        # Se crea en este lote: los cambios se funden en el INSERT y
+                        # la fila repetida cuenta como ya ingerida (un único producto)
+                        stats['existing'] += 1
+                        continue
+                    if not changed:
+                        stats['unchanged'] += 1
+                        continue
+                    to_update[key] = target
+                    update_fields.update(changed, ['content_hash'])
+                    if observed_values(target) != before:
+                        to_observe[key] = target
+                    if set(changed) & set(ROLLUP_FIELDS):
+                        stale_stats.update((before_key, stats_key(target)))
+                    if 'title' in changed:
+                        retitled.append((before_title, target))
+                    stats['updated'] += 1
+                else:
+                    stats['existing'] += 1
+                continue
+            
+            try:
+                product = Product(url_key=key, **product_data)
+                product.content_hash = product.compute_content_hash()
+                to_create[key] = product
+            except (TypeError, ValueError) as e:
+                stats['errors'] += 1
+                logger.error(f"Error procesando producto {product_data.get('title', 'Unknown')}: {e}")
+        
+        created_products = Product.objects.bulk_create(list(to_create.values())) if to_create else []
+        stats['created'] = len(created_products)
+        # Notificaciones de los productos nuevos en la misma transacción (un único INSERT)
+        enqueue_product_notifications(created_products)
+        if to_update:
+            Product.objects.bulk_update(list(to_update.values()), sorted(update_fields))
+        # Histórico: productos nuevos y los que cambiaron de precio/rating/envío
+        record_price_observations([*created_products, *to_observe.values()])
+        # Rollup diario: suma de los nuevos y recálculo de los grupos de los actualizados
+        record_created_products(created_products)
+        refresh_daily_stats(stale_stats)
+        # Términos de los títulos: nuevos y cambios de título (resta los anteriores, suma los nuevos)
+        term_changes = term_deltas(created_products)
+        for before_title, product in retitled:
+            term_changes.update(title_change_deltas(before_title, product))
+        apply_term_deltas(term_changes)
+        
+        return stats, created_products
+    
+    @staticmethod
+    def _content_unchanged(product: Product, product_data: Dict[str, Any]) -> bool:
+        """True si los datos no cambian la huella de contenido del producto"""
+        values = {
+            name: product_data[name] if name in product_data else getattr(product, name)
+            for name in Product.CONTENT_FIELDS
+        }
+        try:
+            incoming = Product.fingerprint(values)
+        except Exception:
+            return False
+        return incoming == (product.content_hash or product.compute_content_hash())
+    
+    @staticmethod
+    def _apply_changes(product: Product, product_data: Dict[str, Any]) -> List[str]:
+        """Aplica los datos al producto y devuelve los campos cuyo valor cambió"""
+        changed = []
+        for field, value in product_data.items():
+            if field in ('created_at', 'id', 'url') or not hasattr(product, field):
+                continue
+            try:
+                new_value = Product._meta.get_field(field).to_python(value)
+            except Exception:
+                new_value = value
+            if getattr(product, field) != new_value:
+                setattr(product, field, new_value)
+                changed.append(field)
+        return changed
+    
+    @staticmethod
+    def _process_batch_per_row(batch: List[Dict[str, Any]], update_existing: bool) -> Dict[str, int]:
+        """Procesa un lote producto a producto (2 consultas por fila)"""
+        stats = {'created': 0, 'updated': 0, 'unchanged': 0, 'existing': 0, 'errors': 0}
+        
+        for product_data in batch:
+            try:
+                with transaction.atomic():
+                    product, outcome = ProductManager.upsert_product(product_data, update_existing)
+                stats[outcome] += 1
+                    
+            except Exception as e:
+                stats['errors'] += 1
+                logger.error(f"Error procesando producto {product_data.get('title', 'Unknown')}: {e}")
+        
+        return stats
+    
     @staticmethod
     def validate_product_data(product_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -199,43 +392,56 @@ class ProductManager:
         return validated_data
     
     @staticmethod
-    def deduplicate_products() -> int:
+    def deduplicate_products(fields: Tuple[str, ...] = ('url_key',), chunk_size: int = 1000) -> Dict[str, int]:
         """
-        Eliminar productos duplicados basándose en URL
+        Eliminar productos duplicados, conservando el más reciente de cada grupo
+        (``survivor_ordering``, la misma regla que ``backfill_url_keys``)
+        
+        Los ids sobrantes salen de una única consulta con ROW_NUMBER() particionado
+        por ``fields`` (filas con algún campo vacío no se agrupan) y se borran por
+        bloques de ``chunk_size`` en transacciones cortas.
         
         Returns:
-            int: Número de productos duplicados eliminados
+            Dict con grupos duplicados, productos eliminados y bloques
         """
-        logger.info("Iniciando deduplicación de productos")
+        from django.db.models import F, Window
+        from django.db.models.functions import RowNumber
         
-        duplicates_removed = 0
+        logger.info(f"Iniciando deduplicación de productos por {', '.join(fields)}")
         
-        # Encontrar URLs duplicadas
-        from django.db.models import Count
-        duplicate_urls = (
-            Product.objects
-            .values('url')
-            .annotate(count=Count('url'))
-            .filter(count__gt=1)
+        queryset = Product.objects.all()
+        for field in fields:
+            queryset = queryset.filter(**{f'{field}__isnull': False})
+        duplicate_rows = list(
+            queryset
+            .annotate(position=Window(
+                RowNumber(),
+                partition_by=[F(field) for field in fields],
+                order_by=survivor_ordering(),
+            ))
+            .filter(position__gt=1)
+            .values_list('id', *fields)
         )
         
-        for item in duplicate_urls:
-            url = item['url']
-            count = item['count']
-            
-            # Obtener todos los productos con esta URL
-            products = Product.objects.filter(url=url).order_by('created_at')
-            
-            # Mantener el más reciente, eliminar los demás
-            products_to_delete = products[:-1]  # Todos excepto el último
-            
-            for product in products_to_delete:
-                logger.info(f"Eliminando producto duplicado: {product.title}")
-                product.delete()
-                duplicates_removed += 1
+        report = {
+            'groups': len({row[1:] for row in duplicate_rows}),
+            'removed': 0,
+            'chunks': 0,
+        }
+        ids = sorted(row[0] for row in duplicate_rows)
+        chunk_size = max(1, chunk_size)
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            with transaction.atomic(), collect_deletions():
+                report['removed'] += Product.objects.filter(id__in=chunk).delete()[1].get(Product._meta.label, 0)
+            report['chunks'] += 1
+            logger.debug(f"Duplicados eliminados (ids {chunk[0]}-{chunk[-1]}): {len(chunk)}")
         
-        logger.info(f"Deduplicación completada: {duplicates_removed} productos eliminados")
-        return duplicates_removed
+        logger.info(
+            f"Deduplicación completada: {report['removed']} productos eliminados "
+            f"de {report['groups']} grupos en {report['chunks']} bloques"
+        )
+        return report
     
     @staticmethod
     def get_product_stats() -> Dict[str, Any]:
@@ -294,15 +500,176 @@ def create_product_safe(product_data: Dict[str, Any]) -> Tuple[Product, bool]:
     return ProductManager.create_or_update_product(validated_data)
 
 
-def bulk_import_products(products_data: List[Dict[str, Any]]) -> Dict[str, int]:
-    """Importar productos en lote con validación"""
-    # Validar todos los productos primero
-    validated_products = []
-    for product_data in products_data:
+# Nombres alternativos que devuelven algunos scrapers -> campo del modelo
+FIELD_ALIASES = {
+    'name': 'title',
+    'price_numeric': 'price',
+    'image_url': 'image',
+    'source': 'source_platform',
+    'category_guess': 'category',
+}
+
+
+def map_product_fields(raw: Any, source_platform: Optional[str] = None) -> Dict[str, Any]:
+    """Normaliza un item de scraper a los campos de ``Product`` (los desconocidos se descartan en la validación)"""
+    if not isinstance(raw, dict):
+        raw = getattr(raw, '__dict__', {})
+    mapped = {}
+    for key, value in raw.items():
+        field = FIELD_ALIASES.get(key, key)
+        # El nombre canónico gana si el item trae ambos
+        if field != key and raw.get(field) not in (None, ''):
+            continue
+        mapped[field] = value
+    if source_platform and not mapped.get('source_platform'):
+        mapped['source_platform'] = source_platform
+    return mapped
+
+
+class ProductIngestion:
+    """
+    Etapa de ingesta compartida por la tarea Celery, el cron y los comandos
+    
+    Mapea y valida cada item una sola vez, descarta URLs repetidas dentro de la
+    ejecución y escribe por bloques de ``chunk_size`` con
+    ``bulk_create_or_update_products``. ``on_chunk`` recibe las estadísticas
+    acumuladas tras cada bloque escrito.
+    
+    Con ``INGEST_WRITER_ENABLED`` (o ``use_writer=True``) los bloques se envían a
+    la cola del escritor único (``services/sqlite_concurrency.py``) y cuentan en
+    ``queued``; el escritor los escribe y lleva sus propias estadísticas.
+    """
+    
+    def __init__(
+        self,
+        source_platform: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        update_existing: bool = False,
+        on_chunk: Optional[Callable[[Dict[str, int]], None]] = None,
+        use_writer: Optional[bool] = None,
+        writer_queue=None
+    ):
+        self.source_platform = source_platform
+        self.chunk_size = max(1, chunk_size or getattr(settings, 'INGESTION_CHUNK_SIZE', 100))
+        self.update_existing = update_existing
+        self.on_chunk = on_chunk
+        if use_writer is None:
+            use_writer = writer_queue is not None or getattr(settings, 'INGEST_WRITER_ENABLED', False)
+        self.use_writer = use_writer
+        self.writer_queue = writer_queue
+        self.stats = {
+            'created': 0, 'updated': 0, 'unchanged': 0, 'existing': 0, 'errors': 0, 'received': 0, 'chunks': 0,
+            'queued': 0,
+        }
+        self._pending: List[Dict[str, Any]] = []
+        self._seen_keys = set()
+    
+    def add(self, raw: Any) -> None:
+        """Añade un item; escribe el bloque en cuanto se llena"""
+        self.stats['received'] += 1
+        if not raw:
+            return
         try:
-            validated_data = ProductManager.validate_product_data(product_data)
-            validated_products.append(validated_data)
+            product_data = ProductManager.validate_product_data(map_product_fields(raw, self.source_platform))
         except Exception as e:
+            self.stats['errors'] += 1
             logger.error(f"Producto inválido omitido: {e}")
+            return
+        
+        key = product_url_key(product_data['url'])
+        if key in self._seen_keys:
+            # Ya ingerido en esta ejecución (misma URL canónica)
+            self.stats['existing'] += 1
+            return
+        self._seen_keys.add(key)
+        
+        self._pending.append(product_data)
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+    
+    def extend(self, items: Iterable[Any]) -> None:
+        for raw in items:
+            self.add(raw)
+    
+    def flush(self) -> Dict[str, int]:
+        """Escribe lo pendiente (p. ej. al final de cada página) y devuelve las estadísticas acumuladas"""
+        if self._pending:
+            if self._submit_to_writer(self._pending):
+                self.stats['queued'] += len(self._pending)
+            else:
+                chunk_stats = ProductManager.bulk_create_or_update_products(
+                    self._pending, update_existing=self.update_existing, batch_size=self.chunk_size
+                )
+                for key, value in chunk_stats.items():
+                    self.stats[key] += value
+            self._pending = []
+            self.stats['chunks'] += 1
+            if self.on_chunk is not None:
+                self.on_chunk(dict(self.stats))
+        return dict(self.stats)
     
-    return ProductManager.bulk_create_or_update_products(validated_products)
\ No newline at end of file
+    def _submit_to_writer(self, rows: List[Dict[str, Any]]) -> bool:
+        """Envía el bloque al escritor único; False si no está activo o no responde (se escribe aquí)"""
+        if not self.use_writer:
+            return False
+        from products.services.sqlite_concurrency import connect_ingest_queue, submit_to_queue
+        try:
+            if self.writer_queue is None:
+                self.writer_queue = connect_ingest_queue()
+            submit_to_queue(self.writer_queue, rows, update_existing=self.update_existing)
+        except Exception as e:
+            logger.warning(f"Escritor de ingesta no disponible, se escribe directamente: {e}")
+            self.use_writer = False
+            return False
+        return True
+
+
+def bulk_import_products(
+    products_data: Iterable[Dict[str, Any]],
+    batch_size: int = 100,
+    source_platform: Optional[str] = None,
+    update_existing: bool = False
+) -> Dict[str, int]:
+    """
+    Importar productos en lote con validación
+    
+    Acepta cualquier iterable (p. ej. ``scraper.iter_products()``): los productos
+    se validan según llegan y se persisten cada ``batch_size``, sin esperar al
+    final del scraping ni mantener toda la lista en memoria.
+    """
+    ingestion = ProductIngestion(source_platform, chunk_size=batch_size, update_existing=update_existing)
+    ingestion.extend(products_data)
+    return ingestion.flush()
+
+
+def import_product_pages(
+    pages: Iterable[List[Dict[str, Any]]],
+    on_page: Optional[Callable[[int, Dict[str, int]], None]] = None,
+    ingestion: Optional[ProductIngestion] = None
+) -> Dict[str, int]:
+    """
+    Importar productos página a página (``scraper.iter_product_pages()``)
+    
+    Cada página se persiste en cuanto llega, de modo que el primer producto está
+    en la base de datos tras la primera página y no al final del crawl. Las
+    páginas más grandes que el bloque de ingesta se escriben en varios bloques.
+    
+    Args:
+        pages: Iterable de listas de productos
+        on_page: Callback opcional (número de página, estadísticas acumuladas)
+        ingestion: Etapa de ingesta a usar (por defecto una nueva con valores por defecto)
+        
+    Returns:
+        Dict: Estadísticas acumuladas
+    """
+    ingestion = ingestion or ProductIngestion()
+    pages_done = 0
+    stats = ingestion.flush()
+    for page_products in pages:
+        ingestion.extend(page_products)
+        stats = ingestion.flush()
+        pages_done += 1
+        if on_page is not None:
+            on_page(pages_done, dict(stats, pages=pages_done))
+    stats['pages'] = pages_done
+    return stats
@@ -0,0 +1,209 @@
+"""
+Limitador de peticiones compartido por host (token bucket)
+
+Todos los scrapers piden turno aquí antes de cada petición HTTP, en lugar de
+dormir un tiempo aleatorio por su cuenta. El bucket se implementa como GCRA
+(equivalente a un token bucket): por host se guarda el "theoretical arrival time"
+(TAT) y cada petición reserva el siguiente hueco disponible. El estado vive en
+memoria (un proceso) o en el cache de Django (varios procesos / workers Celery;
+con REDIS_URL el cache por defecto es Redis).
+"""
+
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger('products')
+
+DEFAULT_RATE = 1.0   # peticiones por segundo
+DEFAULT_BURST = 3    # peticiones permitidas sin espera tras un periodo inactivo
+
+
+class MemoryBucketStore:
+    """Estado de los buckets en memoria del proceso"""
+
+    def __init__(self):
+        self._tats: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, host: str, interval: float, burst: int, now: float, penalty: float = 0.0) -> float:
+        with self._lock:
+            tat = max(self._tats.get(host, now), now) + penalty
+            new_tat = tat + interval
+            self._tats[host] = new_tat
+        return max(0.0, new_tat - now - burst * interval)
+
+    def reset(self):
+        with self._lock:
+            self._tats.clear()
+
+
+class CacheBucketStore:
+    """
+    Estado de los buckets en el cache de Django, compartido entre procesos
+
+    La lectura-escritura del TAT se protege con un lock basado en ``cache.add``,
+    que es atómico en Redis, Memcached y locmem.
+    """
+
+    lock_timeout = 5
+    lock_poll = 0.005
+
+    def __init__(self, cache_alias: str = 'default', prefix: str = 'ratelimit'):
+        self.cache_alias = cache_alias
+        self.prefix = prefix
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+        return caches[self.cache_alias]
+
+    def reserve(self, host: str, interval: float, burst: int, now: float, penalty: float = 0.0) -> float:
+        cache = self.cache
+        key = f"{self.prefix}:tat:{host}"
+        lock_key = f"{self.prefix}:lock:{host}"
+
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout
+        acquired = cache.add(lock_key, token, timeout=self.lock_timeout)
+        while not acquired:
+            if time.monotonic() > deadline:
+                logger.warning(f"Lock de rate limit expirado para {host}, continuando sin lock")
+                break
+            time.sleep(self.lock_poll)
+            acquired = cache.add(lock_key, token, timeout=self.lock_timeout)
+        try:
+            tat = max(cache.get(key, now), now) + penalty
+            new_tat = tat + interval
+            # El TAT solo es relevante mientras esté en el futuro
+            cache.set(key, new_tat, timeout=max(1, int(new_tat - now + burst * interval) + 1))
+        finally:
+            # Solo el lock propio: tras un timeout el lock es de otro proceso
+            if acquired and cache.get(lock_key) == token:
+                cache.delete(lock_key)
+        return max(0.0, new_tat - now - burst * interval)
+
+    def reset(self):
+        pass
+
+
+class HostRateLimiter:
+    """Token bucket por host con métricas de espera"""
+
+    def __init__(self, store=None, limits: Optional[Dict[str, Dict[str, Any]]] = None, clock=time.time, sleep=time.sleep):
+        self.store = store or MemoryBucketStore()
+        self.limits: Dict[str, Dict[str, Any]] = {'default': {'rate': DEFAULT_RATE, 'burst': DEFAULT_BURST}}
+        self.limits.update(limits or {})
+        self._clock = clock
+        self._sleep = sleep
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+
+    def configure_host(self, host: str, rate: float, burst: int = DEFAULT_BURST):
+        """Define el presupuesto (peticiones/segundo y ráfaga) de un host"""
+        self.limits[host] = {'rate': rate, 'burst': burst}
+
+    def get_limit(self, host: str) -> Dict[str, Any]:
+        limit = self.limits.get(host) or self.limits['default']
+        return {
+            'rate': float(limit.get('rate', DEFAULT_RATE)),
+            'burst': max(1, int(limit.get('burst', DEFAULT_BURST))),
+        }
+
+    def reserve(self, url_or_host: str) -> float:
+        """
+        Reserva un turno para el host y devuelve los segundos a esperar (sin dormir)
+
+        Útil desde código asíncrono, que espera con ``asyncio.sleep``.
+        """
+        return self._reserve(_host_of(url_or_host))
+
+    def acquire(self, url_or_host: str) -> float:
+        """Bloquea hasta que el host tenga presupuesto disponible; devuelve lo esperado"""
+        wait = self.reserve(url_or_host)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def penalize(self, url_or_host: str, seconds: float):
+        """Retrasa todas las peticiones futuras al host (p.ej. tras un 429)"""
+        host = _host_of(url_or_host)
+        self._reserve(host, penalty=seconds, record=False)
+        logger.info(f"Rate limit: penalización de {seconds:.1f}s para {host}")
+
+    def _reserve(self, host: str, penalty: float = 0.0, record: bool = True) -> float:
+        limit = self.get_limit(host)
+        if limit['rate'] <= 0:
+            return 0.0
+        wait = self.store.reserve(host, 1.0 / limit['rate'], limit['burst'], self._clock(), penalty)
+        if record:
+            self._record(host, wait)
+        return wait
+
+    def _record(self, host: str, wait: float):
+        with self._stats_lock:
+            stats = self._stats.setdefault(host, {'requests': 0, 'waited': 0, 'total_wait': 0.0, 'max_wait': 0.0})
+            stats['requests'] += 1
+            if wait > 0:
+                stats['waited'] += 1
+                stats['total_wait'] += wait
+                stats['max_wait'] = max(stats['max_wait'], wait)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Métricas de espera por host en este proceso"""
+        with self._stats_lock:
+            result = {}
+            for host, stats in self._stats.items():
+                result[host] = dict(stats)
+                result[host]['avg_wait'] = round(stats['total_wait'] / stats['requests'], 4) if stats['requests'] else 0.0
+            return result
+
+    def reset(self):
+        """Limpia el estado y las métricas (tests)"""
+        self.store.reset()
+        with self._stats_lock:
+            self._stats.clear()
+
+
+def _host_of(url_or_host: str) -> str:
+    if '://' in url_or_host:
+        return urlparse(url_or_host).hostname or url_or_host
+    return url_or_host
+
+
+_rate_limiter: Optional[HostRateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """Instancia compartida configurada desde settings (si Django está configurado)"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = _build_rate_limiter()
+    return _rate_limiter
+
+
+def _build_rate_limiter() -> HostRateLimiter:
+    backend = 'memory'
+    limits = {}
+    try:
+        from django.conf import settings
+        if settings.configured:
+            backend = getattr(settings, 'SCRAPER_RATE_LIMIT_BACKEND', 'memory')
+            limits = getattr(settings, 'SCRAPER_RATE_LIMITS', {})
+    except ImportError:  # pragma: no cover - uso fuera de Django
+        pass
+
+    store = CacheBucketStore() if backend == 'cache' else MemoryBucketStore()
+    logger.debug(f"Rate limiter inicializado con backend {backend}")
+    return HostRateLimiter(store=store, limits=limits)
+
+
+def throttle(url: str) -> float:
+    """Espera el turno del host de ``url`` en el limitador compartido"""
+    return get_rate_limiter().acquire(url)
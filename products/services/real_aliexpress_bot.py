@@ -16,6 +16,8 @@ from decimal import Decimal
 from urllib.parse import quote_plus, urljoin
 from bs4 import BeautifulSoup
 import json
+from .http_cache import install_http_cache
+from .html_parser import parse_html
 
 logger = logging.getLogger('aliexpress_real_scraper')
 
@@ -25,6 +27,8 @@ class AliExpressRealBot:
     def __init__(self):
         self.session = requests.Session()
         self.base_url = 'https://www.aliexpress.com'
+        # Cache HTTP en disco + rate limit compartido por host
+        install_http_cache(self.session)
         
         # Headers realistas para evitar bloqueos
         self.session.headers.update({
@@ -173,7 +177,6 @@ class AliExpressRealBot:
             'page': 1
         }
         
-        time.sleep(random.uniform(2, 4))
         response = self.session.get(search_url, params=params, timeout=20)
         response.raise_for_status()
         
@@ -184,7 +187,6 @@ class AliExpressRealBot:
         search_url = f"{self.base_url}/wholesale"
         params = {'SearchText': keywords}
         
-        time.sleep(random.uniform(1, 3))
         response = self.session.get(search_url, params=params, timeout=15)
         response.raise_for_status()
         
@@ -199,7 +201,6 @@ class AliExpressRealBot:
         search_url = f"{self.base_url}/premium/search"
         params = {'keywords': keywords, 'page': 1}
         
-        time.sleep(random.uniform(1, 2))
         response = self.session.get(search_url, params=params, headers=mobile_headers, timeout=15)
         response.raise_for_status()
         
@@ -211,7 +212,7 @@ class AliExpressRealBot:
         
         try:
             # Intentar extraer de scripts JSON
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parse_html(response.content)
             script_tags = soup.find_all('script', string=re.compile(r'window\.runParams|window\._dida_config_'))
             
             for script in script_tags:
@@ -389,7 +390,7 @@ class AliExpressRealBot:
             
             response = self.session.get(search_url, params=params, timeout=15)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+                soup = parse_html(response.content)
                 
                 # Buscar enlaces a productos reales
                 product_links = soup.find_all('a', href=re.compile(r'/item/\d+\.html'))
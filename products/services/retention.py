@@ -0,0 +1,209 @@
+"""
+Retención de productos antiguos por bloques
+
+En lugar de un único ``DELETE`` de todo lo antiguo (que en SQLite bloquea la base
+de datos mientras el collector de Django carga todas las filas), se borran
+bloques acotados de ids, cada uno en su propia transacción corta. Los ids se
+localizan con los índices (source_platform, created_at) y (created_at).
+
+Cada plataforma puede tener su propia ventana (``PRODUCT_RETENTION_DAYS_BY_PLATFORM``);
+el resto usa ``PRODUCT_RETENTION_DAYS``. Una ventana <= 0 conserva la plataforma
+entera. Opcionalmente, cada bloque se archiva (NDJSON comprimido con gzip o
+Parquet si ``pyarrow`` está instalado) antes de borrarse.
+"""
+
+import gzip
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from products.models import Product
+from products.services.catalog_rollups import collect_deletions
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - dependencia opcional
+    pyarrow = None
+
+logger = logging.getLogger('products')
+
+ARCHIVE_FORMATS = ('ndjson', 'parquet')
+
+
+@dataclass
+class RetentionPolicy:
+    """Ventana de retención de una plataforma (``platform=None``: el resto)"""
+    platform: Optional[str]
+    days: int
+    excluded_platforms: List[str] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        return self.platform or 'default'
+
+    def queryset(self, now=None):
+        cutoff = (now or timezone.now()) - timedelta(days=self.days)
+        queryset = Product.objects.filter(created_at__lt=cutoff)
+        if self.platform is not None:
+            return queryset.filter(source_platform=self.platform)
+        if self.excluded_platforms:
+            queryset = queryset.exclude(source_platform__in=self.excluded_platforms)
+        return queryset
+
+
+def get_retention_policies(default_days: Optional[int] = None, by_platform: Optional[Dict[str, int]] = None) -> List[RetentionPolicy]:
+    """Políticas configuradas en settings"""
+    if default_days is None:
+        default_days = getattr(settings, 'PRODUCT_RETENTION_DAYS', 30)
+    if by_platform is None:
+        by_platform = getattr(settings, 'PRODUCT_RETENTION_DAYS_BY_PLATFORM', {})
+    policies = [RetentionPolicy(platform, days) for platform, days in sorted(by_platform.items())]
+    policies.append(RetentionPolicy(None, default_days, excluded_platforms=sorted(by_platform)))
+    return [policy for policy in policies if policy.days > 0]
+
+
+def retention_horizon_days() -> Optional[int]:
+    """Mayor ventana configurada en días (``None`` si alguna plataforma se conserva entera)"""
+    windows = [
+        getattr(settings, 'PRODUCT_RETENTION_DAYS', 30),
+        *getattr(settings, 'PRODUCT_RETENTION_DAYS_BY_PLATFORM', {}).values(),
+    ]
+    if any(days <= 0 for days in windows):
+        return None
+    return max(windows)
+
+
+class ArchiveWriter:
+    """Escribe bloques de filas en un fichero NDJSON.gz o Parquet"""
+
+    PARQUET_FIELDS = {
+        'id': 'int64', 'title': 'string', 'price': 'decimal(10,2)', 'url': 'string', 'url_key': 'string',
+        'image': 'string', 'created_at': 'timestamp', 'shipping_time': 'int64', 'category': 'string',
+        'rating': 'decimal(3,2)', 'source_platform': 'string', 'content_hash': 'string',
+    }
+
+    def __init__(self, path: Path, archive_format: str):
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Formato de archivo no soportado: {archive_format}")
+        if archive_format == 'parquet' and pyarrow is None:
+            raise ValueError("El archivo Parquet requiere pyarrow (pip install pyarrow)")
+        self.format = archive_format
+        self.path = path
+        self.rows = 0
+        self._handle = None
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+        if self.format == 'ndjson':
+            if self._handle is None:
+                self._handle = gzip.open(self.path, 'wt', encoding='utf-8')
+            for row in rows:
+                self._handle.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+            self._handle.flush()
+        else:
+            if self._handle is None:
+                self._handle = pyarrow.parquet.ParquetWriter(str(self.path), self._parquet_schema(), compression='zstd')
+            table = pyarrow.Table.from_pylist(
+                [{name: row.get(name) for name in self.PARQUET_FIELDS} for row in rows],
+                schema=self._handle.schema
+            )
+            self._handle.write_table(table)
+        self.rows += len(rows)
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def _parquet_schema(self):
+        types = {
+            'int64': pyarrow.int64(),
+            'string': pyarrow.string(),
+            'decimal(10,2)': pyarrow.decimal128(10, 2),
+            'decimal(3,2)': pyarrow.decimal128(3, 2),
+            'timestamp': pyarrow.timestamp('us', tz='UTC'),
+        }
+        return pyarrow.schema([(name, types[kind]) for name, kind in self.PARQUET_FIELDS.items()])
+
+
+class RetentionRunner:
+    """Aplica las políticas de retención por bloques de ids"""
+
+    def __init__(
+        self,
+        policies: Optional[List[RetentionPolicy]] = None,
+        chunk_size: Optional[int] = None,
+        archive_format: Optional[str] = None,
+        archive_dir: Optional[str] = None,
+        dry_run: bool = False,
+        pause: float = 0.0
+    ):
+        self.policies = policies if policies is not None else get_retention_policies()
+        self.chunk_size = max(1, chunk_size or getattr(settings, 'PRODUCT_RETENTION_CHUNK_SIZE', 500))
+        if archive_format is None:
+            archive_format = getattr(settings, 'PRODUCT_RETENTION_ARCHIVE_FORMAT', '')
+        self.archive_format = archive_format or None
+        self.archive_dir = Path(archive_dir or getattr(settings, 'PRODUCT_RETENTION_ARCHIVE_DIR', 'archive'))
+        self.dry_run = dry_run
+        # Pausa entre bloques para dejar paso a otros escritores (SQLite)
+        self.pause = pause
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        now = timezone.now()
+        report = {}
+        for policy in self.policies:
+            queryset = policy.queryset(now)
+            if self.dry_run:
+                report[policy.label] = {'days': policy.days, 'would_delete': queryset.count()}
+                continue
+            report[policy.label] = self._apply(policy, queryset, now)
+        return report
+
+    def _apply(self, policy: RetentionPolicy, queryset, now) -> Dict[str, Any]:
+        result = {'days': policy.days, 'deleted': 0, 'chunks': 0, 'archive': None}
+        archive = None
+        if self.archive_format:
+            extension = 'ndjson.gz' if self.archive_format == 'ndjson' else 'parquet'
+            path = self.archive_dir / f"products-{policy.label}-{now:%Y%m%dT%H%M%S}.{extension}"
+            archive = ArchiveWriter(path, self.archive_format)
+        try:
+            last_id = 0
+            while True:
+                ids = list(
+                    queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:self.chunk_size]
+                )
+                if not ids:
+                    break
+                last_id = ids[-1]
+                if archive is not None:
+                    # El bloque queda en disco antes de borrarse
+                    archive.write(list(Product.objects.filter(id__in=ids).order_by('id').values()))
+                # Los rollups (services/catalog_rollups.py) se ajustan una vez por bloque
+                with transaction.atomic(), collect_deletions():
+                    deleted = Product.objects.filter(id__in=ids).delete()[1].get(Product._meta.label, 0)
+                result['deleted'] += deleted
+                result['chunks'] += 1
+                if self.pause:
+                    time.sleep(self.pause)
+        finally:
+            if archive is not None:
+                archive.close()
+                if archive.rows:
+                    result['archive'] = str(archive.path)
+                elif archive.path.exists():
+                    archive.path.unlink()
+        if result['deleted']:
+            logger.info(f"Retención {policy.label} ({policy.days} días): {result['deleted']} productos eliminados en {result['chunks']} bloques")
+        return result
@@ -8,11 +8,14 @@ import random
 import time
 import re
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 from decimal import Decimal
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, quote_plus, urlencode
+from .http_cache import install_http_cache
+from .html_parser import parse_html
+from .selector_cache import get_selector_cache, layout_key, select_containers
 
 logger = logging.getLogger('products')
 
@@ -30,6 +33,31 @@ class BaseScraper(ABC):
         """
         pass
     
+    def iter_product_pages(self, **kwargs) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Entrega los productos normalizados página a página según se obtienen
+        
+        La implementación por defecto entrega el resultado de scrape_products como
+        una sola página; los scrapers paginados la sobrescriben para que el consumo
+        (persistencia, notificaciones) empiece con la primera página.
+        
+        Yields:
+            List[Dict]: Productos con formato estándar de una página
+        """
+        products = self.scrape_products(**kwargs)
+        if products:
+            yield products
+    
+    def iter_products(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Productos normalizados uno a uno (ver iter_product_pages)
+        
+        Yields:
+            Dict: Producto con formato estándar
+        """
+        for page_products in self.iter_product_pages(**kwargs):
+            yield from page_products
+    
     def normalize_product(self, raw_product: Dict[str, Any]) -> Dict[str, Any]:
         """
         Normaliza los datos del producto a formato estándar
@@ -277,6 +305,8 @@ class AliExpressScraper(BaseScraper):
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        # Cache HTTP en disco + rate limit compartido por host
+        install_http_cache(self.session)
         
         # Configurar la sesión para simular un navegador real
         self.session.cookies.update({
@@ -360,7 +390,7 @@ class AliExpressScraper(BaseScraper):
             response = self.session.get(simple_url, timeout=5)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+                soup = parse_html(response.content)
                 
                 # Buscar enlaces de productos
                 product_links = soup.find_all('a', href=True)
@@ -635,13 +665,10 @@ class AliExpressScraper(BaseScraper):
             search_url = f"{self.search_url}?{urlencode(search_params)}"
             logger.info(f"Buscando: {search_url}")
             
-            # Esperar antes de la petición
-            time.sleep(random.uniform(2, 4))
-            
             response = self.session.get(search_url, timeout=20)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parse_html(response.content)
             
             # Múltiples estrategias para encontrar productos
             product_elements = self._find_product_elements(soup)
@@ -944,7 +971,7 @@ class AliExpressScraper(BaseScraper):
             response.raise_for_status()
             
             # Parsear la respuesta
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parse_html(response.content)
             
             # Buscar elementos de productos (selectores actualizados para AliExpress 2024)
             product_selectors = [
@@ -1203,7 +1230,7 @@ class AliExpressScraper(BaseScraper):
             response.raise_for_status()
             
             # Parsear la respuesta
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parse_html(response.content)
             
             # Buscar elementos de productos (selectores actualizados para AliExpress 2024)
             product_elements = soup.find_all(['div', 'article'], class_=lambda x: x and ('item' in x.lower() or 'product' in x.lower()))
@@ -1575,9 +1602,6 @@ class AliExpressScraper(BaseScraper):
         """
         for attempt in range(max_retries):
             try:
-                # Delay aleatorio para evitar detección
-                time.sleep(random.uniform(1, 3))
-                
                 response = self.session.get(url, timeout=15)
                 response.raise_for_status()
                 
@@ -1612,13 +1636,16 @@ class AliExpressScraper(BaseScraper):
             'div[class*="product"]'
         ]
         
-        product_elements = []
-        for selector in product_selectors:
-            elements = soup.select(selector)
-            if elements and len(elements) > 5:  # Asegurar que hay suficientes elementos
-                product_elements = elements
-                logger.debug(f"Productos encontrados con selector: {selector} ({len(elements)} elementos)")
-                break
+        # Primero el selector que ganó la última vez para este layout
+        selector, product_elements = select_containers(
+            soup,
+            product_selectors,
+            key=layout_key(self.search_url),
+            min_elements=6,  # Asegurar que hay suficientes elementos
+            cache=get_selector_cache(),
+        )
+        if selector:
+            logger.debug(f"Productos encontrados con selector: {selector} ({len(product_elements)} elementos)")
         
         if not product_elements:
             logger.warning("No se encontraron productos con los selectores conocidos")
@@ -1994,29 +2021,47 @@ class ScraperFactory:
         return list(cls.scrapers.keys())
 
 
-def scrape_all_platforms(count_per_platform: int = 5) -> List[Dict[str, Any]]:
+def iter_all_platforms(count_per_platform: int = 5) -> Iterator[List[Dict[str, Any]]]:
     """
-    Scraping de todas las plataformas disponibles
+    Scraping de todas las plataformas disponibles en streaming
     
     Args:
         count_per_platform: Número de productos por plataforma
         
-    Returns:
-        List[Dict]: Lista consolidada de productos
+    Yields:
+        List[Dict]: Productos de cada página según se obtienen
     """
-    all_products = []
     platforms = ScraperFactory.get_available_platforms()
     
     logger.info(f"Iniciando scraping de {len(platforms)} plataformas")
     
+    total = 0
     for platform in platforms:
+        scraped = 0
         try:
             scraper = ScraperFactory.get_scraper(platform)
-            products = scraper.scrape_products(count=count_per_platform)
-            all_products.extend(products)
-            logger.info(f"Scrapeados {len(products)} productos de {platform}")
+            for page_products in scraper.iter_product_pages(count=count_per_platform):
+                scraped += len(page_products)
+                yield page_products
+            logger.info(f"Scrapeados {scraped} productos de {platform}")
         except Exception as e:
             logger.error(f"Error scrapeando {platform}: {e}")
+        total += scraped
+    
+    logger.info(f"Scraping completado: {total} productos totales")
+
+
+def scrape_all_platforms(count_per_platform: int = 5) -> List[Dict[str, Any]]:
+    """
+    Scraping de todas las plataformas disponibles
     
-    logger.info(f"Scraping completado: {len(all_products)} productos totales")
+    Args:
+        count_per_platform: Número de productos por plataforma
+        
+    Returns:
+        List[Dict]: Lista consolidada de productos
+    """
+    all_products = []
+    for page_products in iter_all_platforms(count_per_platform):
+        all_products.extend(page_products)
     return all_products
\ No newline at end of file
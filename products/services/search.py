@@ -0,0 +1,311 @@
+"""
+Búsqueda de texto completo en título y categoría de productos
+
+``LIKE '%x%'`` (``icontains``) recorre toda la tabla en cada búsqueda. Aquí la
+búsqueda pasa por un índice invertido y devuelve los resultados anotados con
+``search_rank`` (mayor = más relevante; el título pesa más que la categoría):
+
+* SQLite: tabla virtual FTS5 ``products_product_fts`` (contenido externo sobre
+  ``products_product``) mantenida por triggers, de modo que cualquier escritura
+  (``save``, ``bulk_create``, ``bulk_update``, ``update``, ``delete``) la actualiza
+  de forma incremental. Ranking con ``bm25``.
+* PostgreSQL: columna generada ``search_vector`` (tsvector con pesos A/B) con
+  índice GIN (migración 0008). Ranking con ``ts_rank_cd``.
+* LIKE: respaldo si no hay índice (p. ej. SQLite sin FTS5) o ``SEARCH_BACKEND=like``.
+
+Cada término se busca por prefijo ("auric" encuentra "auriculares").
+``search_phrases`` busca frases (términos seguidos) y devuelve los productos que
+contienen alguna; ``phrase_matches`` aplica la misma regla en memoria.
+"""
+
+import logging
+import re
+import unicodedata
+from typing import Dict, List, Sequence, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import BooleanField, FloatField, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger('products')
+
+FTS_TABLE = 'products_product_fts'
+SEARCH_FIELDS = ('title', 'category')
+MAX_TERMS = 16
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+# FTS5 con contenido externo: el índice guarda solo los términos y se mantiene con
+# triggers. Django reconstruye la tabla en SQLite al alterar columnas (y con ella se
+# pierden los triggers), por eso se recrean tras cada migrate (``ensure_search_index``)
+SQLITE_FTS_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, category, content='products_product', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products_product BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, category) VALUES (new.id, new.title, new.category);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products_product BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, category)
+        VALUES ('delete', old.id, old.title, old.category);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, category ON products_product BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, category)
+        VALUES ('delete', old.id, old.title, old.category);
+        INSERT INTO {FTS_TABLE}(rowid, title, category) VALUES (new.id, new.title, new.category);
+    END""",
+]
+SQLITE_FTS_TRIGGERS = (f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au')
+
+_index_available: Dict[str, bool] = {}
+
+
+def search_terms(query: str) -> List[str]:
+    """Términos de búsqueda normalizados (solo caracteres de palabra, sin repetidos)"""
+    terms = []
+    for term in TERM_RE.findall((query or '').lower()):
+        if term not in terms:
+            terms.append(term)
+    return terms[:MAX_TERMS]
+
+
+def phrase_terms(phrase: str) -> List[str]:
+    """Términos de una frase en orden (con repetidos)"""
+    return TERM_RE.findall((phrase or '').lower())[:MAX_TERMS]
+
+
+def _fold(text: str) -> str:
+    # Minúsculas sin diacríticos, como el tokenizador de FTS5 (remove_diacritics)
+    decomposed = unicodedata.normalize('NFKD', (text or '').lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def phrase_matches(text: str, phrase: str) -> bool:
+    """Si ``text`` contiene los términos de ``phrase`` seguidos, cada uno por prefijo (como ``search_phrases``)"""
+    terms = phrase_terms(_fold(phrase))
+    if not terms:
+        return False
+    tokens = TERM_RE.findall(_fold(text))
+    return any(
+        all(tokens[start + offset].startswith(term) for offset, term in enumerate(terms))
+        for start in range(len(tokens) - len(terms) + 1)
+    )
+
+
+class SearchBackend:
+    """Filtra un queryset de productos por texto y anota ``search_rank``"""
+
+    name = 'base'
+
+    def search(
+        self,
+        queryset: QuerySet,
+        query: str,
+        fields: Sequence[str] = SEARCH_FIELDS,
+        match: str = 'all'
+    ) -> QuerySet:
+        """
+        Args:
+            queryset: Queryset de ``Product``
+            query: Texto libre
+            fields: Campos donde buscar (``title`` y/o ``category``)
+            match: 'all' (todos los términos) o 'any' (alguno)
+        """
+        fields = tuple(field for field in fields if field in SEARCH_FIELDS) or SEARCH_FIELDS
+        terms = search_terms(query)
+        if not terms:
+            return queryset
+        return self._search(queryset, terms, fields, match)
+
+    def search_phrases(self, queryset: QuerySet, phrases: Sequence[str], fields: Sequence[str] = SEARCH_FIELDS) -> QuerySet:
+        """Productos con alguna de las frases (sus términos seguidos, cada uno por prefijo)"""
+        fields = tuple(field for field in fields if field in SEARCH_FIELDS) or SEARCH_FIELDS
+        groups = [terms for terms in (phrase_terms(phrase) for phrase in phrases) if terms][:MAX_TERMS]
+        if not groups:
+            return queryset
+        return self._search_phrases(queryset, groups, fields)
+
+    def _search(self, queryset, terms, fields, match):
+        raise NotImplementedError
+
+    def _search_phrases(self, queryset, groups, fields):
+        raise NotImplementedError
+
+
+class LikeSearchBackend(SearchBackend):
+    """Respaldo sin índice: ``icontains`` por término (sin ranking)"""
+
+    name = 'like'
+
+    def _search(self, queryset, terms, fields, match):
+        condition = Q()
+        for term in terms:
+            term_q = Q()
+            for field in fields:
+                term_q |= Q(**{f'{field}__icontains': term})
+            condition = condition | term_q if match == 'any' else condition & term_q
+        return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    def _search_phrases(self, queryset, groups, fields):
+        condition = Q()
+        for terms in groups:
+            for field in fields:
+                condition |= Q(**{f'{field}__icontains': ' '.join(terms)})
+        return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class SqliteFtsSearchBackend(SearchBackend):
+    """FTS5 con ranking bm25 (título x10, categoría x2)"""
+
+    name = 'fts5'
+
+    @staticmethod
+    def match_expression(terms: List[str], fields: Tuple[str, ...], match: str) -> str:
+        columns = '' if len(fields) == len(SEARCH_FIELDS) else '{' + ' '.join(fields) + '} : '
+        return (' OR ' if match == 'any' else ' AND ').join(f'{columns}"{term}"*' for term in terms)
+
+    @staticmethod
+    def phrases_expression(groups: List[List[str]], fields: Tuple[str, ...]) -> str:
+        columns = '' if len(fields) == len(SEARCH_FIELDS) else '{' + ' '.join(fields) + '} : '
+        return ' OR '.join(columns + ' + '.join(f'"{term}"*' for term in terms) for terms in groups)
+
+    def _search(self, queryset, terms, fields, match):
+        return self._match(queryset, self.match_expression(terms, fields, match))
+
+    def _search_phrases(self, queryset, groups, fields):
+        return self._match(queryset, self.phrases_expression(groups, fields))
+
+    def _match(self, queryset, expression):
+        table = queryset.model._meta.db_table
+        # Join con la tabla FTS: el índice dirige la consulta y bm25() se evalúa una
+        # vez por fila encontrada (una subconsulta correlacionada repetiría el MATCH)
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = "{table}"."id"', f'{FTS_TABLE} MATCH %s'],
+            params=[expression],
+            select={'search_rank': f'-bm25({FTS_TABLE}, 10.0, 2.0)'},
+        )
+
+
+class PostgresSearchBackend(SearchBackend):
+    """tsvector + GIN con ranking ts_rank_cd (pesos A título, B categoría)"""
+
+    name = 'tsvector'
+    WEIGHTS = {'title': 'A', 'category': 'B'}
+
+    @classmethod
+    def tsquery(cls, terms: List[str], fields: Tuple[str, ...], match: str) -> str:
+        weights = '' if len(fields) == len(SEARCH_FIELDS) else ''.join(cls.WEIGHTS[field] for field in fields)
+        return (' | ' if match == 'any' else ' & ').join(f"'{term}':*{weights}" for term in terms)
+
+    @classmethod
+    def phrases_tsquery(cls, groups: List[List[str]], fields: Tuple[str, ...]) -> str:
+        weights = '' if len(fields) == len(SEARCH_FIELDS) else ''.join(cls.WEIGHTS[field] for field in fields)
+        return ' | '.join(
+            '(' + ' <-> '.join(f"'{term}':*{weights}" for term in terms) + ')' for terms in groups
+        )
+
+    def _search(self, queryset, terms, fields, match):
+        return self._match(queryset, self.tsquery(terms, fields, match))
+
+    def _search_phrases(self, queryset, groups, fields):
+        return self._match(queryset, self.phrases_tsquery(groups, fields))
+
+    def _match(self, queryset, tsquery):
+        vector = f'"{queryset.model._meta.db_table}"."search_vector"'
+        return (
+            queryset
+            .alias(search_match=RawSQL(
+                f"{vector} @@ to_tsquery('simple', %s)", [tsquery], output_field=BooleanField()
+            ))
+            .filter(search_match=True)
+            .annotate(search_rank=RawSQL(
+                f"ts_rank_cd({vector}, to_tsquery('simple', %s))", [tsquery], output_field=FloatField()
+            ))
+        )
+
+
+def has_search_rank(queryset: QuerySet) -> bool:
+    """Si el queryset viene de una búsqueda (tiene ``search_rank``)"""
+    return 'search_rank' in queryset.query.annotations or 'search_rank' in queryset.query.extra
+
+
+def search_index_available(using: str = 'default') -> bool:
+    """Si la base de datos tiene el índice de texto completo (resultado cacheado por alias)"""
+    if using not in _index_available:
+        connection = connections[using]
+        try:
+            with connection.cursor() as cursor:
+                if connection.vendor == 'sqlite':
+                    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                elif connection.vendor == 'postgresql':
+                    cursor.execute(
+                        "SELECT 1 FROM information_schema.columns "
+                        "WHERE table_name = 'products_product' AND column_name = 'search_vector'"
+                    )
+                else:
+                    _index_available[using] = False
+                    return False
+                _index_available[using] = cursor.fetchone() is not None
+        except DatabaseError:
+            return False
+    return _index_available[using]
+
+
+def get_search_backend(using: str = 'default') -> SearchBackend:
+    """Backend según ``SEARCH_BACKEND`` ('auto' o 'like') y la base de datos"""
+    if getattr(settings, 'SEARCH_BACKEND', 'auto') != 'like' and search_index_available(using):
+        if connections[using].vendor == 'sqlite':
+            return SqliteFtsSearchBackend()
+        return PostgresSearchBackend()
+    return LikeSearchBackend()
+
+
+def search_products(
+    queryset: QuerySet,
+    query: str,
+    fields: Sequence[str] = SEARCH_FIELDS,
+    match: str = 'all'
+) -> QuerySet:
+    """Búsqueda con el backend de la base de datos del queryset (réplica incluida)"""
+    return get_search_backend(queryset.db).search(queryset, query, fields=fields, match=match)
+
+
+def search_phrases(queryset: QuerySet, phrases: Sequence[str], fields: Sequence[str] = SEARCH_FIELDS) -> QuerySet:
+    """Productos con alguna de las frases, con el backend de la base de datos del queryset"""
+    return get_search_backend(queryset.db).search_phrases(queryset, phrases, fields=fields)
+
+
+def ensure_search_index(using: str = 'default') -> bool:
+    """
+    Crea (si faltan) la tabla FTS5 y sus triggers en SQLite y rellena el índice
+    cuando los triggers no existían. Idempotente; se ejecuta tras cada migrate.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        tables = connection.introspection.table_names(cursor)
+        if 'products_product' not in tables:
+            return False
+        cursor.execute(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)",
+            list(SQLITE_FTS_TRIGGERS)
+        )
+        complete = FTS_TABLE in tables and cursor.fetchone()[0] == len(SQLITE_FTS_TRIGGERS)
+        if complete:
+            _index_available[using] = True
+            return True
+        try:
+            for statement in SQLITE_FTS_SQL:
+                cursor.execute(statement)
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        except DatabaseError as e:
+            # SQLite compilado sin FTS5: la búsqueda usa LIKE
+            logger.warning(f"Índice de texto completo no disponible en '{using}': {e}")
+            _index_available[using] = False
+            return False
+    _index_available[using] = True
+    logger.info(f"Índice de texto completo de productos preparado en '{using}'")
+    return True
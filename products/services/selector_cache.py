@@ -0,0 +1,227 @@
+"""
+Cache aprendida de selectores de contenedor de producto
+
+Los scrapers prueban una lista de selectores CSS en orden hasta que uno devuelve
+suficientes elementos; casi todos fallan y cada intento es un recorrido completo
+del árbol. Esta cache recuerda, por host, tipo de página y lista de selectores
+(cada scraper prueba la suya), qué selector ganó la última vez para probarlo
+primero, y relega al final los selectores que fallan repetidamente. El estado
+se guarda en un fichero JSON para sobrevivir entre ejecuciones.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger('products')
+
+DEFAULT_MAX_MISSES = 3
+SAVE_INTERVAL = 30.0
+
+
+def layout_key(url: str) -> str:
+    """Clave host + primer segmento de ruta (p. ej. 'www.aliexpress.com/wholesale')"""
+    if url.startswith('//'):
+        url = 'https:' + url
+    parts = urlsplit(url)
+    segment = parts.path.strip('/').split('/', 1)[0]
+    return f"{(parts.hostname or '').lower()}/{segment}"
+
+
+def selector_set_key(key: str, selectors: Sequence[str]) -> str:
+    """Clave de layout acotada a una lista de selectores ('host/segmento#resumen')"""
+    digest = hashlib.sha1('\n'.join(selectors).encode('utf-8')).hexdigest()[:10]
+    return f"{key}#{digest}"
+
+
+class SelectorCache:
+    """Orden de selectores aprendido por clave de layout"""
+
+    def __init__(self, path=None, max_misses: int = DEFAULT_MAX_MISSES, save_interval: float = SAVE_INTERVAL):
+        self.path = Path(path) if path else None
+        self.max_misses = max_misses
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._layouts: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._last_save = 0.0
+        self.load()
+
+    def _layout(self, key: str) -> Dict[str, Any]:
+        return self._layouts.setdefault(key, {
+            'winner': None,
+            'selectors': {},
+            'pages': 0,
+            'scans': 0,
+            'first_try': 0,
+        })
+
+    def order(self, key: str, selectors: Sequence[str]) -> List[str]:
+        """Selectores en el orden en que deben probarse para esta clave"""
+        with self._lock:
+            layout = self._layouts.get(key)
+            if not layout:
+                return list(selectors)
+            winner = layout['winner']
+            stats = layout['selectors']
+
+            def demoted(selector):
+                return stats.get(selector, {}).get('streak', 0) >= self.max_misses
+
+            ordered = [winner] if winner in selectors else []
+            rest = [s for s in selectors if s != winner]
+            ordered += [s for s in rest if not demoted(s)] + [s for s in rest if demoted(s)]
+            return ordered
+
+    def record(self, key: str, tried: Sequence[str], winner: Optional[str]):
+        """Registra el resultado de una página: selectores probados y el ganador (o None)"""
+        save = False
+        with self._lock:
+            layout = self._layout(key)
+            layout['pages'] += 1
+            layout['scans'] += len(tried)
+            if winner is not None and tried and tried[0] == winner:
+                layout['first_try'] += 1
+            for selector in tried:
+                stats = layout['selectors'].setdefault(selector, {'hits': 0, 'misses': 0, 'streak': 0})
+                if selector == winner:
+                    stats['hits'] += 1
+                    stats['streak'] = 0
+                else:
+                    stats['misses'] += 1
+                    stats['streak'] += 1
+            if winner is not None and winner != layout['winner']:
+                logger.debug(f"Selector de contenedor para {key}: {winner}")
+                layout['winner'] = winner
+                save = True
+            self._dirty = True
+            if time.monotonic() - self._last_save >= self.save_interval:
+                save = True
+        if save:
+            self.save()
+
+    def load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, encoding='utf-8') as fh:
+                data = json.load(fh)
+            with self._lock:
+                self._layouts = data.get('layouts', {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo cargar la cache de selectores {self.path}: {e}")
+
+    def save(self):
+        """Escribe el estado en disco (escritura atómica)"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps({'layouts': self._layouts}, indent=2, sort_keys=True)
+            self._dirty = False
+            self._last_save = time.monotonic()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+                fh.write(payload)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la cache de selectores {self.path}: {e}")
+
+    def reset(self):
+        with self._lock:
+            self._layouts = {}
+            self._dirty = True
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Estadísticas por clave: ganador, páginas, recorridos por página y acierto al primer intento"""
+        with self._lock:
+            result = {}
+            for key, layout in self._layouts.items():
+                pages = layout['pages']
+                result[key] = {
+                    'winner': layout['winner'],
+                    'pages': pages,
+                    'scans': layout['scans'],
+                    'scans_per_page': round(layout['scans'] / pages, 2) if pages else 0.0,
+                    'first_try_rate': round(layout['first_try'] / pages, 4) if pages else 0.0,
+                    'selectors': {s: dict(v) for s, v in layout['selectors'].items()},
+                }
+            return result
+
+
+def select_containers(soup, selectors: Sequence[str], key: str, min_elements: int = 5,
+                      cache: Optional[SelectorCache] = None) -> Tuple[Optional[str], list]:
+    """
+    Devuelve (selector, elementos) del primer selector con al menos ``min_elements``
+
+    Con cache, los selectores se prueban en el orden aprendido para ``key`` y esta
+    lista de selectores: scrapers con listas distintas no comparten ganador.
+    """
+    key = selector_set_key(key, selectors)
+    ordered = cache.order(key, selectors) if cache is not None else list(selectors)
+    tried = []
+    winner, elements = None, []
+    for selector in ordered:
+        tried.append(selector)
+        try:
+            found = soup.select(selector)
+        except Exception as e:
+            logger.debug(f"Error con selector {selector}: {e}")
+            continue
+        if len(found) >= min_elements:
+            winner, elements = selector, found
+            break
+    if cache is not None:
+        cache.record(key, tried, winner)
+    return winner, elements
+
+
+_selector_cache: Optional[SelectorCache] = None
+_selector_cache_lock = threading.Lock()
+
+
+def get_selector_cache() -> SelectorCache:
+    """Cache compartida del proceso, persistida en settings.SCRAPER_SELECTOR_CACHE_PATH"""
+    global _selector_cache
+    if _selector_cache is None:
+        with _selector_cache_lock:
+            if _selector_cache is None:
+                path = None
+                try:
+                    from django.conf import settings
+                    if settings.configured:
+                        path = getattr(settings, 'SCRAPER_SELECTOR_CACHE_PATH', None)
+                except ImportError:  # pragma: no cover - uso fuera de Django
+                    pass
+                _selector_cache = SelectorCache(path)
+                atexit.register(_selector_cache.save)
+    return _selector_cache
+
+
+def _reset_selector_cache(setting, **kwargs):
+    """Con ``override_settings`` de la ruta, la siguiente llamada abre la cache nueva"""
+    global _selector_cache
+    if setting != 'SCRAPER_SELECTOR_CACHE_PATH':
+        return
+    with _selector_cache_lock:
+        if _selector_cache is not None:
+            atexit.unregister(_selector_cache.save)
+        _selector_cache = None
+
+
+try:
+    from django.core.signals import setting_changed
+    setting_changed.connect(_reset_selector_cache)
+except ImportError:  # pragma: no cover - uso fuera de Django
+    pass
@@ -0,0 +1,272 @@
+"""
+Modo de alta concurrencia para SQLite
+
+Dos piezas, pensadas para despliegues pequeños con varios workers de Celery y el
+cron escribiendo a la vez sobre ``db.sqlite3``:
+
+* Perfil de conexión (``SQLITE_CONCURRENCY=True``): al abrir cada conexión se
+  aplican ``journal_mode`` (WAL: los lectores no bloquean al escritor),
+  ``busy_timeout`` (esperar al cerrojo en lugar de fallar con
+  ``database is locked``) y el nivel ``synchronous``. En settings las
+  transacciones pasan a ``BEGIN IMMEDIATE`` para que la espera ocurra al empezar
+  y no al promocionar una lectura a escritura, que SQLite no puede reintentar.
+
+* ``IngestWriter``: un único escritor (hilo o proceso) que recoge los envíos de
+  todos los productores de una cola y los escribe agrupados en una sola
+  transacción, de modo que la base de datos ve un escritor en lugar de N
+  compitiendo por el cerrojo. Con ``INGEST_WRITER_ENABLED=True``,
+  ``ProductIngestion`` (tarea Celery, cron, comandos) envía sus bloques a la
+  cola del escritor servido por ``run_ingest_writer`` (``connect_ingest_queue``)
+  en lugar de escribir; si el escritor no responde, escribe directamente.
+  Un lote que falla con la base de datos ocupada se reintenta con espera
+  exponencial; si aun así falla, se escribe envío a envío para que solo se
+  pierda (y se registre) el envío que no se puede escribir.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from multiprocessing.managers import BaseManager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import OperationalError, connection as default_connection, transaction
+
+from products.services.product_manager import ProductIngestion, map_product_fields
+
+logger = logging.getLogger('products')
+
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+# Envío de la cola: (filas, update_existing; None = el modo del escritor)
+Submission = Tuple[List[Dict[str, Any]], Optional[bool]]
+
+
+def apply_sqlite_profile(
+    connection,
+    journal_mode: Optional[str] = None,
+    synchronous: Optional[str] = None,
+    busy_timeout_ms: Optional[int] = None
+) -> None:
+    """Aplica los PRAGMA del perfil a una conexión SQLite recién abierta"""
+    journal_mode = (journal_mode or getattr(settings, 'SQLITE_JOURNAL_MODE', 'WAL')).upper()
+    synchronous = (synchronous or getattr(settings, 'SQLITE_SYNCHRONOUS', 'NORMAL')).upper()
+    if busy_timeout_ms is None:
+        busy_timeout_ms = getattr(settings, 'SQLITE_BUSY_TIMEOUT_MS', 10000)
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"SQLITE_JOURNAL_MODE no soportado: {journal_mode}")
+    if synchronous not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"SQLITE_SYNCHRONOUS no soportado: {synchronous}")
+
+    with connection.cursor() as cursor:
+        # busy_timeout primero: cambiar a WAL necesita un momento sin otros escritores
+        cursor.execute(f'PRAGMA busy_timeout = {int(busy_timeout_ms)}')
+        cursor.execute(f'PRAGMA journal_mode = {journal_mode}')
+        cursor.execute(f'PRAGMA synchronous = {synchronous}')
+
+
+class IngestWriter:
+    """
+    Escritor único de productos
+
+    Cada envío de la cola es una lista de productos ya mapeados (``submit``) o
+    un dict ``{'rows', 'update_existing'}`` (``ProductIngestion``).
+    ``write_batch`` espera el primer envío y agrupa los que lleguen durante
+    ``max_wait`` segundos, hasta ``max_rows`` filas, en una única transacción.
+    ``None`` en la cola detiene el escritor tras escribir lo pendiente.
+    """
+
+    def __init__(
+        self,
+        source=None,
+        max_rows: Optional[int] = None,
+        max_wait: Optional[float] = None,
+        update_existing: bool = False,
+        retries: Optional[int] = None,
+        retry_delay: Optional[float] = None
+    ):
+        self.queue = source if source is not None else queue.Queue()
+        self.max_rows = max(1, max_rows or getattr(settings, 'INGEST_WRITER_MAX_ROWS', 500))
+        if max_wait is None:
+            max_wait = getattr(settings, 'INGEST_WRITER_MAX_WAIT', 0.2)
+        self.max_wait = max_wait
+        self.update_existing = update_existing
+        self.retries = max(0, getattr(settings, 'INGEST_WRITER_RETRIES', 5) if retries is None else retries)
+        if retry_delay is None:
+            retry_delay = getattr(settings, 'INGEST_WRITER_RETRY_SECONDS', 0.5)
+        self.retry_delay = retry_delay
+        self.stats = {
+            'created': 0, 'updated': 0, 'unchanged': 0, 'existing': 0, 'errors': 0,
+            'submissions': 0, 'transactions': 0, 'retries': 0, 'failed_submissions': 0,
+        }
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, products: Iterable[Any], source_platform: Optional[str] = None) -> None:
+        """Encola productos (el mapeo se hace en el productor, fuera del escritor)"""
+        submit_to_queue(self.queue, products, source_platform)
+
+    def write_batch(self, block: bool = True) -> bool:
+        """Escribe un grupo de envíos; devuelve False si se pidió parar"""
+        try:
+            first = self.queue.get(block=block)
+        except queue.Empty:
+            return True
+        if first is None:
+            return False
+
+        submissions = [_submission(first)]
+        rows, running = len(submissions[0][0]), True
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_rows:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                running = False
+                break
+            submissions.append(_submission(item))
+            rows += len(submissions[-1][0])
+
+        self._write(submissions)
+        return running
+
+    def run(self) -> Dict[str, int]:
+        """Bucle del escritor hasta recibir ``None``"""
+        try:
+            while self.write_batch():
+                pass
+        finally:
+            default_connection.close()
+        return dict(self.stats)
+
+    def start(self) -> 'IngestWriter':
+        """Arranca el escritor en un hilo del proceso actual"""
+        self._thread = threading.Thread(target=self.run, name='ingest-writer', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> Dict[str, int]:
+        """Escribe lo pendiente y detiene el hilo"""
+        self.queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        return dict(self.stats)
+
+    def _write(self, submissions: List[Submission]) -> None:
+        try:
+            self._count(self._write_with_retry(submissions), len(submissions))
+            return
+        except Exception as e:
+            if len(submissions) == 1:
+                self._discard(submissions[0], e)
+                return
+            logger.warning(f"Escritor de ingesta: lote de {len(submissions)} envíos fallido ({e}); se escribe envío a envío")
+        # Aislar el envío que falla: el resto se escribe
+        for submission in submissions:
+            try:
+                self._count(self._write_with_retry([submission]), 1)
+            except Exception as e:
+                self._discard(submission, e)
+
+    def _write_with_retry(self, submissions: List[Submission]) -> Dict[str, int]:
+        delay = self.retry_delay
+        attempt = 0
+        while True:
+            try:
+                return self._write_once(submissions)
+            except OperationalError as e:
+                if not is_busy_error(e) or attempt >= self.retries:
+                    raise
+                attempt += 1
+                self.stats['retries'] += 1
+                logger.warning(f"Escritor de ingesta: base de datos ocupada, reintento {attempt}/{self.retries} en {delay:.2f}s")
+                time.sleep(delay)
+                delay *= 2
+
+    def _write_once(self, submissions: List[Submission]) -> Dict[str, int]:
+        by_mode: Dict[bool, List[Dict[str, Any]]] = {}
+        for rows, update_existing in submissions:
+            mode = self.update_existing if update_existing is None else update_existing
+            by_mode.setdefault(mode, []).extend(rows)
+        totals = Counter()
+        with transaction.atomic():
+            for update_existing, rows in by_mode.items():
+                ingestion = ProductIngestion(chunk_size=len(rows) + 1, update_existing=update_existing, use_writer=False)
+                ingestion.extend(rows)
+                totals.update(ingestion.flush())
+        return totals
+
+    def _count(self, batch_stats: Dict[str, int], submissions: int) -> None:
+        for key in ('created', 'updated', 'unchanged', 'existing', 'errors'):
+            self.stats[key] += batch_stats[key]
+        self.stats['submissions'] += submissions
+        self.stats['transactions'] += 1
+        logger.debug(f"Escritor de ingesta: {submissions} envíos en una transacción")
+
+    def _discard(self, submission: Submission, error: Exception) -> None:
+        rows, _ = submission
+        self.stats['errors'] += len(rows)
+        self.stats['failed_submissions'] += 1
+        logger.error(
+            f"Escritor de ingesta: envío de {len(rows)} productos no escrito "
+            f"(primera URL {rows[0].get('url') if rows else '-'}): {error}"
+        )
+
+
+def is_busy_error(error: Exception) -> bool:
+    """True si el error es un cerrojo de SQLite (``database is locked``/``busy``), que se puede reintentar"""
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def _submission(item: Any) -> Submission:
+    if isinstance(item, dict):
+        return list(item['rows']), item.get('update_existing')
+    return list(item), None
+
+
+def submit_to_queue(
+    target,
+    products: Iterable[Any],
+    source_platform: Optional[str] = None,
+    update_existing: Optional[bool] = None
+) -> int:
+    """Mapea los productos y los pone en la cola del escritor como un único envío"""
+    rows = [map_product_fields(raw, source_platform) for raw in products if raw]
+    if rows:
+        target.put(rows if update_existing is None else {'rows': rows, 'update_existing': update_existing})
+    return len(rows)
+
+
+class IngestQueueManager(BaseManager):
+    """Expone la cola del escritor a otros procesos en una dirección local"""
+
+
+def _writer_address() -> Tuple[Tuple[str, int], bytes]:
+    host, _, port = getattr(settings, 'INGEST_WRITER_ADDRESS', '127.0.0.1:50071').rpartition(':')
+    authkey = (getattr(settings, 'INGEST_WRITER_AUTHKEY', '') or settings.SECRET_KEY).encode()
+    return (host or '127.0.0.1', int(port)), authkey
+
+
+def serve_ingest_queue(writer: IngestWriter, address: Optional[Tuple[str, int]] = None):
+    """Servidor (bloqueante) de la cola del escritor; el escritor debe estar arrancado"""
+    default_address, authkey = _writer_address()
+    IngestQueueManager.register('ingest_queue', callable=lambda: writer.queue)
+    server = IngestQueueManager(address=address or default_address, authkey=authkey).get_server()
+    logger.info(f"Escritor de ingesta escuchando en {server.address[0]}:{server.address[1]}")
+    server.serve_forever()
+
+
+def connect_ingest_queue(address: Optional[Tuple[str, int]] = None):
+    """Proxy de la cola de un escritor servido por ``run_ingest_writer``"""
+    default_address, authkey = _writer_address()
+    IngestQueueManager.register('ingest_queue')
+    manager = IngestQueueManager(address=address or default_address, authkey=authkey)
+    manager.connect()
+    return manager.ingest_queue()
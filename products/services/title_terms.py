@@ -0,0 +1,146 @@
+"""
+Frecuencia de términos de los títulos por día (ProductTermFrequency)
+
+Los rankings de palabras clave (``ProductMetricsView``) y de términos en
+tendencia (``TrendAnalysisView``) leen esta tabla en lugar de cargar y partir
+todos los títulos en cada petición: una consulta agrupada sobre el rango de
+fechas, cuyo coste depende de los términos distintos del periodo y no del
+número de productos.
+
+Cada fila cuenta los productos creados ese día (local) cuyo título contiene el
+término, según ``title_terms`` (tokenizador y stopwords compartidos), así que
+refleja el catálogo actual. Se mantiene dentro de la transacción de cada
+escritura, como el rollup diario (ver ``services/catalog_rollups.py``): suma
+los productos nuevos, resta los borrados y, si cambia un título, resta los
+términos anteriores y suma los nuevos (las filas que llegan a 0 se borran).
+``rebuild_title_terms`` (comando y cron diario) la reconstruye.
+"""
+
+import logging
+import re
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Sum
+
+from products.models import Product, ProductTermFrequency
+from products.services.daily_stats import day_start, local_day
+
+logger = logging.getLogger('products')
+
+# Palabras de 4+ letras (sin dígitos): descarta tallas, modelos y años
+TERM_RE = re.compile(r'[^\W\d_]{4,}', re.UNICODE)
+MAX_TERM_LENGTH = 64
+STOPWORDS = frozenset({
+    'with', 'from', 'this', 'that', 'fast', 'free', 'your', 'more', 'pack', 'piece', 'pieces',
+    'para', 'como', 'envío', 'envio', 'gratis', 'nuevo', 'nueva', 'nuevos', 'nuevas',
+})
+
+TermKey = Tuple[date, str]
+
+
+def title_terms(title: Optional[str]) -> Set[str]:
+    """Términos distintos de un título (minúsculas, 4+ letras, sin stopwords)"""
+    return {
+        term[:MAX_TERM_LENGTH]
+        for term in TERM_RE.findall((title or '').lower())
+        if term not in STOPWORDS
+    }
+
+
+def term_deltas(products: Iterable[Product]) -> Counter:
+    """Contador (día, término) -> productos cuyo título lo contiene"""
+    deltas = Counter()
+    for product in products:
+        day = local_day(product.created_at)
+        for term in title_terms(product.title):
+            deltas[(day, term)] += 1
+    return deltas
+
+
+def title_change_deltas(before: Product, after: Product) -> Counter:
+    """Deltas de un cambio de título: resta los términos de ``before`` y suma los de ``after``"""
+    deltas = term_deltas([after])
+    deltas.subtract(term_deltas([before]))
+    return deltas
+
+
+def apply_term_deltas(deltas: Dict[TermKey, int]) -> int:
+    """Suma ``deltas`` a la tabla (borra las filas que quedan a 0). Devuelve las filas tocadas."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+
+    with transaction.atomic():
+        rows = {
+            (row.date, row.term): row
+            for row in ProductTermFrequency.objects.select_for_update().filter(
+                date__in={day for day, _ in deltas},
+                term__in={term for _, term in deltas},
+            )
+        }
+        to_create, to_update, to_delete = [], [], []
+        for (day, term), delta in deltas.items():
+            row = rows.get((day, term))
+            if row is None:
+                if delta > 0:
+                    to_create.append(ProductTermFrequency(date=day, term=term, product_count=delta))
+                continue
+            row.product_count = max(row.product_count + delta, 0)
+            (to_update if row.product_count else to_delete).append(row)
+        if to_create:
+            ProductTermFrequency.objects.bulk_create(to_create)
+        if to_update:
+            ProductTermFrequency.objects.bulk_update(to_update, ['product_count'])
+        if to_delete:
+            ProductTermFrequency.objects.filter(pk__in=[row.pk for row in to_delete]).delete()
+    return len(deltas)
+
+
+def record_title_terms(products: Iterable[Product]) -> int:
+    """Suma a la tabla los términos de los productos nuevos"""
+    return apply_term_deltas(term_deltas(product for product in products if product.pk is not None))
+
+
+def top_terms(since: Optional[date] = None, limit: int = 10) -> List[Tuple[str, int]]:
+    """Términos con más productos desde ``since`` (o en todo el histórico), como ``Counter.most_common``"""
+    queryset = ProductTermFrequency.objects.all()
+    if since is not None:
+        queryset = queryset.filter(date__gte=since)
+    return list(
+        queryset.values('term')
+        .annotate(count=Sum('product_count'))
+        .order_by('-count', 'term')
+        .values_list('term', 'count')[:limit]
+    )
+
+
+def rebuild_title_terms(since: Optional[date] = None, chunk_size: int = 2000) -> Dict[str, int]:
+    """
+    Reconstruye la tabla desde los títulos de ``Product`` (desde ``since`` o completa)
+
+    Returns:
+        Dict: filas borradas y creadas
+    """
+    products = Product.objects.order_by()
+    existing = ProductTermFrequency.objects.all()
+    if since is not None:
+        products = products.filter(created_at__gte=day_start(since))
+        existing = existing.filter(date__gte=since)
+
+    counts = Counter()
+    for created_at, title in products.values_list('created_at', 'title').iterator(chunk_size=chunk_size):
+        day = local_day(created_at)
+        for term in title_terms(title):
+            counts[(day, term)] += 1
+
+    with transaction.atomic():
+        deleted, _ = existing.delete()
+        rows = ProductTermFrequency.objects.bulk_create(
+            (ProductTermFrequency(date=day, term=term, product_count=count) for (day, term), count in counts.items()),
+            batch_size=chunk_size,
+        )
+    logger.info(f"Términos de títulos reconstruidos desde {since or 'el inicio'}: {len(rows)} filas ({deleted} borradas)")
+    return {'deleted': deleted, 'created': len(rows)}
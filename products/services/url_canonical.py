@@ -0,0 +1,175 @@
+"""
+URL canónica y clave hash de identidad de productos
+
+Los scrapers devuelven la misma ficha con URLs distintas: ``//`` sin esquema,
+http/https, subdominios de idioma (``es.aliexpress.com``), parámetros de
+tracking o de sesión y fragmentos (lo específico de cada marketplace solo se
+quita en sus hosts). ``canonical_product_url`` las reduce a una forma única y
+``product_url_key`` la resume en un hash de ancho fijo que se guarda indexado
+en ``Product.url_key``: la comprobación de duplicados antes de insertar es una
+búsqueda por un índice estrecho en lugar de comparar URLs largas.
+
+``backfill_url_keys`` rellena la clave de los productos anteriores a la columna
+(migración 0013 y comando ``backfill_url_keys``). Entre productos con la misma
+identidad sobrevive siempre el más reciente (``survivor_rank``), la misma regla
+que ``ProductManager.deduplicate_products``.
+"""
+
+import hashlib
+import logging
+import re
+from collections import defaultdict
+from contextlib import AbstractContextManager
+from typing import Callable, Dict, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from django.db import transaction
+from django.db.models import F
+
+logger = logging.getLogger('products')
+
+# Marketplaces conocidos: solo en ellos se quitan subdominios de idioma y
+# parámetros genéricos como ``ref`` o ``tag``, que en otras tiendas pueden
+# identificar la ficha
+MARKETPLACE_HOST = re.compile(r'(?:^|\.)(?:aliexpress|amazon|ebay)\.[a-z.]+$')
+
+# Parámetros de tracking en cualquier host
+TRACKING_PARAMS = {'gclid', 'fbclid'}
+TRACKING_PREFIXES = ('utm_',)
+
+# Parámetros de tracking, sesión y afiliados de los marketplaces
+MARKETPLACE_TRACKING_PARAMS = {
+    'spm', 'scm', 'scm_id', 'scm-url', 'pvid', 'algo_pvid', 'algo_exp_id', 'initiative_id',
+    'gatewayadapt', '_t', 'pdp_ext_f', 'pdp_npi', 'sourcetype', 'aff_fcid', 'aff_fsk',
+    'aff_platform', 'aff_trace_key', 'terminal_id', 'afsmartredirect',
+    'ref', 'ref_', 'tag', 'psc', 'th', 'sk', 'curpagelogid', 'btsid', 'ws_ab_test',
+}
+MARKETPLACE_TRACKING_PREFIXES = ('aff_', 'algo_', 'pd_rd_', 'pf_rd_')
+
+# Subdominios que solo cambian idioma/dispositivo (``www`` en cualquier host)
+_LOCALE_SUBDOMAIN = re.compile(r'^(?:www|m|[a-z]{2})\.')
+_WWW_SUBDOMAIN = re.compile(r'^www\.')
+
+# Fichas con identificador en la ruta: se reducen a host + id
+_ITEM_PATTERNS = [
+    (re.compile(r'(?:^|\.)aliexpress\.[a-z.]+$'), re.compile(r'/item/(?:[^/]*/)?(\d+)\.html'), '/item/{}.html'),
+    (re.compile(r'(?:^|\.)amazon\.[a-z.]+$'), re.compile(r'/(?:dp|gp/product)/([A-Z0-9]{10})'), '/dp/{}'),
+    (re.compile(r'(?:^|\.)ebay\.[a-z.]+$'), re.compile(r'/itm/(?:[^/]+/)?(\d+)'), '/itm/{}'),
+]
+
+URL_KEY_LENGTH = 32
+
+
+def canonical_product_url(url: str) -> str:
+    """Forma canónica de la URL de una ficha de producto"""
+    url = (url or '').strip()
+    if url.startswith('//'):
+        url = 'https:' + url
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower().rstrip('.')
+    marketplace = bool(MARKETPLACE_HOST.search(host))
+    if host.count('.') >= 2:
+        host = (_LOCALE_SUBDOMAIN if marketplace else _WWW_SUBDOMAIN).sub('', host)
+    path = re.sub(r'/{2,}', '/', parts.path or '/')
+
+    for host_pattern, path_pattern, template in _ITEM_PATTERNS:
+        if host_pattern.search(host):
+            match = path_pattern.search(path)
+            if match:
+                return f'https://{host}{template.format(match.group(1))}'
+
+    if len(path) > 1:
+        path = path.rstrip('/')
+    params = TRACKING_PARAMS | MARKETPLACE_TRACKING_PARAMS if marketplace else TRACKING_PARAMS
+    prefixes = TRACKING_PREFIXES + MARKETPLACE_TRACKING_PREFIXES if marketplace else TRACKING_PREFIXES
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in params and not key.lower().startswith(prefixes)
+    )
+    # http y https son la misma ficha
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+
+def product_url_key(url: str) -> str:
+    """Hash hexadecimal de ancho fijo (32) de la URL canónica"""
+    canonical = canonical_product_url(url)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=URL_KEY_LENGTH // 2).hexdigest()
+
+
+# Regla única de superviviente entre productos duplicados: el más reciente y,
+# a igualdad de fecha, el de mayor id
+SURVIVOR_FIELDS = ('created_at', 'id')
+
+
+def survivor_ordering() -> list:
+    """Orden SQL en el que el superviviente de cada grupo va primero"""
+    return [F(field).desc() for field in SURVIVOR_FIELDS]
+
+
+def survivor_rank(product) -> Tuple:
+    """Clave de comparación en memoria: el superviviente es el de mayor ``survivor_rank``"""
+    return tuple(getattr(product, field) for field in SURVIVOR_FIELDS)
+
+
+def backfill_url_keys(
+    model,
+    chunk_size: int = 1000,
+    dry_run: bool = False,
+    deleting: Callable[[], AbstractContextManager] = transaction.atomic,
+) -> Dict[str, int]:
+    """
+    Calcula ``url_key`` por bloques de id para los productos que no la tienen
+
+    Por cada URL canónica sobrevive un producto (``survivor_rank``), tenga ya la
+    clave o no; el resto se elimina. ``model`` es ``Product`` o el modelo
+    histórico de una migración; ``deleting`` envuelve cada bloque (el comando
+    añade ``collect_deletions`` para los rollups).
+
+    Returns:
+        Dict: revisados, claves asignadas, duplicados y eliminados
+    """
+    stats = {'scanned': 0, 'updated': 0, 'duplicates': 0, 'deleted': 0}
+    pending = model.objects.filter(url_key__isnull=True).order_by('id').only('id', 'url', 'url_key', 'created_at')
+    # Sin escribir (dry-run), quién tendría cada clave tras los bloques anteriores
+    planned: Dict[str, object] = {}
+    last_id = 0
+    while True:
+        chunk = list(pending.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+        stats['scanned'] += len(chunk)
+
+        groups = defaultdict(list)
+        for product in chunk:
+            groups[product_url_key(product.url)].append(product)
+        holders = {
+            product.url_key: product
+            for product in model.objects.filter(url_key__in=list(groups)).only('id', 'url_key', 'created_at')
+        }
+
+        to_update, to_delete = [], []
+        for key, products in groups.items():
+            holder = planned.get(key) or holders.get(key)
+            candidates = products + ([holder] if holder is not None else [])
+            survivor = max(candidates, key=survivor_rank)
+            to_delete.extend(product.id for product in candidates if product is not survivor)
+            if survivor.url_key is None:
+                survivor.url_key = key
+                to_update.append(survivor)
+            if dry_run:
+                planned[key] = survivor
+
+        stats['updated'] += len(to_update)
+        stats['duplicates'] += len(to_delete)
+        if dry_run:
+            continue
+        with deleting():
+            # Primero los duplicados: liberan la clave que toma el superviviente
+            if to_delete:
+                stats['deleted'] += model.objects.filter(id__in=to_delete).delete()[1].get(model._meta.label, 0)
+            model.objects.bulk_update(to_update, ['url_key'])
+        logger.debug(f"url_key hasta id {last_id}: {len(to_update)} claves, {len(to_delete)} duplicados")
+
+    logger.info(f"url_key rellenada: {stats}")
+    return stats
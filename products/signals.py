@@ -3,10 +3,17 @@ Señales de Django para la aplicación de productos
 """
 
 import logging
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
 from django.dispatch import receiver
 from .models import Product
-from .services.notifications import notify_new_product
+from .services.catalog_rollups import (
+    ROLLUP_SOURCE_FIELDS, record_product_changed, record_product_deleted, record_products_added,
+)
+from .services.notification_outbox import enqueue_product_notifications
+from .services.search import ensure_search_index
+from .services.sqlite_concurrency import apply_sqlite_profile
 
 logger = logging.getLogger('products')
 
@@ -14,19 +21,58 @@ logger = logging.getLogger('products')
 @receiver(post_save, sender=Product)
 def product_created_notification(sender, instance, created, **kwargs):
     """
-    Enviar notificación cuando se crea un nuevo producto
+    Encolar la notificación de un nuevo producto en el outbox
+
+    El envío lo hace el worker del outbox (``deliver_notifications``); aquí solo
+    se inserta la fila, en la misma transacción que el producto. La ingesta por
+    lotes ya encola sus productos y emite la señal con ``outbox_enqueued=True``.
+    """
+    if created and not kwargs.get('outbox_enqueued'):
+        enqueue_product_notifications([instance])
+        logger.debug(f"Notificación encolada para nuevo producto: {instance.title}")
+
+
+@receiver(pre_save, sender=Product)
+def remember_rollup_values(sender, instance, raw=False, update_fields=None, **kwargs):
     """
-    if created:  # Solo para productos nuevos
-        try:
-            logger.info(f"Enviando notificación para nuevo producto: {instance.title}")
-            results = notify_new_product(instance)
-            
-            # Log de resultados
-            for service, success in results.items():
-                if success:
-                    logger.info(f"Notificación enviada exitosamente por {service}")
-                else:
-                    logger.warning(f"Error enviando notificación por {service}")
-                    
-        except Exception as e:
-            logger.error(f"Error en señal de notificación para producto {instance.id}: {e}")
\ No newline at end of file
+    Guardar los valores anteriores de un producto editado (API, admin) para los rollups
+
+    La ingesta ya los deja en ``_rollup_before`` y no necesita la consulta.
+    """
+    if raw or instance._state.adding or hasattr(instance, '_rollup_before'):
+        return
+    if update_fields is not None and not set(update_fields) & set(ROLLUP_SOURCE_FIELDS):
+        return
+    instance._rollup_before = Product.objects.filter(pk=instance.pk).only(*ROLLUP_SOURCE_FIELDS).first()
+
+
+@receiver(post_save, sender=Product)
+def sync_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    """Sumar un producto nuevo o ajustar una edición en los rollups (services/catalog_rollups.py)"""
+    before = instance.__dict__.pop('_rollup_before', None)
+    if raw or kwargs.get('rollups_recorded'):
+        return
+    if created:
+        record_products_added([instance])
+    elif before is not None:
+        record_product_changed(before, instance)
+
+
+@receiver(post_delete, sender=Product)
+def sync_rollups_on_delete(sender, instance, **kwargs):
+    """Descontar un producto borrado de los rollups (agrupado si el borrado es por bloques)"""
+    record_product_deleted(instance)
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Aplicar el perfil de concurrencia (WAL, busy_timeout, synchronous) a cada conexión SQLite"""
+    if connection.vendor == 'sqlite' and getattr(settings, 'SQLITE_CONCURRENCY', False):
+        apply_sqlite_profile(connection)
+
+
+@receiver(post_migrate)
+def create_search_index(sender, using, **kwargs):
+    """Crear (o recrear tras una reconstrucción de la tabla) el índice FTS5 de productos en SQLite"""
+    if sender.name == 'products':
+        ensure_search_index(using)
@@ -1,11 +1,13 @@
 import logging
-from typing import List, Dict, Any
+from typing import Dict, Any
 
 from celery import shared_task, states
 from celery.exceptions import Ignore
 
 from .services.scraper import ScraperFactory
-from .models import Product, ScrapeJob
+from .services.product_manager import ProductIngestion, import_product_pages
+from .services.notification_outbox import OutboxWorker
+from .models import ScrapeJob
 from django.utils import timezone
 from django.conf import settings
 import requests
@@ -43,19 +45,31 @@ def scrape_products_async(self, query: str, source: str = "aliexpress_advanced",
             job.mark_failure(str(e))
         raise Ignore()
 
+    # Cada página se persiste en cuanto llega (iter_product_pages) por la etapa de ingesta
+    # compartida: mapeo de campos, deduplicación por URL y escritura por bloques
+    pages_done = 0
+
+    def report_chunk(stats: Dict[str, int]):
+        progress = min(100, round(pages_done / max(1, max_pages) * 100, 2))
+        self.update_state(state=states.STARTED, meta={
+            'progress': progress,
+            'processed': stats['received'],
+            'created': stats['created'],
+            'pages': pages_done,
+        })
+        if job:
+            job.update_progress(progress=progress, processed=stats['received'],
+                                created=stats['created'], total=stats['received'])
+
+    def pages():
+        nonlocal pages_done
+        for page_products in scraper.iter_product_pages(search_term=query, max_pages=max_pages):
+            pages_done += 1
+            yield page_products
+
+    ingestion = ProductIngestion(source_platform=source, on_chunk=report_chunk)
     try:
-        if hasattr(scraper, 'scrape_products_advanced'):
-            results = scraper.scrape_products_advanced(query=query, max_pages=max_pages)
-            products_data: List[Dict[str, Any]] = []
-            # results puede ser lista de objetos o dicts según implementación
-            for r in results:
-                if isinstance(r, dict):
-                    products_data.append(r)
-                else:
-                    # fallback intentar atributos comunes
-                    products_data.append(getattr(r, '__dict__', {}))
-        else:
-            products_data = scraper.scrape_products(query=query, max_pages=max_pages)
+        stats = import_product_pages(pages(), ingestion=ingestion)
     except Exception as e:  # noqa
         self.update_state(state=states.FAILURE, meta={"error": str(e)})
         logger.exception("Error durante scraping async")
@@ -64,53 +78,15 @@ def scrape_products_async(self, query: str, source: str = "aliexpress_advanced",
             _notify_scrape(job, success=False)
         raise Ignore()
 
-    total = len(products_data)
-    created = 0
-    for idx, pdata in enumerate(products_data, start=1):
-        if not pdata:
-            continue
-        # Campos mínimos esperados: title, price, source
-        title = pdata.get('title') or pdata.get('name')
-        price = pdata.get('price') or pdata.get('price_numeric')
-        if title is None or price is None:
-            continue
-        try:
-            obj, was_created = Product.objects.get_or_create(
-                title=title,
-                defaults={
-                    'price': price,
-                    'original_price': pdata.get('original_price') or price,
-                    'source': pdata.get('source', source),
-                    'category': pdata.get('category') or pdata.get('category_guess') or '',
-                    'url': pdata.get('url') or '',
-                    'image_url': pdata.get('image_url') or '',
-                    'currency': pdata.get('currency') or 'USD'
-                }
-            )
-            if was_created:
-                created += 1
-        except Exception:  # noqa
-            logger.debug("Producto duplicado o error al guardar", exc_info=True)
-            continue
-
-        # Actualizar progreso cada 5 ítems o al final
-        if idx == total or idx % 5 == 0:
-            progress = round(idx / total * 100, 2) if total else 100
-            self.update_state(state=states.STARTED, meta={
-                'progress': progress,
-                'processed': idx,
-                'created': created,
-                'total': total
-            })
-            if job:
-                job.update_progress(progress=progress, processed=idx, created=created, total=total)
-
     summary = {
         "query": query,
         "source": source,
         "requested_pages": max_pages,
-        "returned_items": len(products_data),
-        "created": created
+        "returned_items": stats['received'],
+        "created": stats['created'],
+        "existing": stats['existing'],
+        "unchanged": stats['unchanged'],
+        "errors": stats['errors']
     }
     logger.info("Scraping async completado: %s", summary)
     if job:
@@ -119,6 +95,12 @@ def scrape_products_async(self, query: str, source: str = "aliexpress_advanced",
     return summary
 
 
+@shared_task(name="products.deliver_notifications")
+def deliver_notifications(max_batches: int | None = None) -> Dict[str, int]:
+    """Vacía el outbox de notificaciones por lotes (ver services.notification_outbox)."""
+    return OutboxWorker().drain(max_batches=max_batches)
+
+
 def _notify_scrape(job: ScrapeJob, success: bool):  # pragma: no cover - side effects
     """Enviar notificación Telegram/Discord si configuración disponible."""
     try:
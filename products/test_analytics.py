@@ -0,0 +1,115 @@
+"""
+Tests para las vistas de analytics del dashboard
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from unittest import skipIf
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from products.models import Product
+from products.services.histograms import (
+    MAX_BUCKETS, MAX_CUSTOM_HISTOGRAMS, MAX_TOTAL_BUCKETS, compute_histograms, numpy, parse_histogram,
+)
+
+
+class DashboardStatsViewTest(APITestCase):
+
+    def create_products(self, count, prefix, **fields):
+        # Altas una a una: el rollup diario se mantiene por señales, sin reconstruirlo
+        for i in range(count):
+            Product.objects.create(
+                title=f'{prefix} {i}',
+                price=Decimal('10.00') + i,
+                url=f'https://example.com/{prefix}-{i}',
+                category=f'Category {i % 3}',
+                source_platform=('aliexpress', 'amazon')[i % 2],
+                **fields
+            )
+
+    def test_query_count_does_not_grow_with_data(self):
+        now = timezone.now()
+        self.create_products(3, 'fresh', created_at=now - timedelta(minutes=5))
+        with self.assertNumQueries(8):
+            self.client.get(reverse('dashboard-stats'))
+
+        self.create_products(30, 'old', created_at=now - timedelta(days=3), rating=Decimal('4.5'))
+        self.create_products(30, 'older', created_at=now - timedelta(days=20))
+        with self.assertNumQueries(8):
+            response = self.client.get(reverse('dashboard-stats'))
+
+        summary = response.data['summary']
+        self.assertEqual(summary['total_products'], 63)
+        self.assertEqual(summary['products_this_week'], 33)
+        self.assertEqual(summary['products_this_month'], 63)
+        self.assertEqual(summary['max_price'], Decimal('39.00'))
+
+    def test_daily_and_hourly_series(self):
+        now = timezone.now()
+        self.create_products(2, 'now', created_at=now - timedelta(minutes=1))
+        self.create_products(4, 'day-ago', created_at=now - timedelta(hours=25))
+        self.create_products(1, 'stale', created_at=now - timedelta(days=8))
+
+        charts = self.client.get(reverse('dashboard-stats')).data['charts']
+
+        self.assertEqual(sum(item['count'] for item in charts['daily_products']), 6)
+        self.assertEqual(sum(item['count'] for item in charts['hourly_products']), 2)
+        days = [item['date'] for item in charts['daily_products']]
+        self.assertEqual(days, sorted(days))
+        self.assertIn(timezone.localtime(now - timedelta(hours=25)).date(), days)
+
+
+class ProductMetricsViewTest(APITestCase):
+
+    def setUp(self):
+        for i, (price, rating, shipping) in enumerate([
+            ('5.00', '4.80', 3), ('10.00', '4.10', 10), ('24.99', None, 20), ('150.00', '1.00', None),
+        ]):
+            Product.objects.create(
+                title=f'Metrics product {i}', price=Decimal(price), url=f'https://example.com/metrics-{i}',
+                rating=Decimal(rating) if rating else None, shipping_time=shipping
+            )
+
+    def test_distributions_in_one_query(self):
+        # Una consulta para los histogramas y otra para las palabras clave
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('product-metrics'), {'histogram': ['price:0,10,20', 'rating:4,5']})
+
+        data = response.data
+        self.assertEqual([b['count'] for b in data['price_distribution']], [1, 2, 0, 0, 1])
+        self.assertEqual(data['price_distribution'][0]['range'], '$0-$10')
+        self.assertEqual(data['rating_distribution'][0], {'rating': '1★', 'count': 1})
+        self.assertEqual([b['count'] for b in data['rating_distribution']], [1, 0, 0, 2, 0])
+        self.assertEqual([b['count'] for b in data['shipping_distribution']], [1, 1, 1, 0])
+        self.assertEqual([b['count'] for b in data['histograms']['price:0,10,20']], [1, 1])
+        self.assertEqual(data['histograms']['rating:4,5'][0]['range'], '4-5')
+
+    def test_invalid_histogram_spec(self):
+        for spec in ('title:0,1', 'price:5,1', 'price:1', 'price:a,b'):
+            response = self.client.get(reverse('product-metrics'), {'histogram': spec})
+            self.assertEqual(response.status_code, 400, spec)
+
+    def test_histogram_limits(self):
+        too_many = [f'price:0,{i + 1}' for i in range(MAX_CUSTOM_HISTOGRAMS + 1)]
+        response = self.client.get(reverse('product-metrics'), {'histogram': too_many})
+        self.assertEqual(response.status_code, 400)
+
+        # Histogramas válidos por separado que juntos superan el total de intervalos
+        too_wide = [
+            'price:' + ','.join(str(start + i) for i in range(MAX_BUCKETS + 1))
+            for start in range(MAX_TOTAL_BUCKETS // MAX_BUCKETS + 1)
+        ]
+        response = self.client.get(reverse('product-metrics'), {'histogram': too_wide})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(MAX_TOTAL_BUCKETS), response.data['error'])
+
+    @skipIf(numpy is None, 'numpy no instalado')
+    def test_numpy_engine_matches_sql(self):
+        histograms = [parse_histogram('price:0,10,25,1000'), parse_histogram('shipping_time:0,5,15,30')]
+        self.assertEqual(
+            compute_histograms(Product.objects.all(), histograms, engine='numpy'),
+            compute_histograms(Product.objects.all(), histograms, engine='sql')
+        )
@@ -0,0 +1,183 @@
+"""
+Tests para el motor de descarga asíncrono del scraper avanzado
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import urlparse, parse_qs
+
+from django.test import SimpleTestCase, override_settings
+
+from products.services.async_fetcher import AsyncPageFetcher
+from products.services.advanced_scraper import AdvancedAliExpressScraper
+from products.services.rate_limiter import get_rate_limiter
+
+
+def build_search_page(page: int, items: int = 6) -> bytes:
+    """Genera una página de resultados mínima compatible con los selectores avanzados"""
+    cards = []
+    for i in range(items):
+        item_id = page * 1000 + i
+        cards.append(
+            f'<div class="product-item">'
+            f'<a title="Wireless Bluetooth Earbuds Model {item_id}" href="/item/{item_id}.html">'
+            f'Wireless Bluetooth Earbuds Model {item_id}</a>'
+            f'<span class="price-current"><span class="price-text">$12.{i}9</span></span>'
+            f'<img src="https://ae01.alicdn.com/kf/{item_id}.jpg">'
+            f'</div>'
+        )
+    return f"<html><body>{''.join(cards)}</body></html>".encode()
+
+
+class StubSearchHandler(BaseHTTPRequestHandler):
+    """Servidor de búsqueda falso: latencia fija y 429 opcional en el primer intento"""
+    delay = 0.0
+    page_delays = {}
+    fail_first = set()
+    hits = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        page = int(query.get('page', ['1'])[0])
+        with self.lock:
+            self.hits[page] = self.hits.get(page, 0) + 1
+            first_hit = self.hits[page] == 1
+        if self.delay or page in self.page_delays:
+            time.sleep(self.page_delays.get(page, self.delay))
+        if page in self.fail_first and first_hit:
+            self.send_response(429)
+            self.end_headers()
+            return
+        body = build_search_page(page)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class AsyncFetcherTest(SimpleTestCase):
+    """Tests del AsyncPageFetcher contra un servidor HTTP local"""
+
+    def setUp(self):
+        # Cache de selectores en un directorio temporal (no la del proyecto)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.enterContext(override_settings(SCRAPER_SELECTOR_CACHE_PATH=os.path.join(directory, 'selectors.json')))
+        StubSearchHandler.delay = 0.0
+        StubSearchHandler.page_delays = {}
+        StubSearchHandler.fail_first = set()
+        StubSearchHandler.hits = {}
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubSearchHandler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}/wholesale"
+        # Presupuesto amplio para el servidor local
+        limiter = get_rate_limiter()
+        limiter.reset()
+        limiter.configure_host('127.0.0.1', rate=1000, burst=100)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        get_rate_limiter().limits.pop('127.0.0.1', None)
+
+    def test_iter_pages_runs_concurrently(self):
+        """20 páginas con latencia de 0.2s cuestan aproximadamente una latencia"""
+        StubSearchHandler.delay = 0.2
+        urls = [f"{self.base}?page={page}" for page in range(1, 21)]
+
+        with AsyncPageFetcher(concurrency=20) as fetcher:
+            start = time.monotonic()
+            results = list(fetcher.iter_pages(urls))
+            elapsed = time.monotonic() - start
+
+        self.assertEqual(sorted(url for url, _ in results), sorted(urls))
+        self.assertTrue(all(content for _, content in results))
+        self.assertLess(elapsed, 2.0)
+
+    def test_retry_after_rate_limit(self):
+        """Un 429 se reintenta con backoff no bloqueante"""
+        StubSearchHandler.fail_first = {2}
+
+        with AsyncPageFetcher(concurrency=4, backoff_base=0.01) as fetcher:
+            results = list(fetcher.iter_pages([f"{self.base}?page={page}" for page in (1, 2)]))
+
+            self.assertTrue(all(content for _, content in results))
+            self.assertEqual(fetcher.stats['retries'], 1)
+        self.assertEqual(StubSearchHandler.hits[2], 2)
+
+    def test_session_reused_between_crawls(self):
+        """El mismo cliente se reutiliza en llamadas sucesivas"""
+        fetcher = AsyncPageFetcher(concurrency=2)
+        try:
+            list(fetcher.iter_pages([f"{self.base}?page=1"]))
+            session = fetcher._session
+            list(fetcher.iter_pages([f"{self.base}?page=2"]))
+            self.assertIs(fetcher._session, session)
+        finally:
+            fetcher.close()
+
+    def test_scraper_async_engine(self):
+        """scrape_products_advanced(engine='async') extrae productos de todas las páginas"""
+        # Sin cache en disco para que cada ejecución vaya al servidor local
+        with mock.patch('products.services.advanced_scraper.get_http_cache', return_value=None), \
+                mock.patch('products.services.http_cache.get_http_cache', return_value=None):
+            scraper = AdvancedAliExpressScraper(async_concurrency=4)
+        scraper.search_url = self.base
+        try:
+            result = scraper.scrape_products_advanced(
+                search_term='earbuds', count=10, max_pages=2, engine='async'
+            )
+        finally:
+            scraper.close()
+
+        self.assertTrue(result.success)
+        self.assertFalse(result.metadata['fallback_used'])
+        self.assertEqual(result.metadata['engine'], 'async')
+        self.assertEqual(len(result.products), 10)
+        urls = {product['url'] for product in result.products}
+        self.assertTrue(any('/item/1000.html' in url for url in urls))
+        self.assertTrue(any('/item/2000.html' in url for url in urls))
+
+    def test_iter_pages_yields_as_completed(self):
+        """iter_pages entrega cada página al terminar, sin esperar a la más lenta"""
+        StubSearchHandler.page_delays = {1: 0.6}
+        urls = [f"{self.base}?page={page}" for page in (1, 2, 3)]
+
+        with AsyncPageFetcher(concurrency=3) as fetcher:
+            order = [url for url, _ in fetcher.iter_pages(urls)]
+
+        self.assertEqual(order[-1], urls[0])
+        self.assertEqual(sorted(order), sorted(urls))
+
+    def test_scraper_streams_first_page(self):
+        """iter_product_pages entrega la primera página antes de que termine el crawl"""
+        StubSearchHandler.page_delays = {2: 1.0, 3: 1.0}
+        with mock.patch('products.services.advanced_scraper.get_http_cache', return_value=None), \
+                mock.patch('products.services.http_cache.get_http_cache', return_value=None):
+            scraper = AdvancedAliExpressScraper(async_concurrency=4)
+        scraper.search_url = self.base
+        try:
+            start = time.monotonic()
+            pages = scraper.iter_product_pages(search_term='earbuds', count=15, max_pages=3, engine='async')
+            first_page = next(pages)
+            first_page_at = time.monotonic() - start
+            rest = [product for page in pages for product in page]
+        finally:
+            scraper.close()
+
+        self.assertLess(first_page_at, 0.8)
+        self.assertEqual(len(first_page), 5)
+        self.assertEqual(len(first_page) + len(rest), 15)
+        self.assertTrue(all(product['url'] for product in first_page + rest))
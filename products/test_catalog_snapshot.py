@@ -0,0 +1,141 @@
+"""
+Tests para la instantánea columnar del catálogo (services/catalog_snapshot.py)
+"""
+
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipIf
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from products.models import Product
+from products.services import catalog_snapshot
+from products.services.catalog_snapshot import build_catalog_snapshot, get_catalog_snapshot
+from products.services.filters import create_filter_from_params
+from products.services.histograms import Histogram, compute_histograms
+
+
+def create_catalog():
+    rows = [
+        ('Wireless earbuds', '19.99', '4.50', 7, 'Electronics', 'aliexpress', 0),
+        ('Phone case', '5.00', '3.95', 15, 'Phone Accessories', 'aliexpress', 3),
+        ('Desk lamp', '34.10', None, None, None, 'amazon', 10),
+        ('USB charger', '10.01', '4.00', 3, '', 'temu', 1),
+    ]
+    for i, (title, price, rating, shipping, category, platform, age) in enumerate(rows):
+        Product.objects.create(
+            title=title, price=Decimal(price), rating=Decimal(rating) if rating else None,
+            shipping_time=shipping, category=category, source_platform=platform,
+            url=f'https://example.com/snapshot-{i}', created_at=timezone.now() - timedelta(days=age),
+        )
+
+
+class SnapshotTestMixin:
+
+    def setUp(self):
+        super().setUp()
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.settings_override = override_settings(CATALOG_SNAPSHOT_DIR=str(self.directory))
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+
+@skipIf(catalog_snapshot.numpy is None, 'numpy no instalado')
+class CatalogSnapshotTest(SnapshotTestMixin, TestCase):
+
+    def test_build_publishes_versions_and_prunes(self):
+        self.assertIsNone(get_catalog_snapshot())
+        create_catalog()
+        first = build_catalog_snapshot(keep=1)
+        snapshot = get_catalog_snapshot()
+        self.assertEqual((snapshot.version, snapshot.rows), (first['version'], 4))
+        self.assertEqual(snapshot.query().ids(), sorted(Product.objects.values_list('id', flat=True)))
+
+        Product.objects.filter(title='Desk lamp').delete()
+        call_command('build_catalog_snapshot', '--keep', '1', verbosity=0)
+        self.assertEqual(get_catalog_snapshot().rows, 3)
+        self.assertEqual(len(list(self.directory.glob('snapshot-*'))), 1)
+        # La versión anterior sigue legible desde el mapeo ya abierto
+        self.assertEqual(snapshot.query().count(), 4)
+
+        self.assertIsNone(get_catalog_snapshot(max_age=-1))
+
+    def test_failed_build_leaves_no_staging_files(self):
+        create_catalog()
+        first = build_catalog_snapshot()
+        with mock.patch.object(catalog_snapshot, '_epoch_us', side_effect=RuntimeError('disco lleno')):
+            with self.assertRaises(RuntimeError):
+                build_catalog_snapshot()
+        self.assertEqual([path.name for path in self.directory.iterdir() if path.name.startswith('.')], [])
+        self.assertEqual(get_catalog_snapshot().version, first['version'])
+
+    def test_filters_match_queryset(self):
+        create_catalog()
+        build_catalog_snapshot()
+        snapshot = get_catalog_snapshot()
+        cases = [
+            {'min_price': '9.99', 'max_price': '20'},
+            {'max_price': '9.99'},
+            {'min_rating': '4'},
+            {'max_shipping_days': '7'},
+            {'platforms': 'AliExpress,temu'},
+            {'categories': 'electro,phone'},
+            {'min_price': '1', 'platforms': 'aliexpress', 'min_rating': '4.5'},
+        ]
+        for params in cases:
+            product_filter = create_filter_from_params(**params)
+            expected = sorted(product_filter.filter_queryset(Product.objects.all()).values_list('id', flat=True))
+            self.assertEqual(snapshot.query(product_filter).ids(), expected, params)
+
+        self.assertIsNone(snapshot.query(create_filter_from_params(keywords='lamp')))
+
+    def test_histogram_engine_matches_sql(self):
+        create_catalog()
+        build_catalog_snapshot()
+        histograms = [
+            Histogram(name='price', field='price', edges=(Decimal('0'), Decimal('9.995'), Decimal('20'), Decimal('100'))),
+            Histogram(name='rating', field='rating', edges=(Decimal('3.95'), Decimal('4.5'), Decimal('5.01'))),
+            Histogram(name='shipping', field='shipping_time', edges=(Decimal('0'), Decimal('7'), Decimal('30'))),
+        ]
+        with self.assertNumQueries(0):
+            snapshot = compute_histograms(Product.objects.all(), histograms, engine='snapshot')
+        self.assertEqual(snapshot, compute_histograms(Product.objects.all(), histograms, engine='sql'))
+
+        # Con filtros se usa SQL
+        filtered = Product.objects.filter(source_platform='amazon')
+        self.assertEqual(
+            compute_histograms(filtered, histograms, engine='snapshot'),
+            compute_histograms(filtered, histograms, engine='sql')
+        )
+
+
+@skipIf(catalog_snapshot.numpy is None, 'numpy no instalado')
+class SnapshotStatsEndpointTest(SnapshotTestMixin, APITestCase):
+
+    def test_stats_match_database(self):
+        create_catalog()
+        url = reverse('product-stats')
+        for params in ({}, {'platforms': 'aliexpress'}, {'min_rating': '4'}):
+            from_database = self.client.get(url, params).data
+            build_catalog_snapshot()
+            with self.assertNumQueries(0):
+                from_snapshot = self.client.get(url, params).data
+            self.assertEqual(set(from_snapshot.pop('platforms')), set(from_database.pop('platforms')))
+            self.assertEqual(set(from_snapshot.pop('categories')), set(from_database.pop('categories')))
+            self.assertEqual(from_snapshot, from_database)
+            shutil.rmtree(self.directory)
+            self.directory.mkdir()
+
+        # Las palabras clave necesitan el índice de texto completo
+        build_catalog_snapshot()
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        self.assertEqual(self.client.get(url, {'keywords': 'lamp'}).data['total_products'], 1)
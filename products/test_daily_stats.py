@@ -0,0 +1,139 @@
+"""
+Tests para el rollup diario de productos (ProductDailyStats)
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from products.models import Product, ProductDailyStats
+from products.services.daily_stats import rebuild_daily_stats
+from products.services.product_manager import ProductManager
+from products.services.retention import RetentionPolicy, RetentionRunner
+
+
+def snapshot():
+    return sorted(
+        ProductDailyStats.objects.values_list(
+            'date', 'category', 'source_platform', 'product_count',
+            'price_sum', 'price_min', 'price_max', 'rating_sum', 'rating_count'
+        )
+    )
+
+
+def product_data(i, **overrides):
+    data = {
+        'title': f'Rollup product {i}',
+        'price': str(Decimal('5.00') + i),
+        'url': f'https://example.com/rollup-{i}',
+        'category': ('Audio', 'Home', None)[i % 3],
+        'source_platform': ('aliexpress', 'amazon')[i % 2],
+        'rating': '4.50' if i % 2 else None,
+    }
+    data.update(overrides)
+    return data
+
+
+class DailyStatsMaintenanceTest(TestCase):
+
+    def test_ingestion_matches_rebuild(self):
+        ProductManager.bulk_create_or_update_products([product_data(i) for i in range(9)], batch_size=4)
+        incremental = snapshot()
+        self.assertEqual(sum(row[3] for row in incremental), 9)
+
+        rebuild_daily_stats()
+        self.assertEqual(snapshot(), incremental)
+
+    def test_updates_refresh_touched_groups(self):
+        ProductManager.bulk_create_or_update_products([product_data(i) for i in range(6)])
+        ProductManager.bulk_create_or_update_products(
+            [product_data(0, price='99.00', category='Garden'), product_data(3, price='1.00')],
+            update_existing=True
+        )
+        incremental = snapshot()
+
+        rebuild_daily_stats()
+        self.assertEqual(snapshot(), incremental)
+        self.assertTrue(ProductDailyStats.objects.filter(category='Garden', price_max=Decimal('99.00')).exists())
+
+    def test_per_row_fallback_path(self):
+        ProductManager.upsert_product(product_data(1))
+        ProductManager.upsert_product(product_data(1, price='50.00'), update_existing=True)
+        row = ProductDailyStats.objects.get()
+        self.assertEqual((row.product_count, row.price_sum), (1, Decimal('50.00')))
+
+    def test_rebuild_command_since(self):
+        old = timezone.now() - timedelta(days=10)
+        Product.objects.create(title='Old', price=Decimal('3.00'), url='https://example.com/old', created_at=old)
+        Product.objects.create(title='New', price=Decimal('4.00'), url='https://example.com/new')
+        ProductDailyStats.objects.all().delete()
+        call_command('rebuild_daily_stats', '--days', '2', verbosity=0)
+        self.assertEqual(ProductDailyStats.objects.get().price_sum, Decimal('4.00'))
+
+        call_command('rebuild_daily_stats', verbosity=0)
+        self.assertEqual(ProductDailyStats.objects.count(), 2)
+
+
+class RollupSyncTest(APITestCase):
+    """El rollup sigue al catálogo con escrituras de la API, retención y deduplicación"""
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('editor', password='secret'))
+
+    def test_api_writes_and_deletions_keep_dashboard_in_sync(self):
+        ProductManager.bulk_create_or_update_products([product_data(i) for i in range(4)])
+        response = self.client.post(reverse('product-list'), {
+            'title': 'Api lamp', 'price': '12.00', 'url': 'https://example.com/api-lamp',
+            'category': 'Home', 'source_platform': 'amazon',
+        })
+        self.assertEqual(response.status_code, 201)
+        product = Product.objects.get(url='https://example.com/api-lamp')
+        response = self.client.patch(
+            reverse('product-detail', args=[product.pk]), {'category': 'Garden', 'price': '20.00'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.client.delete(reverse('product-detail', args=[Product.objects.get(url='https://example.com/rollup-0').pk]))
+
+        Product.objects.create(
+            title='Stale lamp', price=Decimal('7.00'), url='https://example.com/stale',
+            created_at=timezone.now() - timedelta(days=40)
+        )
+        for i in range(2):
+            Product.objects.create(title='Twin lamp', price=Decimal('9.00'), url=f'https://example.com/twin-{i}')
+        RetentionRunner(policies=[RetentionPolicy(None, 30)]).run()
+        self.assertEqual(ProductManager.deduplicate_products(fields=('source_platform', 'title'))['removed'], 1)
+
+        charts = self.client.get(reverse('dashboard-stats')).data['charts']
+        self.assertEqual(Product.objects.count(), 5)
+        self.assertEqual(sum(item['count'] for item in charts['daily_products']), 5)
+        self.assertTrue(ProductDailyStats.objects.filter(category='Garden', price_sum=Decimal('20.00')).exists())
+
+        incremental = snapshot()
+        rebuild_daily_stats()
+        self.assertEqual(snapshot(), incremental)
+
+
+class TrendAnalysisRollupTest(APITestCase):
+
+    def test_trends_read_rollup_with_constant_queries(self):
+        ProductManager.bulk_create_or_update_products([product_data(i) for i in range(6)])
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('trend-analysis'), {'days': 7})
+
+        data = response.data
+        self.assertEqual(sum(item['count'] for item in data['scraping_velocity']), 6)
+        self.assertEqual([item['count'] for item in data['category_trends']['Audio']], [2])
+        # Audio: precios 5.00 y 8.00
+        self.assertEqual(data['price_trends']['Audio'][0]['avg_price'], Decimal('6.50'))
+
+        ProductManager.bulk_create_or_update_products(
+            [product_data(i, category=f'Extra {i}') for i in range(10, 20)]
+        )
+        with self.assertNumQueries(2):
+            self.client.get(reverse('trend-analysis'), {'days': 7})
@@ -0,0 +1,91 @@
+"""
+Tests para el router de réplica de lectura
+
+La réplica es el alias ``replica`` con ``TEST={'MIRROR': 'default'}``, como en
+producción: apunta a la misma base de datos de test, así que cada lectura se
+atribuye por las consultas capturadas en cada conexión.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITransactionTestCase
+
+from products.db_router import PIN_COOKIE, REPLICA_ALIAS
+from products.models import Product
+
+
+@override_settings(DATABASE_REPLICA_URL='sqlite:///replica.sqlite3', DATABASE_REPLICA_LAG_SECONDS=30)
+class ReplicaRouterTest(APITransactionTestCase):
+    # Transaccional: la conexión de la réplica es otra y debe ver las filas confirmadas
+    databases = {'default'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # DATABASE_REPLICA_URL no está configurada al ejecutar los tests: alias
+        # espejo de la base de datos de test (como TEST['MIRROR']) solo en esta clase
+        cls.added_replica = REPLICA_ALIAS not in connections.settings
+        if cls.added_replica:
+            primary = connections['default'].settings_dict
+            connections.settings[REPLICA_ALIAS] = dict(primary, TEST=dict(primary['TEST'], MIRROR='default'))
+        # Los espejos no se vacían entre tests; basta con permitir la conexión
+        cls.databases = cls.databases | {REPLICA_ALIAS}
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.added_replica:
+            connections[REPLICA_ALIAS].close()
+            del connections[REPLICA_ALIAS]
+            del connections.settings[REPLICA_ALIAS]
+        super().tearDownClass()
+
+    def setUp(self):
+        Product.objects.create(title='Catalog product', price=Decimal('10.00'), url='https://example.com/catalog')
+
+    def product_reads(self, client, name='product-list'):
+        """Consultas a products_product de una petición GET, por conexión"""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica:
+            response = client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        return {
+            alias: sum('products_product' in query['sql'] for query in captured.captured_queries)
+            for alias, captured in (('default', primary), (REPLICA_ALIAS, replica))
+        }
+
+    def test_analytics_and_list_read_from_replica(self):
+        for name in ('product-list', 'dashboard-stats'):
+            reads = self.product_reads(self.client, name)
+            self.assertEqual(reads['default'], 0, name)
+            self.assertGreater(reads[REPLICA_ALIAS], 0, name)
+        # Fuera de las vistas marcadas se lee del primario
+        with CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica:
+            self.assertEqual(Product.objects.get().title, 'Catalog product')
+        self.assertEqual(len(replica), 0)
+
+    def test_client_reads_its_own_writes(self):
+        self.client.force_authenticate(User.objects.create_user('writer', password='secret'))
+        response = self.client.post(
+            reverse('product-list'),
+            {'title': 'Fresh product', 'price': '3.00', 'url': 'https://example.com/fresh'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        reads = self.product_reads(self.client)
+        self.assertEqual(reads[REPLICA_ALIAS], 0)
+        self.assertGreater(reads['default'], 0)
+        # Otro cliente sin la cookie sigue leyendo de la réplica
+        self.assertEqual(self.product_reads(self.client_class())['default'], 0)
+
+    @override_settings(DATABASE_REPLICA_URL='')
+    def test_disabled_without_replica_url(self):
+        reads = self.product_reads(self.client)
+        self.assertEqual(reads[REPLICA_ALIAS], 0)
+        self.assertGreater(reads['default'], 0)
@@ -0,0 +1,69 @@
+"""
+Tests para los planes de extracción compilados del scraper avanzado
+"""
+
+from django.test import SimpleTestCase
+
+from products.management.commands.benchmark_parser import build_benchmark_page
+from products.services.advanced_scraper import AdvancedAliExpressScraper
+from products.services.extraction_plan import ExtractionPlan, rightmost_tag
+from products.services.html_parser import parse_html
+
+MIXED_CARDS = b"""
+<html><body>
+<div class="gallery-item">
+  <h3><a href="//www.aliexpress.com/item/1.html">Mechanical Gaming Keyboard RGB</a></h3>
+  <span class="price-sale"><span class="price-value">$25.10</span></span>
+  <img data-src="//ae01.alicdn.com/kf/1.jpg">
+</div>
+<div class="gallery-item">
+  <a title="Wireless Optical Mouse 2.4GHz" href="/item/2.html">Mouse</a>
+  <div class="price-current"><span class="price-text">US $4.99</span></div>
+  <img src="//ae01.alicdn.com/kf/2.jpg"><span class="rate-num">4.7</span>
+</div>
+<div class="gallery-item">
+  <a title="" href="/item/3.html"><span>USB-C Charging Cable 2m</span></a>
+  <p>Oferta 3.20$</p>
+</div>
+</body></html>
+"""
+
+
+class ExtractionPlanTest(SimpleTestCase):
+    """Tests del plan compilado frente a la extracción selector a selector"""
+
+    def setUp(self):
+        self.scraper = AdvancedAliExpressScraper()
+
+    def tearDown(self):
+        self.scraper.close()
+
+    def test_rightmost_tag(self):
+        self.assertEqual(rightmost_tag('h3 a[href*="/item/"]'), 'a')
+        self.assertEqual(rightmost_tag('img[alt]:not([alt=""])[src*="http"]'), 'img')
+        self.assertEqual(rightmost_tag('span[data-pl="price.minPrice"]'), 'span')
+        self.assertIsNone(rightmost_tag('.price .num'))
+
+    def test_plan_matches_selector_by_selector_extraction(self):
+        """Cada tarjeta produce los mismos campos con y sin plan"""
+        plan = ExtractionPlan(self.scraper._extraction_fields())
+        cards = parse_html(MIXED_CARDS).select('.gallery-item')
+
+        for card in cards:
+            expected = self.scraper._extract_fields_with_selectors(card)
+            self.assertEqual(plan.extract(card), expected)
+
+    def test_memoized_fields_use_fast_path(self):
+        """En un layout homogéneo casi todas las tarjetas van por el camino rápido"""
+        plan = ExtractionPlan(self.scraper._extraction_fields())
+        cards = parse_html(build_benchmark_page(items=30, noise=0)).select('.product-item')
+
+        products = [self.scraper._extract_single_product_advanced(card, 'earbuds', plan) for card in cards]
+        legacy = [self.scraper._extract_single_product_advanced(card, 'earbuds') for card in cards]
+
+        self.assertEqual(
+            [(p['title'], p['price'], p['url'], p['image']) for p in products],
+            [(p['title'], p['price'], p['url'], p['image']) for p in legacy]
+        )
+        self.assertEqual(plan.memoized()['title'], ('a[title]:not([title=""])', 'text'))
+        self.assertGreater(plan.get_stats()['fast_path_rate'], 0.8)
@@ -0,0 +1,86 @@
+"""
+Tests para el parseo HTML configurable de los scrapers
+"""
+
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from products.management.commands.benchmark_parser import build_benchmark_page
+from products.services.advanced_scraper import AdvancedAliExpressScraper
+from products.services.html_parser import (
+    build_container_strainer,
+    get_parser_backend,
+    parse_html,
+    parse_product_containers,
+)
+
+
+PAGE = b"""
+<html><body>
+<nav><a href="/category/1.html">Categorias</a></nav>
+<div class="search-results">
+  <div class="list-item big" data-sku="1"><a href="/item/1.html" title="Mouse">Mouse</a><span>$3.50</span></div>
+  <li data-sku-id="2"><a href="/item/2.html">Teclado</a></li>
+  <div class="card product-box"><img src="/a.jpg"></div>
+</div>
+<footer><p>Ayuda</p></footer>
+</body></html>
+"""
+
+
+class ContainerStrainerTest(SimpleTestCase):
+    """Tests del parseo parcial de contenedores"""
+
+    def test_strained_select_matches_full_document(self):
+        """Cada selector devuelve lo mismo con y sin parseo parcial"""
+        selectors = ['.list-item', 'li[data-sku-id]', 'div[class*="product"]:has(img)', 'a[href*="/item/"]']
+        full = parse_html(PAGE, backend='html.parser')
+
+        for backend in ('lxml', 'html.parser'):
+            strained = parse_product_containers(PAGE, selectors, backend=backend, strain=True)
+            for selector in selectors:
+                self.assertEqual(
+                    [str(el) for el in strained.select(selector)],
+                    [str(el) for el in full.select(selector)],
+                    f'{backend} {selector}'
+                )
+            self.assertEqual(strained.select('nav, footer'), [])
+
+    def test_descendant_selectors_disable_strainer(self):
+        """Los selectores que dependen de ancestros obligan a parsear todo"""
+        self.assertIsNone(build_container_strainer(['.item', 'div.results a']))
+        self.assertIsNotNone(build_container_strainer(['.item', 'div[data-item-id]']))
+
+    def test_unknown_backend_falls_back(self):
+        self.assertEqual(get_parser_backend('selectolax'), 'html.parser')
+
+
+class AdvancedScraperParsingTest(SimpleTestCase):
+    """El scraper avanzado extrae lo mismo con cualquier backend"""
+
+    def setUp(self):
+        # Cache de selectores en un directorio temporal (no la del proyecto)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.enterContext(override_settings(SCRAPER_SELECTOR_CACHE_PATH=os.path.join(directory, 'selectors.json')))
+
+    def test_same_products_for_every_backend(self):
+        page = build_benchmark_page(items=12, noise=20)
+        scraper = AdvancedAliExpressScraper()
+        selectors = scraper.advanced_selectors['product_containers']
+        try:
+            results = []
+            for backend in ('lxml', 'html.parser'):
+                for strain in (False, True):
+                    soup = parse_product_containers(page, selectors, backend=backend, strain=strain)
+                    products = scraper._extract_products_with_advanced_selectors(soup, 100, 'earbuds')
+                    results.append([(p['title'], p['price'], p['url']) for p in products])
+        finally:
+            scraper.close()
+
+        self.assertEqual(len(results[0]), 12)
+        for result in results[1:]:
+            self.assertEqual(result, results[0])
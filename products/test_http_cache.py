@@ -0,0 +1,158 @@
+"""
+Tests para la cache HTTP en disco de los scrapers
+"""
+
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from products.services import http_cache
+from products.services.http_cache import DiskHTTPCache, install_http_cache, normalize_url
+from products.services.rate_limiter import get_rate_limiter
+
+
+class ETagHandler(BaseHTTPRequestHandler):
+    """Servidor falso con ETag: responde 304 si If-None-Match coincide"""
+    etag = '"v1"'
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        if self.path.startswith('/blocked'):
+            body = b'<html><script src="/_____tmd_____/punish?x5secdata=abc"></script></html>'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.send_header('ETag', self.etag)
+            self.end_headers()
+            return
+        body = f"<html><body>page {self.path}</body></html>".encode() * 50
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('ETag', self.etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class NormalizeUrlTest(SimpleTestCase):
+    """Tests de la normalización de claves"""
+
+    def test_query_order_and_tracking_params(self):
+        a = normalize_url('HTTPS://www.AliExpress.com/wholesale?page=2&SearchText=mouse&spm=a2g0o&utm_source=x#top')
+        b = normalize_url('https://www.aliexpress.com:443/wholesale?SearchText=mouse&page=2')
+        self.assertEqual(a, b)
+
+    def test_protocol_relative(self):
+        self.assertEqual(
+            normalize_url('//www.aliexpress.com/item/1.html'),
+            'https://www.aliexpress.com/item/1.html'
+        )
+
+
+class DiskHTTPCacheTest(SimpleTestCase):
+    """Tests del adaptador con cache en disco contra un servidor local"""
+
+    def setUp(self):
+        ETagHandler.hits = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ETagHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.directory = tempfile.mkdtemp()
+        self.cache = DiskHTTPCache(self.directory, ttl=60)
+        self.session = install_http_cache(requests.Session(), self.cache)
+        get_rate_limiter().configure_host('127.0.0.1', rate=1000, burst=100)
+
+    def tearDown(self):
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        get_rate_limiter().limits.pop('127.0.0.1', None)
+
+    def test_repeat_within_ttl_skips_network(self):
+        """Una URL repetida dentro del TTL no genera petición"""
+        first = self.session.get(f"{self.base}/wholesale?SearchText=mouse&page=1")
+        second = self.session.get(f"{self.base}/wholesale?page=1&SearchText=mouse")
+
+        self.assertEqual(ETagHandler.hits, 1)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second.headers['X-Cache'], 'HIT')
+        self.assertEqual(self.cache.get_stats()['hits'], 1)
+        self.assertEqual(self.cache.get_stats()['misses'], 1)
+
+    def test_stale_entry_revalidated_with_etag(self):
+        """Una entrada caducada se revalida y un 304 reutiliza el cuerpo guardado"""
+        url = f"{self.base}/wholesale?page=1"
+        first = self.session.get(url)
+        self.cache.ttl = 0
+
+        second = self.session.get(url)
+
+        self.assertEqual(ETagHandler.hits, 2)
+        self.assertEqual(second.headers['X-Cache'], 'REVALIDATED')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(self.cache.get_stats()['revalidated'], 1)
+
+    def test_bodies_stored_compressed(self):
+        """Los cuerpos se guardan comprimidos"""
+        response = self.session.get(f"{self.base}/wholesale?page=1")
+        self.assertLess(self.cache.size_bytes(), len(response.content))
+
+    def test_lru_eviction(self):
+        """Al superar el tamaño máximo se expulsa la entrada menos usada"""
+        self.cache.max_bytes = 10 ** 9
+        urls = [f"{self.base}/wholesale?page={page}" for page in range(1, 4)]
+        for url in urls:
+            self.session.get(url)
+            time.sleep(0.01)
+        # Acceder a la página 1 la convierte en la más reciente
+        self.session.get(urls[0])
+        entry_size = self.cache.size_bytes() // 3
+        self.cache.max_bytes = entry_size * 2 + entry_size // 2
+
+        self.cache.evict()
+
+        self.assertIsNotNone(self.cache.get(urls[0]))
+        self.assertIsNone(self.cache.get(urls[1]))
+        self.assertIsNotNone(self.cache.get(urls[2]))
+        self.assertEqual(self.cache.get_stats()['evictions'], 1)
+
+    def test_block_pages_not_cached(self):
+        """Un captcha servido con 200 no se guarda: la siguiente petición vuelve a la red"""
+        for _ in range(2):
+            response = self.session.get(f"{self.base}/blocked?page=1")
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(ETagHandler.hits, 2)
+        self.assertIsNone(self.cache.get(f"{self.base}/blocked?page=1"))
+        self.assertEqual(self.cache.get_stats()['blocked'], 2)
+
+    def test_directory_scanned_only_when_needed(self):
+        """El tamaño se lleva en memoria: no se recorre el directorio en cada escritura"""
+        with mock.patch.object(self.cache, 'evict', wraps=self.cache.evict) as evict, \
+                mock.patch.object(http_cache, 'RESCAN_EVERY', 5):
+            for page in range(1, 8):
+                self.session.get(f"{self.base}/wholesale?page={page}")
+            # Primer recorrido al empezar y otro tras 5 escrituras
+            self.assertEqual(evict.call_count, 2)
+
+            self.cache.max_bytes = self.cache.size_bytes()
+            self.session.get(f"{self.base}/wholesale?page=8")
+            self.assertEqual(evict.call_count, 3)
+        self.assertGreaterEqual(self.cache.get_stats()['evictions'], 1)
+        self.assertLessEqual(self.cache.size_bytes(), self.cache.max_bytes)
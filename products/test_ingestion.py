@@ -0,0 +1,85 @@
+"""
+Tests para la etapa de ingesta compartida (tarea Celery, cron y comandos)
+"""
+
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from products.models import Product, ScrapeJob
+from products.services.product_manager import ProductIngestion, map_product_fields
+
+
+class FakeScraper:
+    """Scraper con páginas fijas y los nombres de campo alternativos de algunos scrapers"""
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    def iter_product_pages(self, search_term, max_pages=1):
+        yield from self.pages[:max_pages]
+
+
+def legacy_item(i, **extra):
+    item = {
+        'name': f'Legacy Product {i}',
+        'price_numeric': '12.50',
+        'original_price': '20.00',
+        'currency': 'USD',
+        'image_url': f'https://ae01.alicdn.com/kf/{i}.jpg',
+        'url': f'https://www.aliexpress.com/item/{i}.html',
+    }
+    item.update(extra)
+    return item
+
+
+class ProductIngestionTest(TestCase):
+    """Tests del mapeo, la deduplicación y la escritura por bloques"""
+
+    def test_map_product_fields(self):
+        mapped = map_product_fields(legacy_item(1), source_platform='aliexpress_advanced')
+
+        self.assertEqual(mapped['title'], 'Legacy Product 1')
+        self.assertEqual(mapped['price'], '12.50')
+        self.assertEqual(mapped['image'], 'https://ae01.alicdn.com/kf/1.jpg')
+        self.assertEqual(mapped['source_platform'], 'aliexpress_advanced')
+        # El nombre canónico gana y la plataforma del item se respeta
+        mapped = map_product_fields({'title': 'Real', 'name': 'Alias', 'source_platform': 'aliexpress'}, 'other')
+        self.assertEqual((mapped['title'], mapped['source_platform']), ('Real', 'aliexpress'))
+
+    def test_dedup_and_chunked_writes(self):
+        chunks = []
+        ingestion = ProductIngestion(chunk_size=2, on_chunk=chunks.append)
+        ingestion.extend([legacy_item(1), legacy_item(2), legacy_item(1), legacy_item(3), {'title': 'x'}])
+        stats = ingestion.flush()
+
+        self.assertEqual(Product.objects.count(), 3)
+        self.assertEqual([chunk['created'] for chunk in chunks], [2, 3])
+        self.assertEqual(stats['received'], 5)
+        self.assertEqual(stats['existing'], 1)
+        self.assertEqual(stats['errors'], 1)
+        product = Product.objects.get(url='https://www.aliexpress.com/item/1.html')
+        self.assertEqual(product.price, Decimal('12.50'))
+        self.assertEqual(product.image, 'https://ae01.alicdn.com/kf/1.jpg')
+
+    @patch('products.tasks._notify_scrape')
+    def test_celery_task_persists_mapped_items(self, mock_notify):
+        """La tarea guarda los items con campos alternativos y reporta progreso por bloque"""
+        from products.tasks import scrape_products_async
+
+        job = ScrapeJob.objects.create(query='mouse', source='fake', requested_pages=2)
+        scraper = FakeScraper([[legacy_item(1), legacy_item(2)], [legacy_item(2), legacy_item(3)]])
+
+        with patch('products.tasks.ScraperFactory.get_scraper', return_value=scraper), \
+                patch.object(scrape_products_async, 'update_state') as update_state:
+            summary = scrape_products_async.run(query='mouse', source='fake', max_pages=2, job_id=str(job.id))
+
+        self.assertEqual(summary['returned_items'], 4)
+        self.assertEqual(summary['created'], 3)
+        self.assertEqual(summary['existing'], 1)
+        self.assertEqual(Product.objects.filter(source_platform='fake').count(), 3)
+        self.assertEqual([c.kwargs['meta']['progress'] for c in update_state.call_args_list], [50.0, 100.0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, ScrapeJob.Status.SUCCESS)
+        self.assertEqual(job.created_items, 3)
@@ -0,0 +1,112 @@
+"""
+Tests para el outbox de notificaciones y su worker de entrega
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from products.models import NotificationOutbox, Product
+from products.services.notification_outbox import OutboxWorker
+from products.services.product_manager import ProductManager
+
+
+class FakeManager:
+    """NotificationManager con servicios simulados; ``failing`` falla siempre"""
+
+    def __init__(self, failing=()):
+        self.active_services = {'telegram': object(), 'discord': object()}
+        self.failing = set(failing)
+        self.calls = []
+
+    def notify_new_product(self, product, services=None):
+        self.calls.append((product.url, tuple(services)))
+        return {
+            name: {'sent': name not in self.failing, 'filtered': False, 'error': 'HTTP 500'}
+            for name in services
+        }
+
+
+class NotificationOutboxTest(TestCase):
+    """Tests del encolado transaccional y la entrega con reintentos"""
+
+    def create_product(self, i=1):
+        return Product.objects.create(title=f'Outbox Product {i}', price=Decimal('9.99'),
+                                      url=f'https://example.com/outbox-{i}')
+
+    @patch('requests.post')
+    def test_new_product_is_enqueued_without_http(self, mock_post):
+        product = self.create_product()
+
+        entry = NotificationOutbox.objects.get()
+        self.assertEqual(entry.product, product)
+        self.assertEqual(entry.status, NotificationOutbox.Status.PENDING)
+        mock_post.assert_not_called()
+
+    def test_bulk_ingest_enqueues_once_per_created_product(self):
+        rows = [{'title': f'Bulk {i}', 'price': '5.00', 'url': f'https://example.com/bulk-{i}'} for i in range(3)]
+        ProductManager.bulk_create_or_update_products(rows)
+        ProductManager.bulk_create_or_update_products(rows)
+
+        self.assertEqual(NotificationOutbox.objects.count(), 3)
+
+    def test_delivery_marks_sent(self):
+        self.create_product()
+        manager = FakeManager()
+
+        stats = OutboxWorker(manager=manager).drain()
+
+        self.assertEqual(stats['sent'], 1)
+        entry = NotificationOutbox.objects.get()
+        self.assertEqual(entry.status, NotificationOutbox.Status.SENT)
+        self.assertEqual(sorted(entry.delivered), ['discord', 'telegram'])
+        self.assertIsNotNone(entry.sent_at)
+
+    def test_retry_only_failed_service_then_give_up(self):
+        self.create_product()
+        manager = FakeManager(failing={'discord'})
+        worker = OutboxWorker(manager=manager, max_attempts=2, retry_base_seconds=60)
+
+        self.assertEqual(worker.run_once()['retry'], 1)
+        entry = NotificationOutbox.objects.get()
+        self.assertEqual(entry.delivered, ['telegram'])
+        self.assertGreater(entry.available_at, timezone.now())
+        # Mientras no vence la espera no se vuelve a tomar
+        self.assertEqual(worker.run_once()['claimed'], 0)
+
+        NotificationOutbox.objects.update(available_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(worker.run_once()['failed'], 1)
+
+        self.assertEqual(manager.calls[1][1], ('discord',))
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, NotificationOutbox.Status.FAILED)
+        self.assertEqual(entry.attempts, 2)
+        self.assertIn('discord', entry.last_error)
+
+    def test_claimed_rows_are_leased(self):
+        """Un lote reservado no lo toma otro worker hasta que caduca la reserva"""
+        self.create_product(1)
+        self.create_product(2)
+
+        claimed = OutboxWorker(manager=FakeManager(), batch_size=10).claim()
+
+        self.assertEqual(len(claimed), 2)
+        self.assertEqual(OutboxWorker(manager=FakeManager()).claim(), [])
+
+    def test_expired_lease_is_not_overwritten(self):
+        """Si la reserva caduca y otro worker la toma, el primero no escribe su resultado"""
+        self.create_product(1)
+        first = OutboxWorker(manager=FakeManager(), batch_size=10)
+        [entry] = first.claim()
+        NotificationOutbox.objects.update(available_at=timezone.now() - timedelta(seconds=1))
+        [reclaimed] = OutboxWorker(manager=FakeManager()).claim()
+        self.assertNotEqual(reclaimed.claimed_by, entry.claimed_by)
+
+        first.deliver(entry)
+
+        row = NotificationOutbox.objects.get()
+        self.assertEqual(row.status, NotificationOutbox.Status.PENDING)
+        self.assertEqual((row.claimed_by, row.attempts), (reclaimed.claimed_by, 2))
@@ -0,0 +1,131 @@
+"""
+Tests para la paginación por cursor (keyset) de los listados de la API
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from products.models import Product, ScrapeJob
+
+
+class KeysetPaginationTest(APITestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        # Tres productos comparten created_at: el desempate por id debe evitar saltos y repeticiones
+        Product.objects.bulk_create([
+            Product(
+                title=f'Product {i:02d}',
+                price=Decimal(10 + i % 4),
+                url=f'https://example.com/page-{i}',
+                created_at=now - timedelta(minutes=max(i, 3)),
+            )
+            for i in range(12)
+        ])
+        self.expected = [
+            product.title for product in Product.objects.order_by('-created_at', '-id')
+        ]
+
+    def walk(self, params, link='next'):
+        response = self.client.get(reverse('product-list'), params)
+        pages = [response.data]
+        while response.data[link]:
+            response = self.client.get(response.data[link])
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+        return pages
+
+    def test_forward_and_backward_traversal(self):
+        pages = self.walk({'page_size': 5})
+        self.assertEqual([len(page['results']) for page in pages], [5, 5, 2])
+        self.assertEqual([item['title'] for page in pages for item in page['results']], self.expected)
+        self.assertIsNone(pages[0]['previous'])
+        self.assertNotIn('count', pages[0])
+
+        previous = self.client.get(pages[-1]['previous']).data
+        self.assertEqual([item['title'] for item in previous['results']], self.expected[5:10])
+        self.assertIsNotNone(previous['previous'])
+
+    def test_deep_page_costs_the_same_as_first_page(self):
+        url = reverse('product-list')
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get(url, {'page_size': 2})
+        for _ in range(4):
+            response = self.client.get(response.data['next'])
+        with CaptureQueriesContext(connection) as deep:
+            self.client.get(response.data['next'])
+
+        self.assertEqual(len(first), len(deep))
+        sql = deep.captured_queries[-1]['sql'].upper()
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT(', sql)
+
+    @override_settings(API_MAX_PAGE_SIZE=4, API_COUNT_ESTIMATE_CAP=5)
+    def test_page_size_cap_and_opt_in_totals(self):
+        response = self.client.get(reverse('product-list'), {'page_size': 50, 'total': 'exact'})
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertEqual((response.data['count'], response.data['count_is_estimate']), (12, False))
+
+        response = self.client.get(reverse('product-list'), {'total': 'estimate'})
+        self.assertEqual((response.data['count'], response.data['count_is_estimate']), (5, True))
+        response = self.client.get(reverse('product-list'), {'total': 'estimate', 'min_price': '13'})
+        self.assertEqual((response.data['count'], response.data['count_is_estimate']), (3, False))
+
+    def test_other_orderings(self):
+        # price no admite NULL: keyset sobre (price, id)
+        pages = self.walk({'page_size': 5, 'ordering': 'price'})
+        prices = [Decimal(item['price']) for page in pages for item in page['results']]
+        self.assertEqual(len(prices), 12)
+        self.assertEqual(prices, sorted(prices))
+
+        # Relevancia de búsqueda: desplazamiento dentro del cursor
+        pages = self.walk({'page_size': 5, 'search': 'product'})
+        titles = [item['title'] for page in pages for item in page['results']]
+        self.assertEqual(sorted(titles), sorted(self.expected))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('product-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class ScrapeJobPaginationTest(APITestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        # Jobs con created_at repetido: el cursor desempata por id (UUID)
+        ScrapeJob.objects.bulk_create([
+            ScrapeJob(query=f'query {i}', source='aliexpress_advanced', created_at=now - timedelta(minutes=i // 2))
+            for i in range(7)
+        ])
+        self.expected = [str(pk) for pk in ScrapeJob.objects.order_by('-created_at', '-id').values_list('id', flat=True)]
+        self.url = reverse('scrape-jobs-list')
+
+    def test_limit_and_cursor_walk(self):
+        response = self.client.get(self.url, {'limit': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['limit'], 3)
+        self.assertNotIn('count', response.data)
+
+        pages = [response.data]
+        while pages[-1]['next']:
+            response = self.client.get(pages[-1]['next'])
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+        self.assertEqual([len(page['results']) for page in pages], [3, 3, 1])
+        self.assertEqual([str(job['id']) for page in pages for job in page['results']], self.expected)
+
+        previous = self.client.get(pages[-1]['previous']).data
+        self.assertEqual([str(job['id']) for job in previous['results']], self.expected[3:6])
+
+    def test_exact_total(self):
+        response = self.client.get(self.url, {'limit': 2, 'total': 'exact'})
+        self.assertEqual((response.data['count'], response.data['count_is_estimate']), (7, False))
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(response.data['limit'], 2)
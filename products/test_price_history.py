@@ -0,0 +1,60 @@
+"""
+Tests para el histórico de precios (PriceObservation)
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from products.models import PriceObservation, Product
+from products.services.price_history import price_series
+from products.services.product_manager import ProductManager
+
+
+class PriceHistoryTest(APITestCase):
+
+    def ingest(self, **changes):
+        row = {'title': 'Tracked earbuds', 'price': '20.00', 'rating': '4.5', 'url': 'https://example.com/tracked'}
+        row.update(changes)
+        return ProductManager.bulk_create_or_update_products([row], update_existing=True)
+
+    def test_observations_only_on_value_changes(self):
+        self.ingest()
+        self.ingest()                          # sin cambios
+        self.ingest(title='Tracked earbuds v2')  # cambio fuera del histórico
+        self.ingest(price='18.50')
+
+        product = Product.objects.get()
+        self.assertEqual(
+            list(product.price_observations.order_by('id').values_list('price', flat=True)),
+            [Decimal('20.00'), Decimal('18.50')]
+        )
+
+    def test_daily_series_min_max_last(self):
+        product = Product.objects.create(title='Series product', price=Decimal('5.00'), url='https://example.com/series')
+        noon = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        for day, minute, price in [(1, 0, '9.00'), (1, 30, '7.00'), (1, 45, '8.00'), (0, 0, '6.00')]:
+            PriceObservation.objects.create(product=product, price=Decimal(price),
+                                            observed_at=noon - timedelta(days=day) + timedelta(minutes=minute))
+
+        series = price_series(product.pk, bucket='day', since=noon - timedelta(days=2))
+
+        self.assertEqual(
+            [(row['min_price'], row['max_price'], row['last_price'], row['observations']) for row in series],
+            [(Decimal('7.00'), Decimal('9.00'), Decimal('8.00'), 3), (Decimal('6.00'), Decimal('6.00'), Decimal('6.00'), 1)]
+        )
+
+    def test_price_history_endpoint(self):
+        self.ingest()
+        product = Product.objects.get()
+        url = reverse('product-price-history', args=[product.pk])
+
+        response = self.client.get(url, {'bucket': 'week'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['series']), 1)
+        self.assertEqual(response.data['series'][0]['last_price'], Decimal('20.00'))
+
+        self.assertEqual(self.client.get(url, {'bucket': 'year'}).status_code, 400)
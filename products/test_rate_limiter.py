@@ -0,0 +1,116 @@
+"""
+Tests para el limitador de peticiones compartido por host
+"""
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from products.services.rate_limiter import (
+    CacheBucketStore,
+    HostRateLimiter,
+    MemoryBucketStore,
+)
+
+
+class FakeClock:
+    """Reloj controlable: sleep avanza el tiempo en lugar de dormir"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class HostRateLimiterTest(SimpleTestCase):
+    """Tests del token bucket por host"""
+
+    def make_limiter(self, store=None, rate=2.0, burst=3):
+        self.clock = FakeClock()
+        limiter = HostRateLimiter(
+            store=store or MemoryBucketStore(),
+            limits={'default': {'rate': rate, 'burst': burst}},
+            clock=self.clock.time,
+            sleep=self.clock.sleep,
+        )
+        return limiter
+
+    def test_burst_then_rate(self):
+        """La ráfaga pasa sin espera y después se respeta la tasa"""
+        limiter = self.make_limiter(rate=2.0, burst=3)
+
+        waits = [limiter.reserve('https://www.aliexpress.com/wholesale') for _ in range(5)]
+
+        self.assertEqual(waits[:3], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(waits[3], 0.5)
+        self.assertAlmostEqual(waits[4], 1.0)
+
+    def test_idle_time_refills_bucket(self):
+        """Tras un periodo inactivo no se espera nada"""
+        limiter = self.make_limiter(rate=2.0, burst=2)
+        for _ in range(4):
+            limiter.acquire('www.aliexpress.com')
+
+        self.clock.now += 10
+        self.assertEqual(limiter.acquire('www.aliexpress.com'), 0.0)
+
+    def test_hosts_are_independent(self):
+        """Cada host tiene su propio presupuesto"""
+        limiter = self.make_limiter(rate=1.0, burst=1)
+        limiter.reserve('https://www.aliexpress.com/a')
+
+        self.assertEqual(limiter.reserve('https://es.aliexpress.com/a'), 0.0)
+        self.assertAlmostEqual(limiter.reserve('https://www.aliexpress.com/b'), 1.0)
+
+    def test_penalize_delays_next_request(self):
+        """Una penalización (429) retrasa la siguiente petición al host"""
+        limiter = self.make_limiter(rate=10.0, burst=1)
+        limiter.penalize('www.aliexpress.com', 5)
+
+        self.assertGreaterEqual(limiter.reserve('www.aliexpress.com'), 5.0)
+
+    def test_wait_metrics(self):
+        """Las métricas acumulan peticiones y tiempos de espera"""
+        limiter = self.make_limiter(rate=1.0, burst=1)
+        for _ in range(3):
+            limiter.acquire('www.aliexpress.com')
+
+        stats = limiter.get_stats()['www.aliexpress.com']
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['waited'], 2)
+        self.assertAlmostEqual(stats['max_wait'], 1.0)
+        self.assertAlmostEqual(stats['total_wait'], 2.0)
+
+    def test_cache_store_shared_between_limiters(self):
+        """Con el cache de Django dos limitadores (procesos) comparten el presupuesto"""
+        cache.clear()
+        store_a = CacheBucketStore(prefix='test-ratelimit')
+        store_b = CacheBucketStore(prefix='test-ratelimit')
+        limiter_a = self.make_limiter(store=store_a, rate=1.0, burst=1)
+        limiter_b = HostRateLimiter(
+            store=store_b,
+            limits={'default': {'rate': 1.0, 'burst': 1}},
+            clock=self.clock.time,
+            sleep=self.clock.sleep,
+        )
+
+        self.assertEqual(limiter_a.reserve('www.aliexpress.com'), 0.0)
+        self.assertAlmostEqual(limiter_b.reserve('www.aliexpress.com'), 1.0)
+        cache.clear()
+
+    def test_cache_store_keeps_foreign_lock_after_timeout(self):
+        """Tras agotar la espera del lock no se borra el lock que tiene otro proceso"""
+        cache.clear()
+        store = CacheBucketStore(prefix='test-ratelimit')
+        store.lock_timeout = 0.01
+        cache.set('test-ratelimit:lock:www.aliexpress.com', 'other-process', timeout=60)
+
+        store.reserve('www.aliexpress.com', interval=1.0, burst=1, now=1000.0)
+
+        self.assertEqual(cache.get('test-ratelimit:lock:www.aliexpress.com'), 'other-process')
+        store.reserve('www.temu.com', interval=1.0, burst=1, now=1000.0)
+        self.assertIsNone(cache.get('test-ratelimit:lock:www.temu.com'))
+        cache.clear()
@@ -0,0 +1,71 @@
+"""
+Tests para la retención de productos por bloques
+"""
+
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from products.models import PriceObservation, Product
+from products.services.retention import RetentionRunner, get_retention_policies
+
+
+class RetentionTest(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        rows = [
+            ('aliexpress', 10), ('aliexpress', 40), ('aliexpress', 45),
+            ('amazon', 40), ('amazon', 100),
+            ('temu', 5), ('temu', 50),
+        ]
+        for index, (platform, age) in enumerate(rows):
+            product = Product.objects.create(
+                title=f'{platform} {age}', price=Decimal('3.00'),
+                url=f'https://example.com/{platform}/{index}', source_platform=platform
+            )
+            PriceObservation.objects.create(product=product, price=product.price)
+            Product.objects.filter(pk=product.pk).update(created_at=now - timedelta(days=age))
+
+    def remaining(self):
+        return sorted(Product.objects.values_list('title', flat=True))
+
+    def test_chunked_delete_with_platform_windows(self):
+        policies = get_retention_policies(30, {'amazon': 60, 'temu': 0})
+        report = RetentionRunner(policies=policies, chunk_size=1, archive_format='').run()
+
+        self.assertEqual((report['default']['deleted'], report['default']['chunks']), (2, 2))
+        self.assertEqual(report['amazon']['deleted'], 1)
+        self.assertNotIn('temu', report)
+        self.assertEqual(self.remaining(), ['aliexpress 10', 'amazon 40', 'temu 5', 'temu 50'])
+        self.assertEqual(PriceObservation.objects.count(), 4)
+
+    def test_dry_run_only_counts(self):
+        out = StringIO()
+        call_command('apply_retention', days=30, platform_days=['amazon=60'], dry_run=True, stdout=out)
+
+        self.assertIn('[dry-run] amazon (60 días): 1 productos', out.getvalue())
+        self.assertIn('[dry-run] default (30 días): 3 productos', out.getvalue())
+        self.assertEqual(Product.objects.count(), 7)
+
+    def test_ndjson_archive_before_delete(self):
+        with tempfile.TemporaryDirectory() as archive_dir:
+            report = RetentionRunner(
+                policies=get_retention_policies(30, {}), chunk_size=2,
+                archive_format='ndjson', archive_dir=archive_dir
+            ).run()
+
+            with gzip.open(report['default']['archive'], 'rt', encoding='utf-8') as handle:
+                archived = [json.loads(line) for line in handle]
+
+        self.assertEqual(sorted(row['title'] for row in archived),
+                         ['aliexpress 40', 'aliexpress 45', 'amazon 100', 'amazon 40', 'temu 50'])
+        self.assertEqual(archived[0]['price'], '3.00')
+        self.assertEqual(self.remaining(), ['aliexpress 10', 'temu 5'])
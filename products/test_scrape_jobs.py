@@ -87,7 +87,7 @@ class ScrapeJobEndpointsTestCase(TestCase):
             status=ScrapeJob.Status.PENDING
         )
         
-        response = self.client.get(self.jobs_list_url)
+        response = self.client.get(self.jobs_list_url + '?total=exact')
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         data = response.json()
@@ -95,7 +95,7 @@ class ScrapeJobEndpointsTestCase(TestCase):
         self.assertEqual(data['count'], 2)
         self.assertEqual(len(data['results']), 2)
         self.assertEqual(data['limit'], 20)
-        self.assertEqual(data['offset'], 0)
+        self.assertIsNone(data['next'])
         
         # Verificar orden (más reciente primero)
         self.assertEqual(data['results'][0]['id'], str(job2.id))
@@ -110,15 +110,22 @@ class ScrapeJobEndpointsTestCase(TestCase):
                 source='aliexpress_advanced'
             )
         
-        response = self.client.get(self.jobs_list_url + '?limit=2&offset=1')
+        response = self.client.get(self.jobs_list_url + '?limit=2')
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         data = response.json()
         
-        self.assertEqual(data['count'], 5)
+        self.assertNotIn('count', data)
         self.assertEqual(len(data['results']), 2)
         self.assertEqual(data['limit'], 2)
-        self.assertEqual(data['offset'], 1)
+        
+        # Recorrer con el cursor hasta el final sin repetir jobs
+        seen = [job['id'] for job in data['results']]
+        while data['next']:
+            data = self.client.get(data['next']).json()
+            seen.extend(job['id'] for job in data['results'])
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
 
     def test_scrape_job_detail(self):
         """Test obtener detalle de un ScrapeJob específico."""
@@ -0,0 +1,108 @@
+"""
+Tests para la búsqueda de texto completo (FTS5 en SQLite, respaldo LIKE)
+"""
+
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from products.models import Product
+from products.services.filters import ProductFilter
+from products.services.product_manager import ProductManager
+from products.services.search import (
+    LikeSearchBackend, SqliteFtsSearchBackend, get_search_backend, search_products,
+)
+
+
+def titles(queryset):
+    return [product.title for product in queryset]
+
+
+class SearchIndexTest(TestCase):
+
+    def setUp(self):
+        self.earbuds = Product.objects.create(
+            title='Wireless Earbuds Pro', price=Decimal('20.00'), url='https://example.com/earbuds', category='Audio'
+        )
+        self.cable = Product.objects.create(
+            title='USB-C Cable', price=Decimal('3.00'), url='https://example.com/cable', category='Wireless accessories'
+        )
+
+    def test_fts_backend_selected(self):
+        self.assertIsInstance(get_search_backend(), SqliteFtsSearchBackend)
+
+    def test_index_follows_every_write_path(self):
+        ProductManager.bulk_create_or_update_products([
+            {'title': 'Ergonómica silla', 'price': '80.00', 'url': 'https://example.com/silla', 'category': 'Office'}
+        ])
+        Product.objects.filter(pk=self.cable.pk).update(title='Lightning Cable')
+        self.earbuds.delete()
+
+        self.assertEqual(titles(search_products(Product.objects.all(), 'ergonomica')), ['Ergonómica silla'])
+        self.assertEqual(titles(search_products(Product.objects.all(), 'lightn')), ['Lightning Cable'])
+        self.assertFalse(search_products(Product.objects.all(), 'usb').exists())
+        self.assertFalse(search_products(Product.objects.all(), 'earbuds').exists())
+
+    def test_prefix_terms_and_title_ranked_first(self):
+        results = search_products(Product.objects.all(), 'wirel').order_by('-search_rank')
+        self.assertEqual(titles(results), ['Wireless Earbuds Pro', 'USB-C Cable'])
+        self.assertEqual(titles(search_products(Product.objects.all(), 'wireless cable')), ['USB-C Cable'])
+        self.assertEqual(titles(search_products(Product.objects.all(), 'wireless', fields=['title'])),
+                         ['Wireless Earbuds Pro'])
+
+    def test_operators_in_user_input_are_plain_terms(self):
+        self.assertEqual(titles(search_products(Product.objects.all(), '"earbuds* -(pro:')),
+                         ['Wireless Earbuds Pro'])
+        self.assertEqual(search_products(Product.objects.all(), '*** ""').count(), 2)
+
+    def test_keyword_filter_matches_any_keyword(self):
+        product_filter = ProductFilter().add_keyword_filter(['earbuds', 'cable'], search_in_category=False)
+        self.assertEqual(product_filter.filter_queryset(Product.objects.all()).count(), 2)
+
+    def test_keyword_phrases_match_consecutive_terms(self):
+        Product.objects.create(title='Wireless gaming mouse', price=Decimal('9.00'), url='https://example.com/mouse')
+        Product.objects.create(title='Wireless Mousepad', price=Decimal('4.00'), url='https://example.com/pad')
+        product_filter = ProductFilter().add_keyword_filter(['wireless mouse', 'usb-c'], search_in_category=False)
+
+        matched = titles(product_filter.filter_queryset(Product.objects.order_by('title')))
+        self.assertEqual(matched, ['USB-C Cable', 'Wireless Mousepad'])
+        listed = product_filter.filter_product_list(
+            list(Product.objects.order_by('title').values('title', 'category'))
+        )
+        self.assertEqual([product['title'] for product in listed], matched)
+
+    @override_settings(SEARCH_BACKEND='like')
+    def test_like_fallback_keyword_phrases(self):
+        product_filter = ProductFilter().add_keyword_filter(['earbuds pro', 'cable usb'])
+        self.assertEqual(titles(product_filter.filter_queryset(Product.objects.all())), ['Wireless Earbuds Pro'])
+
+    @override_settings(SEARCH_BACKEND='like')
+    def test_like_fallback(self):
+        self.assertIsInstance(get_search_backend(), LikeSearchBackend)
+        self.assertEqual(titles(search_products(Product.objects.all(), 'earbuds pro')), ['Wireless Earbuds Pro'])
+
+
+class ProductSearchApiTest(APITestCase):
+
+    def test_list_search_ordered_by_relevance(self):
+        for i, (title, category) in enumerate([
+            ('Phone case', 'Wireless'), ('Wireless charger', 'Phones'), ('Desk lamp', 'Home'),
+        ]):
+            Product.objects.create(title=title, price=Decimal('5.00'), url=f'https://example.com/s{i}', category=category)
+
+        response = self.client.get(reverse('product-list'), {'search': 'wireless'})
+        self.assertEqual([item['title'] for item in response.data['results']], ['Wireless charger', 'Phone case'])
+
+        response = self.client.get(reverse('product-list'), {'search': 'wireless', 'ordering': 'created_at'})
+        self.assertEqual([item['title'] for item in response.data['results']], ['Phone case', 'Wireless charger'])
+
+    def test_finder_catalog_source(self):
+        Product.objects.create(title='Mechanical keyboard', price=Decimal('45.00'), url='https://example.com/kb')
+        Product.objects.create(title='Keyboard cover', price=Decimal('4.00'), url='https://example.com/kc')
+
+        response = self.client.get(reverse('product-finder'), {
+            'run': '1', 'source': 'catalog', 'search_term': 'keyboard', 'min_price': '10'
+        })
+        self.assertEqual(titles(response.context['results']), ['Mechanical keyboard'])
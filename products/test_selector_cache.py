@@ -0,0 +1,102 @@
+"""
+Tests para la cache aprendida de selectores de contenedor
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from products.services.html_parser import parse_html
+from products.services.selector_cache import SelectorCache, layout_key, select_containers, selector_set_key
+
+SELECTORS = ['.item', '.product-item', '.list-item', '.gallery-item']
+
+
+def page(css_class: str, items: int = 6) -> bytes:
+    cards = ''.join(f'<div class="{css_class}"><a href="/item/{i}.html">Producto {i}</a></div>' for i in range(items))
+    return f'<html><body>{cards}</body></html>'.encode()
+
+
+class CountingSoup:
+    """Envuelve un soup para contar las llamadas a select()"""
+
+    def __init__(self, soup):
+        self.soup = soup
+        self.calls = []
+
+    def select(self, selector):
+        self.calls.append(selector)
+        return self.soup.select(selector)
+
+
+class SelectorCacheTest(SimpleTestCase):
+    """Tests del orden aprendido y su persistencia"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = Path(self.directory) / 'selectors.json'
+        self.key = layout_key('https://www.aliexpress.com/wholesale?SearchText=mouse')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_layout_key(self):
+        self.assertEqual(self.key, 'www.aliexpress.com/wholesale')
+        self.assertEqual(layout_key('//es.AliExpress.com/w/wholesale-mouse.html'), 'es.aliexpress.com/w')
+
+    def test_winner_is_tried_first(self):
+        """Tras la primera página el ganador se prueba primero: un solo recorrido"""
+        cache = SelectorCache(self.path)
+        soup = parse_html(page('gallery-item'))
+
+        first = CountingSoup(soup)
+        self.assertEqual(select_containers(first, SELECTORS, self.key, cache=cache)[0], '.gallery-item')
+        self.assertEqual(len(first.calls), 4)
+
+        second = CountingSoup(soup)
+        selector, elements = select_containers(second, SELECTORS, self.key, cache=cache)
+        self.assertEqual(selector, '.gallery-item')
+        self.assertEqual(len(elements), 6)
+        self.assertEqual(second.calls, ['.gallery-item'])
+
+        stats = cache.get_stats()[selector_set_key(self.key, SELECTORS)]
+        self.assertEqual(stats['pages'], 2)
+        self.assertEqual(stats['scans_per_page'], 2.5)
+        self.assertEqual(stats['first_try_rate'], 0.5)
+
+    def test_layout_change_and_demotion(self):
+        """Si el ganador deja de funcionar se aprende otro y los que fallan se relegan"""
+        cache = SelectorCache(self.path, max_misses=2)
+        for _ in range(2):
+            select_containers(parse_html(page('list-item')), SELECTORS, self.key, cache=cache)
+
+        selector, _ = select_containers(parse_html(page('gallery-item')), SELECTORS, self.key, cache=cache)
+
+        self.assertEqual(selector, '.gallery-item')
+        self.assertEqual(
+            cache.order(selector_set_key(self.key, SELECTORS), SELECTORS),
+            ['.gallery-item', '.list-item', '.item', '.product-item']
+        )
+
+    def test_state_persists_between_runs(self):
+        cache = SelectorCache(self.path)
+        select_containers(parse_html(page('list-item')), SELECTORS, self.key, cache=cache)
+        cache.save()
+
+        reloaded = SelectorCache(self.path)
+        key = selector_set_key(self.key, SELECTORS)
+        self.assertEqual(reloaded.order(key, SELECTORS)[0], '.list-item')
+        self.assertEqual(reloaded.get_stats()[key]['pages'], 1)
+
+    def test_selector_lists_do_not_share_winner(self):
+        """Dos scrapers con listas distintas en el mismo layout aprenden cada uno la suya"""
+        cache = SelectorCache(self.path)
+        other_selectors = ['.search-item', '.list-item']
+        select_containers(parse_html(page('list-item')), SELECTORS, self.key, cache=cache)
+
+        soup = CountingSoup(parse_html(page('search-item')))
+        self.assertEqual(select_containers(soup, other_selectors, self.key, cache=cache)[0], '.search-item')
+        self.assertEqual(soup.calls, ['.search-item'])
+        self.assertEqual(len(cache.get_stats()), 2)
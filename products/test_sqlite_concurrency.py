@@ -0,0 +1,129 @@
+"""
+Tests para el modo SQLite de alta concurrencia (perfil de conexión y escritor único)
+"""
+
+import queue
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.db import OperationalError, connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from products.models import Product
+from products.services.product_manager import ProductIngestion
+from products.services.sqlite_concurrency import IngestWriter
+
+
+class SqliteProfileTest(SimpleTestCase):
+
+    def pragmas(self, **overrides):
+        with tempfile.TemporaryDirectory() as workdir:
+            wrapper = DatabaseWrapper(
+                dict(connection.settings_dict, NAME=str(Path(workdir) / 'profile.sqlite3')), alias='profile'
+            )
+            with override_settings(**overrides):
+                wrapper.ensure_connection()
+            try:
+                with wrapper.cursor() as cursor:
+                    return tuple(
+                        cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                        for name in ('journal_mode', 'busy_timeout', 'synchronous')
+                    )
+            finally:
+                wrapper.close()
+
+    def test_profile_applied_on_connection_created(self):
+        self.assertEqual(
+            self.pragmas(SQLITE_CONCURRENCY=True, SQLITE_BUSY_TIMEOUT_MS=2500),
+            ('wal', 2500, 1)
+        )
+
+    def test_profile_is_opt_in(self):
+        self.assertEqual(self.pragmas(SQLITE_CONCURRENCY=False)[0], 'delete')
+
+
+class IngestWriterTest(TestCase):
+
+    def test_groups_submissions_in_one_transaction(self):
+        writer = IngestWriter(max_wait=0)
+        for producer in range(3):
+            writer.submit(
+                [{'name': f'Queued {producer}-{i}', 'price_numeric': '4.00',
+                  'url': f'https://example.com/queued/{producer}/{i}'} for i in range(2)],
+                source_platform='temu'
+            )
+        writer.submit([{'title': 'Queued again', 'price': '4.00', 'url': 'https://example.com/queued/0/0'}])
+        writer.queue.put(None)
+
+        self.assertFalse(writer.write_batch())
+        self.assertEqual(writer.stats['transactions'], 1)
+        self.assertEqual((writer.stats['submissions'], writer.stats['created'], writer.stats['existing']), (4, 6, 1))
+        self.assertEqual(Product.objects.filter(source_platform='temu').count(), 6)
+
+    def test_locked_database_is_retried(self):
+        writer = IngestWriter(max_wait=0, retries=2, retry_delay=0)
+        writer.submit([{'title': 'Locked once', 'price': '4.00', 'url': 'https://example.com/locked'}])
+        write_once = writer._write_once
+        attempts = []
+
+        def locked_once(submissions):
+            attempts.append(submissions)
+            if len(attempts) == 1:
+                raise OperationalError('database is locked')
+            return write_once(submissions)
+
+        with mock.patch.object(writer, '_write_once', side_effect=locked_once):
+            writer.write_batch(block=False)
+
+        self.assertEqual((writer.stats['retries'], writer.stats['created']), (1, 1))
+        self.assertTrue(Product.objects.filter(url='https://example.com/locked').exists())
+
+    def test_failing_submission_does_not_drop_the_batch(self):
+        writer = IngestWriter(max_wait=0, retries=0)
+        writer.submit([{'title': 'Good', 'price': '4.00', 'url': 'https://example.com/good'}])
+        writer.submit([{'title': 'Poison', 'price': '4.00', 'url': 'https://example.com/poison'}])
+        write_once = writer._write_once
+
+        def write_unless_poison(submissions):
+            if any(row['title'] == 'Poison' for rows, _ in submissions for row in rows):
+                raise OperationalError('database is locked')
+            return write_once(submissions)
+
+        with mock.patch.object(writer, '_write_once', side_effect=write_unless_poison):
+            writer.write_batch(block=False)
+
+        self.assertEqual(list(Product.objects.values_list('title', flat=True)), ['Good'])
+        self.assertEqual((writer.stats['failed_submissions'], writer.stats['errors']), (1, 1))
+
+
+class IngestionRoutingTest(TestCase):
+
+    @override_settings(INGEST_WRITER_ENABLED=True)
+    def test_ingestion_submits_chunks_to_the_writer(self):
+        writer_queue = queue.Queue()
+        with mock.patch('products.services.sqlite_concurrency.connect_ingest_queue', return_value=writer_queue):
+            ingestion = ProductIngestion(source_platform='temu', chunk_size=2, update_existing=True)
+            ingestion.extend(
+                {'name': f'Routed {i}', 'price_numeric': '4.00', 'url': f'https://example.com/routed/{i}'}
+                for i in range(3)
+            )
+            stats = ingestion.flush()
+
+        self.assertEqual((stats['queued'], stats['created']), (3, 0))
+        self.assertFalse(Product.objects.exists())
+
+        writer = IngestWriter(source=writer_queue, max_wait=0)
+        writer.write_batch(block=False)
+        self.assertEqual((writer.stats['submissions'], writer.stats['created']), (2, 3))
+
+    @override_settings(INGEST_WRITER_ENABLED=True)
+    def test_ingestion_writes_directly_without_writer(self):
+        with mock.patch(
+            'products.services.sqlite_concurrency.connect_ingest_queue', side_effect=ConnectionRefusedError()
+        ):
+            ingestion = ProductIngestion()
+            ingestion.add({'title': 'Direct', 'price': '4.00', 'url': 'https://example.com/direct'})
+            stats = ingestion.flush()
+        self.assertEqual((stats['queued'], stats['created']), (0, 1))
@@ -0,0 +1,107 @@
+"""
+Tests para la frecuencia de términos de los títulos (ProductTermFrequency)
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from products.models import Product, ProductTermFrequency
+from products.services.product_manager import ProductManager
+from products.services.retention import RetentionPolicy, RetentionRunner
+from products.services.title_terms import rebuild_title_terms, title_terms, top_terms
+
+
+def snapshot():
+    return sorted(ProductTermFrequency.objects.values_list('date', 'term', 'product_count'))
+
+
+def ingest(*titles, update_existing=False):
+    return ProductManager.bulk_create_or_update_products([
+        {'title': title, 'price': '9.99', 'url': f'https://example.com/terms-{i}'}
+        for i, title in enumerate(titles)
+    ], update_existing=update_existing)
+
+
+class TitleTermsTest(TestCase):
+
+    def test_tokenizer(self):
+        self.assertEqual(
+            title_terms('Wireless Earbuds 2024 with FREE shipping - Wireless Pro X1'),
+            {'wireless', 'earbuds', 'shipping'}
+        )
+        self.assertEqual(title_terms(None), set())
+
+    def test_ingestion_and_title_changes_match_rebuild(self):
+        ingest('Wireless earbuds', 'Wireless charger', 'Desk lamp')
+        self.assertEqual(top_terms(limit=1), [('wireless', 2)])
+
+        ingest('Wireless earbuds', 'Magnetic charger', 'Desk lamp', update_existing=True)
+        ProductManager.upsert_product(
+            {'title': 'Bamboo lamp', 'price': '9.99', 'url': 'https://example.com/terms-2'}, update_existing=True
+        )
+        incremental = snapshot()
+        self.assertNotIn('desk', [term for _, term, _ in incremental])
+
+        rebuild_title_terms()
+        self.assertEqual(snapshot(), incremental)
+        self.assertEqual(dict(top_terms()), {'wireless': 1, 'earbuds': 1, 'magnetic': 1, 'charger': 1, 'bamboo': 1, 'lamp': 1})
+
+    def test_rebuild_command_window(self):
+        Product.objects.create(
+            title='Vintage camera', price=Decimal('30.00'), url='https://example.com/old-camera',
+            created_at=timezone.now() - timedelta(days=20)
+        )
+        Product.objects.create(title='Vintage radio', price=Decimal('20.00'), url='https://example.com/radio')
+        ProductTermFrequency.objects.all().delete()
+        call_command('rebuild_title_terms', '--days', '7', verbosity=0)
+        self.assertEqual(dict(top_terms()), {'vintage': 1, 'radio': 1})
+
+        call_command('rebuild_title_terms', verbosity=0)
+        self.assertEqual(top_terms(since=timezone.localdate() - timedelta(days=7)), [('radio', 1), ('vintage', 1)])
+        self.assertEqual(top_terms(limit=1), [('vintage', 2)])
+
+
+    def test_deletions_subtract_terms(self):
+        ingest('Wireless earbuds', 'Wireless charger')
+        old = Product.objects.create(
+            title='Wireless radio', price=Decimal('20.00'), url='https://example.com/old-radio',
+            created_at=timezone.now() - timedelta(days=40)
+        )
+        self.assertEqual(top_terms(limit=1), [('wireless', 3)])
+
+        RetentionRunner(policies=[RetentionPolicy(None, 30)]).run()
+        Product.objects.get(title='Wireless charger').delete()
+
+        self.assertEqual(dict(top_terms()), {'wireless': 1, 'earbuds': 1})
+        incremental = snapshot()
+        rebuild_title_terms()
+        self.assertEqual(snapshot(), incremental)
+
+
+class KeywordEndpointsTest(APITestCase):
+
+    def test_keyword_rankings_do_not_scan_titles(self):
+        ingest('Wireless earbuds', 'Wireless charger', 'Gaming mouse')
+        with self.assertNumQueries(2):
+            trends = self.client.get(reverse('trend-analysis')).data
+        self.assertEqual(trends['trending_keywords'][0], ('wireless', 2))
+
+        metrics = self.client.get(reverse('product-metrics')).data
+        self.assertEqual(metrics['top_keywords'][0], ('wireless', 2))
+        self.assertEqual(len(metrics['top_keywords']), 5)
+
+    @override_settings(PRODUCT_RETENTION_DAYS=7, PRODUCT_RETENTION_DAYS_BY_PLATFORM={})
+    def test_metrics_keywords_use_retention_window(self):
+        ingest('Wireless earbuds')
+        Product.objects.create(
+            title='Vintage camera', price=Decimal('30.00'), url='https://example.com/old-camera',
+            created_at=timezone.now() - timedelta(days=20)
+        )
+        metrics = self.client.get(reverse('product-metrics')).data
+        self.assertEqual(dict(metrics['top_keywords']), {'wireless': 1, 'earbuds': 1})
@@ -0,0 +1,112 @@
+"""
+Tests para la URL canónica y la clave url_key de identidad de productos
+"""
+
+import importlib
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from products.models import Product
+from products.services.product_manager import ProductIngestion, ProductManager
+from products.services.url_canonical import canonical_product_url, product_url_key
+
+VARIANTS = [
+    '//es.aliexpress.com/item/1005001234.html?spm=a2g0o.productlist&algo_pvid=abc',
+    'https://www.aliexpress.com/item/1005001234.html#nav-review',
+    'http://aliexpress.com/item/1005001234.html?gatewayAdapt=glo2esp',
+]
+
+
+class CanonicalUrlTest(SimpleTestCase):
+
+    def test_variants_share_key(self):
+        self.assertEqual({canonical_product_url(url) for url in VARIANTS},
+                         {'https://aliexpress.com/item/1005001234.html'})
+        self.assertEqual(len({product_url_key(url) for url in VARIANTS}), 1)
+        self.assertEqual(len(product_url_key(VARIANTS[0])), 32)
+
+    def test_marketplace_rules_only_on_marketplace_hosts(self):
+        self.assertEqual(
+            canonical_product_url('https://www.de.example.com/p?ref=home&tag=red&th=1&utm_medium=x'),
+            'https://de.example.com/p?ref=home&tag=red&th=1'
+        )
+        self.assertEqual(
+            canonical_product_url('https://es.amazon.com/s?k=mouse&ref=nb_sb&tag=aff-21'),
+            'https://amazon.com/s?k=mouse'
+        )
+
+    def test_generic_urls_keep_identifying_params(self):
+        self.assertEqual(
+            canonical_product_url('https://Shop.example.com/p/?b=2&a=1&utm_source=x&fbclid=y'),
+            'https://shop.example.com/p?a=1&b=2'
+        )
+        self.assertNotEqual(product_url_key('https://example.com/p?id=1'),
+                            product_url_key('https://example.com/p?id=2'))
+
+
+class UrlKeyIngestionTest(TestCase):
+
+    def test_ingestion_dedups_url_variants(self):
+        ingestion = ProductIngestion()
+        ingestion.extend({'title': 'Earbuds', 'price': '10.00', 'url': url} for url in VARIANTS[:2])
+        ingestion.flush()
+        # Otra ejecución con una tercera variante
+        second = ProductIngestion()
+        second.add({'title': 'Earbuds', 'price': '10.00', 'url': VARIANTS[2]})
+        stats = second.flush()
+
+        self.assertEqual((stats['created'], stats['existing']), (0, 1))
+        product = Product.objects.get()
+        self.assertEqual(product.url_key, product_url_key(VARIANTS[2]))
+
+    def make_legacy(self, url, **fields):
+        """Producto anterior a url_key (sin clave)"""
+        product = Product.objects.create(title=fields.pop('title', 'Legacy'), price=Decimal('1.00'), url=url, **fields)
+        Product.objects.filter(pk=product.pk).update(url_key=None)
+        return product
+
+    def test_backfill_keeps_newest_duplicate(self):
+        now = timezone.now()
+        self.make_legacy('https://www.aliexpress.com/item/1.html', created_at=now - timedelta(days=2))
+        newest = self.make_legacy('https://es.aliexpress.com/item/1.html?spm=x', created_at=now)
+        # Ya con clave, pero más antiguo que ``newest``
+        holder = Product.objects.create(
+            title='Holder', price=Decimal('1.00'), url='http://aliexpress.com/item/1.html',
+            created_at=now - timedelta(days=1)
+        )
+        other = self.make_legacy('https://example.com/other')
+
+        out = StringIO()
+        call_command('backfill_url_keys', chunk_size=1, dry_run=True, stdout=out)
+        # Duplicados entre bloques aunque no se escriba nada
+        self.assertIn('duplicados 2', out.getvalue())
+        self.assertEqual(Product.objects.filter(url_key__isnull=True).count(), 3)
+
+        call_command('backfill_url_keys', chunk_size=1, stdout=StringIO())
+        self.assertEqual(sorted(Product.objects.values_list('pk', flat=True)), sorted([newest.pk, other.pk]))
+        self.assertEqual(Product.objects.get(url_key=product_url_key(holder.url)).pk, newest.pk)
+        self.assertFalse(Product.objects.filter(url_key__isnull=True).exists())
+        # Misma regla que la deduplicación: no queda nada que eliminar
+        self.assertEqual(ProductManager.deduplicate_products()['removed'], 0)
+
+    def test_migration_fills_keys(self):
+        legacy = self.make_legacy('https://www.amazon.com/dp/B000000001?tag=x')
+        migration = importlib.import_module('products.migrations.0013_backfill_product_url_key')
+        migration.fill_url_keys(django_apps, None)
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.url_key, product_url_key(legacy.url))
+
+    def test_ingestion_updates_rows_without_key(self):
+        legacy = self.make_legacy('https://example.com/legacy', title='Legacy lamp')
+        stats = ProductManager.bulk_create_or_update_products(
+            [{'title': 'Legacy lamp', 'price': '12.00', 'url': legacy.url}], update_existing=True
+        )
+        self.assertEqual((stats['updated'], stats['existing'], stats['errors']), (1, 0, 0))
+        legacy.refresh_from_db()
+        self.assertEqual((legacy.price, legacy.url_key), (Decimal('12.00'), product_url_key(legacy.url)))
@@ -3,9 +3,13 @@ Tests para la aplicación de productos dropshipping
 """
 
 import json
+from datetime import timedelta
 from decimal import Decimal
 from unittest.mock import patch, MagicMock
+from django.db import IntegrityError, connection
+from django.db.models.signals import post_save
 from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework.test import APITestCase
@@ -13,7 +17,7 @@ from rest_framework import status
 from products.models import Product
 from products.services.scraper import MockScraper, ScraperFactory, scrape_all_platforms
 from products.services.filters import ProductFilter, create_filter_from_params
-from products.services.product_manager import ProductManager, create_product_safe, bulk_import_products
+from products.services.product_manager import ProductManager, create_product_safe, bulk_import_products, import_product_pages
 from products.services.notifications import TelegramNotificationService, DiscordNotificationService
 
 
@@ -272,6 +276,138 @@ class ProductManagerTest(TransactionTestCase):
         self.assertEqual(stats['created'], 2)
         self.assertEqual(stats['existing'], 1)
         self.assertEqual(Product.objects.count(), 2)
+    
+    def test_import_product_pages_persists_each_page(self):
+        """Cada página queda guardada antes de que llegue la siguiente"""
+        counts_seen = []
+        
+        def pages():
+            for page in range(1, 4):
+                counts_seen.append(Product.objects.count())
+                yield [
+                    {
+                        'title': f'Streamed Product {page}-{i}',
+                        'price': '9.99',
+                        'url': f'https://example.com/streamed-{page}-{i}'
+                    }
+                    for i in range(2)
+                ]
+        
+        progress = []
+        stats = import_product_pages(pages(), on_page=lambda page, page_stats: progress.append(page))
+        
+        self.assertEqual(counts_seen, [0, 2, 4])
+        self.assertEqual(progress, [1, 2, 3])
+        self.assertEqual(stats['created'], 6)
+        self.assertEqual(stats['pages'], 3)
+    
+    def test_deduplicate_products_keeps_most_recent(self):
+        """La deduplicación borra por bloques y conserva el producto más reciente de cada grupo"""
+        now = timezone.now()
+        for i, (title, age) in enumerate([('Twin', 3), ('Twin', 1), ('Twin', 2), ('Solo', 1), ('Pair', 5), ('Pair', 4)]):
+            product = Product.objects.create(title=title, price=Decimal('5.00'), url=f'https://example.com/dup-{i}')
+            Product.objects.filter(pk=product.pk).update(created_at=now - timedelta(days=age))
+        
+        report = ProductManager.deduplicate_products(fields=('source_platform', 'title'), chunk_size=2)
+        
+        self.assertEqual(report, {'groups': 2, 'removed': 3, 'chunks': 2})
+        self.assertEqual(
+            sorted(Product.objects.values_list('url', flat=True)),
+            ['https://example.com/dup-1', 'https://example.com/dup-3', 'https://example.com/dup-5']
+        )
+        self.assertEqual(ProductManager.deduplicate_products(), {'groups': 0, 'removed': 0, 'chunks': 0})
+    
+    def test_bulk_upsert_constant_queries(self):
+        """El número de consultas por lote no depende del número de filas"""
+        def rows(n, price='9.99'):
+            return [
+                {'title': f'Bulk Product {i}', 'price': price, 'url': f'https://example.com/bulk-{i}'}
+                for i in range(n)
+            ]
+        
+        with CaptureQueriesContext(connection) as small:
+            ProductManager.bulk_create_or_update_products(rows(5), batch_size=100)
+        with CaptureQueriesContext(connection) as large:
+            stats = ProductManager.bulk_create_or_update_products(rows(50), batch_size=100)
+        
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(stats, {'created': 45, 'updated': 0, 'unchanged': 0, 'existing': 5, 'errors': 0})
+        
+        stats = ProductManager.bulk_create_or_update_products(rows(50, price='12.50'), update_existing=True)
+        self.assertEqual(stats['updated'], 50)
+        self.assertEqual(Product.objects.filter(price=Decimal('12.50')).count(), 50)
+    
+    def test_unchanged_rows_are_not_rewritten(self):
+        """Re-ingerir un catálogo sin cambios no escribe filas; solo se actualizan las que cambian"""
+        rows = [
+            {'title': f'Stable Product {i}', 'price': '9.90', 'url': f'https://example.com/stable-{i}'}
+            for i in range(10)
+        ]
+        ProductManager.bulk_create_or_update_products(rows)
+        rows[3] = dict(rows[3], price='11.00')
+        
+        with CaptureQueriesContext(connection) as queries:
+            stats = ProductManager.bulk_create_or_update_products(rows, update_existing=True)
+        
+        self.assertEqual((stats['updated'], stats['unchanged']), (1, 9))
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "products_product" ')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"title"', updates[0])
+        self.assertEqual(Product.objects.get(url='https://example.com/stable-3').price, Decimal('11.00'))
+        
+        # Camino fila a fila: sin cambios no hay save() ni post_save
+        saves = []
+        receiver = lambda sender, **kwargs: saves.append(kwargs['update_fields'])
+        post_save.connect(receiver, sender=Product)
+        try:
+            stats = ProductManager._process_batch_per_row(rows[:4], update_existing=True)
+        finally:
+            post_save.disconnect(receiver, sender=Product)
+        self.assertEqual(stats['unchanged'], 4)
+        self.assertEqual(saves, [])
+    
+    def test_repeated_url_in_batch_counts_once(self):
+        """Dos filas del mismo lote con la misma URL canónica son un único producto creado"""
+        stats = ProductManager.bulk_create_or_update_products([
+            {'title': 'Twin lamp', 'price': '7.00', 'url': 'https://www.example.com/twin?utm_source=a'},
+            {'title': 'Twin lamp', 'price': '8.00', 'url': 'https://example.com/twin'},
+        ], update_existing=True)
+        
+        self.assertEqual(stats, {'created': 1, 'updated': 0, 'unchanged': 0, 'existing': 1, 'errors': 0})
+        # La última fila del lote gana
+        self.assertEqual(Product.objects.get().price, Decimal('8.00'))
+    
+    def test_bulk_upsert_sends_post_save_for_created(self):
+        """bulk_create no emite post_save: el manager lo envía por cada producto nuevo"""
+        new_urls = []
+        
+        def receiver(sender, instance, created=False, **kwargs):
+            if created:
+                new_urls.append(instance.url)
+        
+        Product.objects.create(title='Existing', price=Decimal('5.00'), url='https://example.com/existing')
+        post_save.connect(receiver, sender=Product)
+        try:
+            ProductManager.bulk_create_or_update_products([
+                {'title': 'Existing', 'price': '5.00', 'url': 'https://example.com/existing'},
+                {'title': 'Fresh product', 'price': '6.00', 'url': 'https://example.com/fresh'},
+            ])
+        finally:
+            post_save.disconnect(receiver, sender=Product)
+        
+        self.assertEqual(new_urls, ['https://example.com/fresh'])
+    
+    def test_bulk_upsert_falls_back_per_row(self):
+        """Si el lote falla se reprocesa fila a fila con las mismas estadísticas"""
+        products_data = [
+            {'title': 'Fallback 1', 'price': '1.99', 'url': 'https://example.com/fallback-1'},
+            {'title': 'Fallback 2', 'price': '2.99', 'url': 'https://example.com/fallback-2'},
+        ]
+        with patch.object(ProductManager, '_upsert_batch', side_effect=IntegrityError('duplicate')):
+            stats = ProductManager.bulk_create_or_update_products(products_data)
+        
+        self.assertEqual(stats['created'], 2)
+        self.assertEqual(Product.objects.count(), 2)
 
 
 class APITest(APITestCase):
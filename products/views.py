@@ -4,6 +4,7 @@ Vistas para la API REST de productos
 
 import logging
 from datetime import datetime, timedelta
+from django.db import transaction
 from django.utils import timezone
 from django.db.models import Avg, Min, Max, Count
 from rest_framework import viewsets, status
@@ -12,9 +13,11 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from celery.result import AsyncResult
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 
+from .db_router import ReplicaReadMixin
+from .pagination import KeysetPagination, ScrapeJobPagination
+from .search_filters import ProductSearchFilter, RelevanceOrderingFilter
 from .models import Product, ScrapeJob
 from .serializers import (
     ProductSerializer,
@@ -24,18 +27,21 @@ from .serializers import (
     HealthCheckSerializer,
     ScrapeJobSerializer,
 )
+from .services.catalog_snapshot import get_catalog_snapshot
 from .services.filters import create_filter_from_params
+from .services.price_history import price_series
 
 logger = logging.getLogger('products')
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet para operaciones CRUD de productos
     """
     queryset = Product.objects.all()
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, RelevanceOrderingFilter]
     search_fields = ['title', 'category']
     ordering_fields = ['created_at', 'price', 'rating']
     ordering = ['-created_at']
@@ -48,13 +54,19 @@ class ProductViewSet(viewsets.ModelViewSet):
             return ProductListSerializer
         return ProductSerializer
     
-    def get_queryset(self):
+    def perform_create(self, serializer):
+        # El producto y sus rollups (post_save, ver signals.py) en la misma transacción
+        with transaction.atomic():
+            serializer.save()
+    
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+    
+    def get_product_filter(self):
         """
-        Aplica filtros personalizados al queryset
+        ProductFilter con los filtros personalizados de la petición (None si no hay)
         """
-        queryset = super().get_queryset()
-        
-        # Aplicar filtros personalizados
         filter_params = {
             'min_price': self.request.query_params.get('min_price'),
             'max_price': self.request.query_params.get('max_price'),
@@ -68,8 +80,17 @@ class ProductViewSet(viewsets.ModelViewSet):
         # Remover parámetros vacíos
         filter_params = {k: v for k, v in filter_params.items() if v is not None and v != ''}
         
-        if filter_params:
-            product_filter = create_filter_from_params(**filter_params)
+        return create_filter_from_params(**filter_params) if filter_params else None
+    
+    def get_queryset(self):
+        """
+        Aplica filtros personalizados al queryset
+        """
+        queryset = super().get_queryset()
+        
+        # Aplicar filtros personalizados
+        product_filter = self.get_product_filter()
+        if product_filter:
             queryset = product_filter.filter_queryset(queryset)
         
         return queryset
@@ -80,6 +101,12 @@ class ProductViewSet(viewsets.ModelViewSet):
         Endpoint para obtener estadísticas de productos
         """
         try:
+            # Instantánea columnar del catálogo si está disponible y admite los filtros
+            snapshot = get_catalog_snapshot()
+            query = snapshot.query(self.get_product_filter()) if snapshot else None
+            if query is not None:
+                return Response(ProductStatsSerializer(query.stats()).data)
+            
             queryset = self.get_queryset()
             
             # Estadísticas básicas
@@ -176,6 +203,28 @@ class ProductViewSet(viewsets.ModelViewSet):
                 {'error': 'Error interno del servidor'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    @action(detail=True, methods=['get'], url_path='price-history')
+    def price_history(self, request, pk=None):
+        """
+        Endpoint con el histórico de precio del producto reducido por intervalos
+        
+        Parámetros: bucket (hour/day/week/month, por defecto day) y days (por defecto 90)
+        """
+        product = self.get_object()
+        bucket = request.query_params.get('bucket', 'day')
+        try:
+            days = int(request.query_params.get('days', 90))
+            series = price_series(product.pk, bucket=bucket, since=timezone.now() - timedelta(days=days))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'product': product.pk,
+            'bucket': bucket,
+            'days': days,
+            'series': series,
+        })
 
 
 class HealthCheckViewSet(viewsets.ViewSet):
@@ -267,20 +316,12 @@ class AsyncScrapeStatusView(APIView):
 
 
 class ScrapeJobListView(APIView):
-    """Listado de jobs de scraping (paginación simple via query params: limit/offset)."""
+    """Listado de jobs de scraping (paginación por cursor: limit/cursor, total opcional con ?total=exact|estimate)."""
     def get(self, request):
-        limit = int(request.query_params.get('limit', 20))
-        offset = int(request.query_params.get('offset', 0))
-        qs = ScrapeJob.objects.all()
-        total = qs.count()
-        jobs = qs[offset:offset+limit]
+        paginator = ScrapeJobPagination()
+        jobs = paginator.paginate_queryset(ScrapeJob.objects.all(), request, view=self)
         serializer = ScrapeJobSerializer(jobs, many=True)
-        return Response({
-            'count': total,
-            'limit': limit,
-            'offset': offset,
-            'results': serializer.data
-        })
+        return paginator.get_paginated_response(serializer.data)
 
 
 class ScrapeJobDetailView(APIView):